@@ -0,0 +1,72 @@
+"""
+Microbenchmark: recurrence item updates, list/dict rebuild (before) vs RecurrenceItem (after).
+
+    python bench/bench_recurrence_items.py --findings 200000 --fps 500
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.recurrence_update import _apply_finding, _new_item
+from core.recurrence_items import finalize_items
+
+
+def _apply_finding_legacy(items: dict, fp: str, t, tag, support: list, case_id, asof, now: str):
+    # the pre-RecurrenceItem implementation, kept here as the "before" reference
+    item = items.get(fp, _new_item(t, tag, now))
+    item["count"] += 1
+    item["last_seen"] = now
+    item["sources"].append({"case_id": case_id, "asof": asof})
+    seen = set()
+    dedup_sources = []
+    for s in item["sources"]:
+        key = (s.get("case_id"), s.get("asof"))
+        if key in seen:
+            continue
+        seen.add(key)
+        dedup_sources.append(s)
+    item["sources"] = dedup_sources[-20:]
+    item["support"] = list(dict.fromkeys(item.get("support", []) + support))[:200]
+    item["examples"].append({"case_id": case_id, "asof": asof})
+    item["examples"] = item["examples"][-5:]
+    items[fp] = item
+
+
+def _workload(n: int, n_fps: int, seed: int):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        fp = f"fp{rnd.randrange(n_fps):05d}"
+        support = ["type:MISSING_EVIDENCE"] + [f"needs:n{rnd.randrange(400)}" for _ in range(rnd.randrange(4))]
+        out.append((fp, "MISSING_EVIDENCE", None, support, f"case-{rnd.randrange(100)}", f"2026-01-{rnd.randrange(1, 29):02d}"))
+    return out
+
+
+def _run(apply, work, finalize=None) -> tuple[float, dict]:
+    items = {}
+    t0 = time.perf_counter()
+    for fp, t, tag, support, case_id, asof in work:
+        apply(items, fp, t, tag, support, case_id, asof, "2026-01-01T00:00:00+00:00")
+    if finalize:
+        finalize(items)
+    return time.perf_counter() - t0, items
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--findings", type=int, default=100000)
+    ap.add_argument("--fps", type=int, default=500, help="distinct fingerprints (lower = hotter items)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    work = _workload(args.findings, args.fps, args.seed)
+    t_before, before = _run(_apply_finding_legacy, work)
+    t_after, after = _run(_apply_finding, work, finalize_items)
+    assert before == after, "RecurrenceItem output differs from the list-based implementation"
+
+    print(f"[bench] findings={args.findings} fps={args.fps}")
+    print(f"  before (list/dict rebuild): {args.findings / t_before:12.0f} items/sec")
+    print(f"  after  (RecurrenceItem)   : {args.findings / t_after:12.0f} items/sec  ({t_before / t_after:.1f}x)")
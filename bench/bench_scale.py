@@ -0,0 +1,269 @@
+"""
+Scale benchmark: every stage over a seeded synthetic workload (bench/workload.py), at several sizes.
+
+Stages: findings_to_delta, gate (run_once.evaluate_gate), update_recurrence, aggregate, intervene.
+Each (size, stage) runs in a fresh process, so peak RSS is that stage's own (workload input included).
+Per stage: ops, findings/sec, latency percentiles per op, peak RSS -> JSON report.
+
+    python bench/bench_scale.py --sizes 1000,10000,100000 --out out/bench.json
+    python bench/bench_scale.py --sizes 1000,10000,100000 --baseline out/bench.json   # exit 1 on regression
+"""
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bench.workload import delta_entries, findings_docs, make_spec, parse_mix, recurrence_logs
+from core.jsonio import load_json, orjson, save_json
+
+REPORT_VERSION = "bench-scale-v1"
+STAGES = ["findings_to_delta", "gate", "update_recurrence", "aggregate", "intervene"]
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+ASOF = {"asof": "2026-01-21T00:00:00+09:00", "context": {}}
+PROFILE = {"budget_mode": "tight", "deadline_days": 30, "window_cost": 1.0, "intervene_cost_subtract": 1.0,
+           "intervene_cost_add_model": 2.0, "value_breakthrough": 10.0, "base_p_break": 0.15}
+PERCENTILES = (50, 90, 99)
+TOLERANCE = 0.2
+# env fields that change what is measured: a baseline that differs in any of them is not comparable
+ENV_KEYS = ("isolated", "python", "orjson", "numpy")
+
+
+def _timed(fn, items) -> list:
+    """fn over items; per-call latency in ns."""
+    lat = []
+    clock = time.perf_counter_ns
+    for x in items:
+        t0 = clock()
+        fn(x)
+        lat.append(clock() - t0)
+    return lat
+
+
+def _bench_findings_to_delta(spec: dict):
+    from core.findings_to_delta import findings_to_delta
+    docs = list(findings_docs(spec))
+    return len(docs), spec["findings"], _timed(findings_to_delta, docs), 0
+
+
+def _bench_gate(spec: dict):
+    from core.run_once import evaluate_gate
+    deltas = list(delta_entries(spec))
+    return len(deltas), spec["findings"], _timed(lambda d: evaluate_gate(ASOF, d, now=NOW), deltas), 0
+
+
+def _bench_intervene(spec: dict):
+    from core.run_once import evaluate_gate
+    from tools.intervene_gate import decide_intervene
+    gates = [evaluate_gate(ASOF, d, now=NOW) for d in delta_entries(spec)]
+    return len(gates), spec["findings"], _timed(lambda g: decide_intervene(g, PROFILE), gates), 0
+
+
+def _bench_update_recurrence(spec: dict):
+    from core.recurrence_items import finalize_items
+    from core.recurrence_update import ingest_findings_doc
+    docs = list(findings_docs(spec))
+    log = {"version": "v1.1", "items": {}}
+    lat = _timed(lambda doc: ingest_findings_doc(log, doc, now="2026-01-01T00:00:00+00:00"), docs)
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter_ns()
+        finalize_items(log["items"])
+        save_json(Path(tmp) / "recurrence_log.json", log)
+        extra = time.perf_counter_ns() - t0
+    return len(docs), spec["findings"], lat, extra
+
+
+def _bench_aggregate(spec: dict):
+    from tools.recurrence_aggregate import empty_partial, finish, merge_partials, partial_from_file
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i, log in enumerate(recurrence_logs(spec, spec["runs"])):
+            f = Path(tmp) / f"run-{i:04d}" / "recurrence_log.json"
+            save_json(f, log)
+            files.append(f)
+        acc = empty_partial()
+        lat = _timed(lambda f: merge_partials(acc, partial_from_file(f)), files)
+        t0 = time.perf_counter_ns()
+        finish(acc)
+        extra = time.perf_counter_ns() - t0
+    return len(files), spec["findings"], lat, extra
+
+
+BENCHES = {
+    "findings_to_delta": _bench_findings_to_delta,
+    "gate": _bench_gate,
+    "update_recurrence": _bench_update_recurrence,
+    "aggregate": _bench_aggregate,
+    "intervene": _bench_intervene,
+}
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB elsewhere
+
+
+def _percentile(sorted_ns: list, p: float) -> float:
+    """Nearest-rank percentile, in ms."""
+    if not sorted_ns:
+        return 0.0
+    k = max(0, math.ceil(p / 100 * len(sorted_ns)) - 1)
+    return sorted_ns[k] / 1e6
+
+
+def run_stage(stage: str, spec: dict) -> dict:
+    ops, findings, lat, extra_ns = BENCHES[stage](spec)
+    lat.sort()
+    seconds = (sum(lat) + extra_ns) / 1e9
+    out = {
+        "ops": ops,
+        "findings": findings,
+        "seconds": round(seconds, 6),
+        "ops_per_sec": round(ops / seconds, 1) if seconds else None,
+        "findings_per_sec": round(findings / seconds, 1) if seconds else None,
+        "latency_ms": {f"p{p}": round(_percentile(lat, p), 4) for p in PERCENTILES},
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+    out["latency_ms"]["max"] = round(lat[-1] / 1e6, 4) if lat else 0.0
+    return out
+
+
+def run_isolated(stage: str, spec: dict) -> dict:
+    """run_stage in a fresh (spawned) process, so ru_maxrss belongs to this stage alone."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as ex:
+        return ex.submit(run_stage, stage, spec).result()
+
+
+def _has_numpy() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def env_mismatch(report: dict, baseline: dict) -> dict:
+    """{key: (baseline, current)} for ENV_KEYS that differ (keys missing from either report are skipped)."""
+    def norm(env: dict) -> dict:
+        env = dict(env)
+        if "python" in env:  # minor version only: patch releases do not move the numbers
+            env["python"] = ".".join(str(env["python"]).split(".")[:2])
+        return env
+
+    cur, old = norm(report.get("env", {})), norm(baseline.get("env", {}))
+    return {k: (old[k], cur[k]) for k in ENV_KEYS if k in cur and k in old and cur[k] != old[k]}
+
+
+def run_suite(sizes, stages=STAGES, isolate: bool = True, **spec_kw) -> dict:
+    runs = []
+    for n in sizes:
+        spec = make_spec(findings=n, **spec_kw)
+        res = {}
+        for stage in stages:
+            res[stage] = run_isolated(stage, spec) if isolate else run_stage(stage, spec)
+            r = res[stage]
+            print(f"[bench] findings={n} stage={stage} findings/s={r['findings_per_sec']} "
+                  f"p99={r['latency_ms']['p99']}ms rss={r['peak_rss_mb']}MB", flush=True)
+        runs.append({"findings": n, "spec": spec, "stages": res})
+    return {
+        "version": REPORT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "env": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "orjson": orjson is not None,
+            "numpy": _has_numpy(),
+            "isolated": isolate,
+        },
+        "runs": runs,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = TOLERANCE) -> list[dict]:
+    """
+    (size, stage) pairs present in both reports with the same workload spec.
+    A regression is findings/sec down, or p99 latency / peak RSS up, by more
+    than `tolerance` (fraction of the baseline).
+    Raises ValueError when the environments differ (env_mismatch): e.g. an
+    isolated baseline against a --no-isolate run would report false RSS and
+    latency regressions.
+    """
+    mismatch = env_mismatch(report, baseline)
+    if mismatch:
+        raise ValueError("baseline not comparable: " + ", ".join(
+            f"{k}={old} (baseline) vs {cur}" for k, (old, cur) in mismatch.items()))
+    specs = {r["findings"]: r.get("spec") for r in baseline.get("runs", [])}
+    base = {(r["findings"], s): v for r in baseline.get("runs", []) for s, v in r["stages"].items()}
+    out = []
+    for r in report["runs"]:
+        if specs.get(r["findings"]) != r.get("spec"):
+            continue  # different workload: not comparable
+        for stage, cur in r["stages"].items():
+            old = base.get((r["findings"], stage))
+            if old is None:
+                continue
+            checks = [
+                ("findings_per_sec", old["findings_per_sec"], cur["findings_per_sec"], -1),
+                ("p99_ms", old["latency_ms"]["p99"], cur["latency_ms"]["p99"], 1),
+                ("peak_rss_mb", old["peak_rss_mb"], cur["peak_rss_mb"], 1),
+            ]
+            for metric, b, c, worse in checks:
+                if not b or c is None:
+                    continue
+                change = (c - b) / b
+                out.append({"findings": r["findings"], "stage": stage, "metric": metric, "baseline": b,
+                            "current": c, "change": round(change, 4), "regression": change * worse > tolerance})
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="MMAR scale benchmark (seeded synthetic workload)")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="comma-separated total findings per run")
+    ap.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    ap.add_argument("--findings-per-doc", type=int, default=None)
+    ap.add_argument("--mix", default=None, help="finding type weights, e.g. MISSING_EVIDENCE=3,DISAGREEMENT=2")
+    ap.add_argument("--tags", type=int, default=None, help="tag cardinality")
+    ap.add_argument("--skew", type=float, default=None, help="Zipf exponent of claim recurrence")
+    ap.add_argument("--runs", type=int, default=20, help="recurrence logs fed to the aggregate stage")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--no-isolate", action="store_true",
+                    help="run every stage in this process (faster; peak RSS becomes cumulative)")
+    ap.add_argument("--out", default=None, help="write the JSON report here")
+    ap.add_argument("--baseline", default=None, help="compare against this report; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed relative change (default 0.2)")
+    args = ap.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stages: {','.join(sorted(unknown))}")
+    report = run_suite(
+        [int(x) for x in args.sizes.split(",") if x], stages=stages, isolate=not args.no_isolate,
+        findings_per_doc=args.findings_per_doc, tags=args.tags, skew=args.skew, seed=args.seed, runs=args.runs,
+        mix=parse_mix(args.mix) if args.mix else None,
+    )
+    if args.out:
+        save_json(Path(args.out), report)
+        print(f"[bench] report -> {args.out}")
+    if args.baseline:
+        try:
+            rows = compare(report, load_json(Path(args.baseline), {}), args.tolerance)
+        except ValueError as e:
+            sys.exit(f"[compare] {e}")
+        regressions = [x for x in rows if x["regression"]]
+        for x in rows:
+            flag = "REGRESSION" if x["regression"] else "ok"
+            print(f"[compare] findings={x['findings']} stage={x['stage']} {x['metric']} "
+                  f"{x['baseline']} -> {x['current']} ({x['change']:+.1%}) {flag}")
+        print(f"[compare] pairs={len(rows)} regressions={len(regressions)} tolerance={args.tolerance}")
+        if regressions:
+            sys.exit(1)
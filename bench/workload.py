@@ -0,0 +1,156 @@
+"""
+Seeded synthetic MMAR workloads: mmar_findings documents, delta entries and recurrence logs.
+
+Same spec + seed -> same documents, on any machine. Knobs:
+  findings          total findings across all documents
+  findings_per_doc  mean findings per document (1 .. 2x mean, uniform)
+  mix               finding type weights, e.g. {"MISSING_EVIDENCE": 3, "DISAGREEMENT": 2}
+  tags              tag cardinality (STRUCTURAL_ANOMALY tags; 0 = untagged)
+  skew              Zipf exponent over the claim pool: higher = hotter recurring fingerprints
+  claims            claim pool size (default findings // 10)
+  cases             distinct case ids (default findings // 20)
+  runs              recurrence logs the findings are split across
+
+    python bench/workload.py --findings 10000 --out /tmp/findings.jsonl
+"""
+import random
+import sys
+from datetime import date, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.recurrence_update import ingest_findings_doc
+from core.recurrence_items import finalize_items
+
+DEFAULT_MIX = {"MISSING_EVIDENCE": 3.0, "DISAGREEMENT": 2.0, "STRUCTURAL_ANOMALY": 1.0, "NOVEL_STRUCTURE": 0.5}
+DEFAULT_SPEC = {
+    "findings": 10000,
+    "findings_per_doc": 4,
+    "mix": DEFAULT_MIX,
+    "tags": 8,
+    "skew": 1.1,
+    "claims": None,
+    "cases": None,
+    "runs": 20,
+    "seed": 0,
+}
+WORKLOAD_VERSION = 2   # bump when the same spec would generate different documents
+BLOCK_RATE = 0.02      # share of NOVEL_STRUCTURE claims that declare signals.block
+EVIDENCE_RATE = 0.6    # share of delta entries with evidence
+_START = date(2026, 1, 1)
+_NOW = "2026-01-01T00:00:00+00:00"
+
+
+def make_spec(**kw) -> dict:
+    spec = {**DEFAULT_SPEC, **{k: v for k, v in kw.items() if v is not None}, "workload": WORKLOAD_VERSION}
+    n = spec["findings"]
+    spec["claims"] = spec["claims"] or max(10, n // 10)
+    spec["cases"] = spec["cases"] or max(1, n // 20)
+    return spec
+
+
+def parse_mix(s: str) -> dict:
+    """"MISSING_EVIDENCE=3,DISAGREEMENT=2" -> {"MISSING_EVIDENCE": 3.0, "DISAGREEMENT": 2.0}"""
+    out = {}
+    for part in s.split(","):
+        k, _, w = part.partition("=")
+        out[k.strip()] = float(w or 1)
+    return out
+
+
+def _zipf_cum(n: int, s: float) -> list:
+    return list(accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+def _finding(t: str, k: int, spec: dict) -> dict:
+    """Finding k of the claim pool; the same (t, k) always gives the same finding (= fingerprint)."""
+    if t == "DISAGREEMENT":
+        return {"type": t, "claim": f"Conflicting outputs on claim {k}.", "delta": {"a": "YES", "b": "NO"}}
+    if t == "MISSING_EVIDENCE":
+        return {"type": t, "claim": f"Evidence is missing for claim {k}.", "needs": [f"proof-{k % 97}", f"source-{k % 13}"]}
+    if t == "STRUCTURAL_ANOMALY":
+        f = {"type": t, "claim": f"Coordination pattern {k} (top10_pct={k % 100}).", "signals": {"top10_pct": k % 100}}
+        if spec["tags"]:
+            f["tag"] = f"TAG{k % spec['tags']}"
+        return f
+    f = {"type": t, "claim": f"Novel structure {k}: treat as high-risk until verified."}
+    if (k * 2654435761) % 10007 < BLOCK_RATE * 10007:  # fixed per claim, spread over the pool
+        f["signals"] = {"block": True}
+    return f
+
+
+def findings_docs(spec: dict):
+    """Yield mmar_findings documents until spec["findings"] findings have been produced."""
+    rnd = random.Random(spec["seed"])
+    types = list(spec["mix"])
+    type_cum = list(accumulate(spec["mix"][t] for t in types))
+    claim_cum = _zipf_cum(spec["claims"], spec["skew"])
+    claims = range(spec["claims"])
+    left = spec["findings"]
+    while left > 0:
+        k = min(left, rnd.randint(1, 2 * spec["findings_per_doc"] - 1))
+        left -= k
+        findings = [
+            _finding(t, c, spec)
+            for t, c in zip(rnd.choices(types, cum_weights=type_cum, k=k),
+                            rnd.choices(claims, cum_weights=claim_cum, k=k))
+        ]
+        yield {
+            "asof": (_START + timedelta(days=rnd.randrange(365))).isoformat(),
+            "case_id": f"case-{rnd.randrange(spec['cases']):06d}",
+            "findings": findings,
+        }
+
+
+def delta_entries(spec: dict):
+    """Yield delta entries (one per findings_per_doc findings): severity mix, impact and evidence gaps."""
+    rnd = random.Random(spec["seed"] + 1)
+    levels = ["low", "medium", "high"]
+    for i in range(max(1, spec["findings"] // spec["findings_per_doc"])):
+        d = {
+            "delta_id": f"bench-{i:08d}",
+            "severity": rnd.choices(["PASS", "DELAY", "BLOCK"], weights=[6, 3, 1])[0],
+            "evidence": [f"https://example.org/e/{i}"] if rnd.random() < EVIDENCE_RATE else [],
+            "impact": {"externality": rnd.choice(levels), "irreversibility": rnd.choice(levels)},
+        }
+        if rnd.random() < 0.02:
+            d["block"] = True
+        yield d
+
+
+def recurrence_logs(spec: dict, runs: int) -> list:
+    """The findings split round-robin into `runs` recurrence logs (one per simulated CI run)."""
+    logs = [{"version": "v1.1", "items": {}} for _ in range(runs)]
+    for i, doc in enumerate(findings_docs(spec)):
+        ingest_findings_doc(logs[i % runs], doc, now=_NOW)
+    for log in logs:
+        finalize_items(log["items"])
+    return logs
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from core.jsonio import dumps_compact
+
+    ap = argparse.ArgumentParser(description="write a seeded mmar_findings workload as JSONL")
+    ap.add_argument("--findings", type=int, default=DEFAULT_SPEC["findings"])
+    ap.add_argument("--findings-per-doc", type=int, default=None)
+    ap.add_argument("--mix", default=None, help="type weights, e.g. MISSING_EVIDENCE=3,DISAGREEMENT=2")
+    ap.add_argument("--tags", type=int, default=None)
+    ap.add_argument("--skew", type=float, default=None)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--out", required=True, help="output .jsonl")
+    args = ap.parse_args()
+
+    spec = make_spec(findings=args.findings, findings_per_doc=args.findings_per_doc, tags=args.tags,
+                     skew=args.skew, seed=args.seed, mix=parse_mix(args.mix) if args.mix else None)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with out.open("w", encoding="utf-8") as fh:
+        for doc in findings_docs(spec):
+            fh.write(dumps_compact(doc) + "\n")
+            n += 1
+    print(f"[workload] docs={n} findings={spec['findings']} -> {out}")
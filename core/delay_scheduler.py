@@ -0,0 +1,307 @@
+import heapq
+import os
+import sys
+import time
+from pathlib import Path
+from datetime import datetime, timezone
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.gate_rules import until_ts
+from core.jsonio import dumps_compact, load_json, loads, save_json, stable_hash
+from core.run_once import evaluate_gate
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEDULE_PATH = ROOT / ".mmar" / "delay_schedule.json"
+SCHEDULE_VERSION = "delay-schedule-v1"
+COMPACT_MIN = 1024  # journal lines always allowed before save() folds the journal into the state file
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class DelayScheduler:
+    """
+    Pending DELAY decisions in a persistent min-heap keyed by `until`.
+
+    Each case keeps its latest delta and at most one live heap entry; entries
+    superseded by a newer submit are dropped lazily when popped. A tick pops
+    only the expired entries and re-gates those cases, so its cost is
+    O(expired * log pending) instead of a sweep over every case.
+
+    The state file holds only per-case metadata (the heap is rebuilt from it on
+    load); each delta lives in <schedule>.d/<case hash>.json and is written when
+    it changes and read only when its case comes due. save() appends only the
+    cases changed since the last save to <schedule>.journal.jsonl; the journal
+    is folded back into the state file once it outgrows the number of cases.
+
+    A re-gate that is still DELAY with an `until` already in the past cannot
+    change until the delta does, so the case is parked as `stalled` (off the
+    heap) until the next submit for it.
+
+    `clock` returns an aware datetime (default: wall clock, UTC).
+    """
+
+    def __init__(self, path: Path = SCHEDULE_PATH, clock=None):
+        self.path = Path(path) if path else None
+        self.clock = clock or _utc_now
+        self._pending = {}  # case_id -> delta to write on save() (None: delete)
+        self._memory = {}   # case_id -> delta, when there is no state file
+        self._dirty = {}    # case_ids whose metadata changed since the last save() (ordered)
+        doc = load_json(self.path, {}) if self.path else {}
+        self._rewrite = doc.get("version") != SCHEDULE_VERSION  # new or unknown state: write it whole
+        if self._rewrite:
+            doc = {}
+        self.seq = doc.get("seq", 0)
+        self.cases = doc.get("cases", {})  # case_id -> {"seq", "until", "stalled", "delta": ref} (DELAY cases only)
+        self._snapshot = doc.get("snapshot")
+        self._journal_lines = self._replay() if self.path and not self._rewrite else 0
+        # (until_ts, seq, case_id); superseded entries are skipped when popped
+        self.heap = [(until_ts(c["until"]), c["seq"], case_id) for case_id, c in self.cases.items() if not c["stalled"]]
+        heapq.heapify(self.heap)
+
+    def _replay(self) -> int:
+        """Apply the journal written since the state file; a journal left over from an older state file is ignored."""
+        try:
+            with self.journal_path.open("r", encoding="utf-8") as fh:
+                lines = fh.readlines()
+        except FileNotFoundError:
+            return 0
+        if lines and not lines[-1].endswith("\n"):
+            # torn by a crash mid-append (that save never completed); the next save starts a clean file
+            lines.pop()
+            self._rewrite = True
+        if not lines:
+            return 0
+        if loads(lines[0]).get("snapshot") != self._snapshot:
+            self._rewrite = True  # left over from an older state file (crash mid-compaction)
+            return 0
+        for line in lines[1:]:
+            r = loads(line)
+            self.seq = max(self.seq, r["seq"])
+            if r["case"] is None:
+                self.cases.pop(r["case_id"], None)
+            else:
+                self.cases[r["case_id"]] = r["case"]
+        return len(lines) - 1
+
+    def __len__(self):
+        return sum(1 for c in self.cases.values() if not c["stalled"])
+
+    @property
+    def delta_dir(self) -> Path:
+        return self.path.with_suffix(".d")
+
+    @property
+    def journal_path(self) -> Path:
+        return self.path.with_suffix(".journal.jsonl")
+
+    def _delta_path(self, case_id: str) -> Path:
+        return self.delta_dir / f"{stable_hash(case_id, 24)}.json"
+
+    def _store_delta(self, case_id: str, delta) -> str:
+        ref = stable_hash(delta, 16) if delta is not None else None
+        old = self.cases.get(case_id)
+        if old is None or old["delta"] != ref:
+            if self.path:
+                self._pending[case_id] = delta
+            else:
+                self._memory[case_id] = delta
+        return ref
+
+    def _drop_delta(self, case_id: str):
+        if self.path:
+            self._pending[case_id] = None
+        else:
+            self._memory.pop(case_id, None)
+
+    def stored_delta(self, case_id: str):
+        """The delta last submitted for a pending case (read from disk on demand)."""
+        if not self.path:
+            return self._memory.get(case_id)
+        if case_id in self._pending:
+            return self._pending[case_id]
+        return load_json(self._delta_path(case_id), None)
+
+    def _enqueue(self, case_id: str, delta: dict, gate: dict, now: datetime, park_expired: bool) -> str:
+        if gate.get("severity") != "DELAY" or gate.get("next_action") != "RERUN_AFTER_UNTIL":
+            if self.cases.pop(case_id, None) is not None:
+                self._drop_delta(case_id)
+                self._dirty[case_id] = None
+            return "cleared"
+        self.seq += 1
+        until = gate.get("until")
+        ts = until_ts(until)
+        stalled = park_expired and ts <= now.timestamp()
+        ref = self._store_delta(case_id, delta)
+        self.cases[case_id] = {"seq": self.seq, "until": until, "stalled": stalled, "delta": ref}
+        self._dirty[case_id] = None
+        if stalled:
+            return "stalled"
+        heapq.heappush(self.heap, (ts, self.seq, case_id))
+        return "scheduled"
+
+    def submit(self, case_id: str, delta: dict, gate: dict, now: datetime = None) -> str:
+        """
+        Record the latest delta and its gate for a case (replaces any pending entry).
+        Returns "scheduled" (DELAY; an `until` already past is due on the next tick)
+        or "cleared" (not DELAY; nothing pending).
+        """
+        return self._enqueue(case_id, delta, gate, now or self.clock(), park_expired=False)
+
+    def gate_and_submit(self, asof: dict, case_id: str, delta: dict, now: datetime = None) -> tuple[dict, str]:
+        now = now or self.clock()
+        gate = evaluate_gate(asof, delta, now=now)
+        return gate, self.submit(case_id, delta, gate, now=now)
+
+    def _live(self, seq: int, case_id: str) -> bool:
+        c = self.cases.get(case_id)
+        return c is not None and c["seq"] == seq and not c["stalled"]
+
+    def peek(self):
+        """(until, case_id) of the earliest pending case, or None."""
+        while self.heap:
+            _, seq, case_id = self.heap[0]
+            if self._live(seq, case_id):
+                return self.cases[case_id]["until"], case_id
+            heapq.heappop(self.heap)
+        return None
+
+    def pop_due(self, now: datetime = None) -> list[str]:
+        """Remove and return the cases whose `until` is <= now (earliest first)."""
+        now_ts = (now or self.clock()).timestamp()
+        due = []
+        while self.heap and self.heap[0][0] <= now_ts:
+            _, seq, case_id = heapq.heappop(self.heap)
+            if self._live(seq, case_id):
+                due.append(case_id)
+        return due
+
+    def run_due(self, asof: dict, latest_delta=None, now: datetime = None) -> list[tuple[str, dict, str]]:
+        """
+        Re-gate every expired case against its latest delta.
+        latest_delta(case_id) -> dict | None overrides the stored delta (e.g. a
+        per-case delta directory); cases without any delta are dropped.
+        Returns [(case_id, decision_gate, status)] in `until` order.
+        """
+        now = now or self.clock()
+        out = []
+        for case_id in self.pop_due(now):
+            delta = latest_delta(case_id) if latest_delta else None
+            if delta is None:
+                delta = self.stored_delta(case_id)
+            if delta is None:
+                del self.cases[case_id]
+                self._drop_delta(case_id)
+                self._dirty[case_id] = None
+                continue
+            gate = evaluate_gate(asof, delta, now=now)
+            out.append((case_id, gate, self._enqueue(case_id, delta, gate, now, park_expired=True)))
+        return out
+
+    def save(self):
+        """
+        Persist what changed since the last save: the changed deltas, and one
+        journal line per changed case. The state file is rewritten only when it
+        is new or the journal has outgrown it. New delta files are
+        written before the state that refers to them and old ones removed after
+        it, so a crash leaves at most orphans.
+        """
+        if not self.path:
+            return
+        gone = []
+        for case_id, delta in self._pending.items():
+            if delta is None:
+                gone.append(case_id)
+            elif case_id in self.cases:
+                save_json(self._delta_path(case_id), delta, compact=True, atomic=True)
+        if self._rewrite or self._journal_lines + len(self._dirty) > max(len(self.cases), COMPACT_MIN):
+            self._snapshot = f"{time.time_ns()}-{os.getpid()}"
+            save_json(self.path, {
+                "version": SCHEDULE_VERSION,
+                "snapshot": self._snapshot,
+                "seq": self.seq,
+                "cases": self.cases,
+            }, compact=True, atomic=True)
+            self.journal_path.unlink(missing_ok=True)
+            self._rewrite = False
+            self._journal_lines = 0
+        elif self._dirty:
+            lines = [{"seq": self.seq, "case_id": c, "case": self.cases.get(c)} for c in self._dirty]
+            if not self._journal_lines and not self.journal_path.exists():
+                lines.insert(0, {"snapshot": self._snapshot})
+            with self.journal_path.open("a", encoding="utf-8") as fh:
+                fh.write("".join(dumps_compact(r) + "\n" for r in lines))
+            self._journal_lines += len(self._dirty)
+        for case_id in gone:
+            if case_id not in self.cases:
+                self._delta_path(case_id).unlink(missing_ok=True)
+        self._pending.clear()
+        self._dirty.clear()
+
+
+def _parse_now(s: str):
+    if not s:
+        return None
+    now = datetime.fromisoformat(s)
+    return now if now.tzinfo else now.replace(tzinfo=timezone.utc)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from core.pipeline import _safe_name
+    from core.run_once import _write_gate
+
+    ap = argparse.ArgumentParser(description="DELAY re-check scheduler (min-heap on `until`)")
+    ap.add_argument("--schedule", default=str(SCHEDULE_PATH), help="schedule state file")
+    ap.add_argument("--now", default=None, help="ISO timestamp used as the clock (default: wall clock)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_sub = sub.add_parser("submit", help="gate deltas now and schedule the DELAY ones")
+    p_sub.add_argument("--asof", required=True)
+    p_sub.add_argument("--delta", required=True, nargs="+", help="delta_entry.json files (case id = file stem)")
+    p_sub.add_argument("--case-id", default=None, help="case id for a single --delta")
+    p_sub.add_argument("--out", default=None,
+                       help="directory for <case_id>.json decision_gate files (case id sanitized to [A-Za-z0-9._-])")
+    p_tick = sub.add_parser("tick", help="re-gate expired cases only")
+    p_tick.add_argument("--asof", required=True)
+    p_tick.add_argument("--deltas", default=None,
+                        help="directory with the latest <case_id>.json delta per case (same file names as --out)")
+    p_tick.add_argument("--out", default=None,
+                        help="directory for <case_id>.json decision_gate files (case id sanitized to [A-Za-z0-9._-])")
+    sub.add_parser("next", help="show the earliest pending `until`")
+    args = ap.parse_args()
+
+    now = _parse_now(args.now)
+    sched = DelayScheduler(Path(args.schedule), clock=(lambda: now) if now else None)
+
+    if args.cmd == "next":
+        head = sched.peek()
+        print(f"[scheduler] pending={len(sched)} next={f'{head[0]} {head[1]}' if head else '-'}")
+        sys.exit(0)
+
+    asof = load_json(Path(args.asof), {})
+    if args.cmd == "submit":
+        if args.case_id and len(args.delta) > 1:
+            ap.error("--case-id needs exactly one --delta")
+        counts = {"scheduled": 0, "cleared": 0}
+        for p in args.delta:
+            case_id = args.case_id or Path(p).stem
+            gate, status = sched.gate_and_submit(asof, case_id, load_json(Path(p), {}))
+            counts[status] += 1
+            if args.out:
+                _write_gate(Path(args.out) / f"{_safe_name(case_id)}.json", gate)
+    else:
+        def _latest(case_id):
+            return load_json(Path(args.deltas) / f"{_safe_name(case_id)}.json", None)
+
+        results = sched.run_due(asof, latest_delta=_latest if args.deltas else None)
+        counts = {"regated": len(results), "scheduled": 0, "stalled": 0, "cleared": 0}
+        for case_id, gate, status in results:
+            counts[status] += 1
+            if args.out:
+                _write_gate(Path(args.out) / f"{_safe_name(case_id)}.json", gate)
+    sched.save()
+    print(f"[scheduler] {args.cmd} " + " ".join(f"{k}={v}" for k, v in counts.items())
+          + f" pending={len(sched)} -> {args.schedule}")
@@ -0,0 +1,297 @@
+"""
+Incremental reader for very large mmar_findings documents.
+
+The whole-document path (load_json -> findings_to_delta / ingest_findings_doc)
+holds the parsed document, every `changes` entry and the rendered output in
+memory at once. Here the file is read in chunks and the `findings` array is
+decoded one element at a time:
+  - the delta accumulators (core.findings_to_delta.DeltaAccumulator) and the
+    delta_id hash are updated per finding
+  - each `changes` entry is rendered and spooled to a temp file, then spliced
+    into the output
+  - recurrence items are updated per finding (core.recurrence_update._apply_finding)
+
+Output is byte-identical to the whole-document path (pretty JSON only).
+Memory is bounded by the largest single finding plus the distinct
+evidence / reason codes / fingerprints, not by the document size. Recurrence
+needs `case_id` / `asof` for every finding: when they come after `findings`,
+a header-only pass (FindingsReader.read_header) fetches them first.
+
+Stream-specific limits: the top level must be an object, `findings` must be an
+array, and `findings` / `case_id` / `asof` may not be repeated (json.loads
+would silently keep the last one, which cannot be undone once findings were
+emitted).
+"""
+import codecs
+import hashlib
+import json
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core import metrics
+from core.findings_to_delta import DeltaAccumulator
+from core.jsonio import FindingEncoding, canonical_dumps, load_json, loads, save_json
+from core.recurrence_update import (
+    LOG_PATH,
+    _apply_finding,
+    _extract_support,
+    _fingerprint_finding,
+    finalize_items,
+    ingest_findings_doc,
+    resolve_inputs,
+)
+
+CHUNK = 1 << 16
+_WS = " \t\n\r"
+_NUM_TAIL = frozenset("0123456789+-.eE")
+_UNIQUE_KEYS = ("findings", "case_id", "asof")
+
+
+def _number_may_continue(obj, buf: str, end: int) -> bool:
+    if not isinstance(obj, (int, float)) or isinstance(obj, bool):
+        return False
+    return all(c in _NUM_TAIL for c in buf[end:])
+
+
+class FindingsReader:
+    """
+    Iterate the `findings` of one mmar_findings file without loading it:
+
+        r = FindingsReader(path)
+        for f in r:
+            ...  # r.header: every other top-level key seen so far
+        r.header  # complete once iteration ends
+
+    A missing file reads as {} (like load_json(path, {})).
+    """
+
+    def __init__(self, path: Path, chunk: int = CHUNK):
+        self.path = Path(path)
+        self.chunk = chunk
+        self.header = {}
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._fh = None
+        self._dec = codecs.getincrementaldecoder("utf-8")()
+        self._raw = json.JSONDecoder().raw_decode
+
+    # --- buffer ---
+
+    def _fill(self, size: int = None):
+        data = self._fh.read(size or self.chunk)
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        if not data:
+            self._buf += self._dec.decode(b"", final=True)
+            self._eof = True
+        else:
+            self._buf += self._dec.decode(data)
+
+    def _peek(self) -> str:
+        """Next non-whitespace character ("" at end of file)."""
+        while True:
+            buf, pos = self._buf, self._pos
+            n = len(buf)
+            while pos < n and buf[pos] in _WS:
+                pos += 1
+            self._pos = pos
+            if pos < n:
+                return buf[pos]
+            if self._eof:
+                return ""
+            self._fill()
+
+    def _value(self):
+        """Decode the JSON value at the cursor, reading more until it is complete."""
+        self._peek()
+        while True:
+            try:
+                obj, end = self._raw(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                obj, end = None, None
+            # a number can stop at the buffer end (or at a '.' / 'e' just before it) and still be truncated
+            if end is not None and (self._eof or not _number_may_continue(obj, self._buf, end)):
+                self._pos = end
+                return obj
+            # grow geometrically, so one huge value is re-decoded O(log size) times
+            self._fill(max(self.chunk, len(self._buf) - self._pos))
+
+    def _expect(self, ch: str):
+        if self._peek() != ch:
+            raise ValueError(f"{self.path}: expected {ch!r} at offset ~{self._pos}")
+        self._pos += 1
+
+    def read_header(self) -> dict:
+        """Every top-level key except `findings` (findings are decoded one at a time and dropped)."""
+        for _ in self:
+            pass
+        return self.header
+
+    # --- document ---
+
+    def __iter__(self):
+        if not self.path.exists():
+            return
+        with self.path.open("rb") as self._fh:
+            if self._peek() != "{":
+                raise ValueError(f"{self.path}: top-level value is not a JSON object")
+            self._pos += 1
+            seen = set()
+            c = self._peek()
+            while c != "}":
+                key = self._value()
+                if not isinstance(key, str):
+                    raise ValueError(f"{self.path}: expected an object key at offset ~{self._pos}")
+                if key in _UNIQUE_KEYS:
+                    if key in seen:
+                        raise ValueError(f"{self.path}: duplicate {key!r} key")
+                    seen.add(key)
+                self._expect(":")
+                if key == "findings":
+                    yield from self._findings()
+                else:
+                    self.header[key] = self._value()
+                c = self._peek()
+                if c == ",":
+                    self._pos += 1
+                    c = self._peek()
+                    if c == "}":
+                        raise ValueError(f"{self.path}: trailing comma at offset ~{self._pos}")
+                elif c != "}":
+                    raise ValueError(f"{self.path}: expected ',' or '}}' at offset ~{self._pos}")
+            self._pos += 1
+            if self._peek() != "":
+                raise ValueError(f"{self.path}: extra data after the top-level object")
+
+    def _findings(self):
+        if self._peek() != "[":
+            raise ValueError(f"{self.path}: 'findings' is not an array")
+        self._pos += 1
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            c = self._peek()
+            self._pos += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError(f"{self.path}: expected ',' or ']' in 'findings' at offset ~{self._pos}")
+
+
+def _indent_change(ch: dict) -> str:
+    # one `changes` element as dumps_pretty renders it inside the delta (depth 2)
+    return "    " + json.dumps(ch, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+
+
+def _write_delta(path: Path, delta: dict, spool, n_changes: int):
+    """save_json(path, delta) with `changes` copied from the spool instead of held in memory."""
+    text = json.dumps({**delta, "changes": []}, ensure_ascii=False, indent=2)
+    # top-level keys sit at indent 2 and strings never contain a raw newline: this match is unique
+    marker = '\n  "changes": []'
+    i = text.index(marker) + len(marker) - 2
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with metrics.stage("json_save"), path.open("w", encoding="utf-8") as out:
+        out.write(text[:i])
+        if n_changes:
+            out.write("[\n")
+            spool.seek(0)
+            shutil.copyfileobj(spool, out)
+            out.write("\n  ]")
+        else:
+            out.write("[]")
+        out.write(text[i + 2:])
+
+
+def stream_findings_file(path: Path, delta_out: Path = None, log: dict = None, now: str = None) -> tuple[dict, int]:
+    """
+    One pass over a findings file:
+      - delta_out: write findings_to_delta(doc) there (byte-identical to save_json)
+      - log:       fold the findings into this in-memory recurrence log, as
+                   ingest_findings_doc(log, doc, now) does (finalize_items is left to the caller)
+    Returns (delta without `changes`, findings read); the delta is None when
+    delta_out is not given.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).isoformat()
+    reader = FindingsReader(path)
+    header = reader.header
+    acc = DeltaAccumulator() if delta_out is not None else None
+    digest = hashlib.sha256(b"[") if acc is not None else None
+    spool = tempfile.TemporaryFile("w+", encoding="utf-8") if acc is not None else None
+    items = None
+    case = None  # (case_id, asof) for the recurrence observations
+    if log is not None:
+        log["version"] = "v1.1"
+        items = log.setdefault("items", {})
+
+    n = 0
+    try:
+        for f in reader:
+            if acc is not None and log is not None:
+                enc = FindingEncoding(f)
+                doc, fp = enc.doc, enc.fingerprint
+            else:
+                doc = canonical_dumps(f) if acc is not None else None
+                fp = _fingerprint_finding(f) if log is not None else None
+            if acc is not None:
+                if n:
+                    digest.update(b", ")
+                    spool.write(",\n")
+                digest.update(doc.encode("utf-8"))
+                spool.write(_indent_change(acc.add(f)))
+            if log is not None:
+                if case is None:
+                    # keys after `findings` (or missing): one header-only pass instead of holding observations
+                    h = header if "case_id" in header and "asof" in header else FindingsReader(path).read_header()
+                    case = (h.get("case_id", "unknown"), h.get("asof", "unknown"))
+                _apply_finding(items, fp, f.get("type"), f.get("tag"), _extract_support(f), *case, now)
+            n += 1
+
+        case_id = header.get("case_id", "unknown")
+        asof = header.get("asof", "unknown")
+
+        delta = None
+        if acc is not None:
+            digest.update(b"]")
+            delta = acc.finish(case_id, asof, digest.hexdigest()[:12], [], now)
+            _write_delta(Path(delta_out), delta, spool, n)
+            del delta["changes"]
+    finally:
+        if spool is not None:
+            spool.close()
+    if acc is not None:
+        metrics.count("findings_processed", n, stage="findings_to_delta")
+    if log is not None:
+        metrics.count("findings_processed", n, stage="recurrence")
+    return delta, n
+
+
+def update_recurrence_stream(inputs, log_path: Path = LOG_PATH, compact: bool = False) -> tuple[dict, int]:
+    """
+    update_recurrence_many with each .json input streamed (FindingsReader);
+    .jsonl lines are one document each and are parsed as before. Same log.
+    """
+    log = load_json(log_path, {"version": "v1.1", "items": {}})
+    n_docs = 0
+    for p in resolve_inputs(inputs):
+        if p.suffix == ".jsonl":
+            with p.open("r", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        ingest_findings_doc(log, loads(line))
+                        n_docs += 1
+        else:
+            stream_findings_file(p, log=log)
+            n_docs += 1
+    with metrics.stage("recurrence_merge"):
+        finalize_items(log["items"])
+    save_json(log_path, log, compact=compact)
+    return log, n_docs
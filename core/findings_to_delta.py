@@ -1,23 +1,15 @@
-import json
-import hashlib
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 
-
-def _load_json(path: Path, default):
-    if not path.exists():
-        return default
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def _save_json(path: Path, obj):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core import metrics
+from core.jsonio import findings_hash, load_json as _load_json, save_json as _save_json, stable_hash
 
 
 def _stable_hash(obj) -> str:
-    s = json.dumps(obj, ensure_ascii=True, sort_keys=True)
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()[:12]
+    return stable_hash(obj, 12)
 
 
 def _reason_code_for_finding(f: dict) -> str:
@@ -28,25 +20,38 @@ def _reason_code_for_finding(f: dict) -> str:
     return f"MMAR:{t}"
 
 
-def findings_to_delta(findings_doc: dict) -> dict:
-    now = datetime.now(timezone.utc).isoformat()
-
-    case_id = findings_doc.get("case_id", "unknown")
-    asof = findings_doc.get("asof", "unknown")
-    findings = findings_doc.get("findings", [])
-
-    evidence = []
-    changes = []
-    reason_codes = []
+def findings_to_delta(findings_doc: dict, encodings: list = None) -> dict:
+    """
+    mmar_findings -> delta_entry.
+    `encodings` (core.jsonio.encode_findings) lets callers that also fingerprint
+    the findings reuse one canonical encoding per finding for the delta_id.
+    """
+    if not metrics.enabled:
+        return _findings_to_delta(findings_doc, encodings)
+    with metrics.stage("findings_map"):
+        out = _findings_to_delta(findings_doc, encodings)
+    metrics.count("findings_processed", len(out["changes"]), stage="findings_to_delta")
+    return out
 
-    has_delay = False
-    has_block = False
 
-    flags = {
-        "coordination_detected": False
-    }
+class DeltaAccumulator:
+    """
+    Per-finding state of findings_to_delta, so the delta can also be built one
+    finding at a time (core/findings_stream.py). evidence / reason_codes are
+    kept as sets: the delta lists them sorted and deduped anyway.
+    """
+
+    def __init__(self):
+        self.evidence = set()
+        self.reason_codes = set()
+        self.has_delay = False
+        self.has_block = False
+        self.flags = {
+            "coordination_detected": False
+        }
 
-    for f in findings:
+    def add(self, f: dict) -> dict:
+        """Fold one finding in; returns its `changes` entry."""
         f_type = f.get("type")
         tag = f.get("tag")
         claim = f.get("claim", "")
@@ -56,70 +61,114 @@ def findings_to_delta(findings_doc: dict) -> dict:
 
         # v0 severity triggers (conservative)
         if f_type in ("MISSING_EVIDENCE", "STRUCTURAL_ANOMALY"):
-            has_delay = True
+            self.has_delay = True
 
         # v0.1: explicit flag for a known high-signal anomaly
         if f_type == "STRUCTURAL_ANOMALY" and tag == "COORDINATION":
-            flags["coordination_detected"] = True
+            self.flags["coordination_detected"] = True
 
         # explicit block trigger (only when declared)
         if bool(signals.get("block")) or bool(delta_payload.get("block")):
-            has_block = True
+            self.has_block = True
 
         rc = _reason_code_for_finding(f)
-        reason_codes.append(rc)
+        self.reason_codes.add(rc)
 
         if f_type == "MISSING_EVIDENCE":
             for n in needs:
                 if isinstance(n, str) and n.strip():
-                    evidence.append(n.strip())
+                    self.evidence.add(n.strip())
         else:
             if isinstance(f_type, str) and f_type:
-                evidence.append(f"{f_type}:{tag}" if tag else f_type)
+                self.evidence.add(f"{f_type}:{tag}" if tag else f_type)
 
-        changes.append({
+        return {
             "type": f_type,
             "tag": tag,
             "claim": claim,
             "needs": needs,
             "signals": signals,
             "reason_code": rc
-        })
-
-    severity = "PASS"
-    if has_block:
-        severity = "BLOCK"
-    elif has_delay:
-        severity = "DELAY"
-
-    out = {
-        "delta_id": f"{case_id}:{asof}:{_stable_hash(findings)}",
-        "severity": severity,
-        "until": None,
-        "block": (severity == "BLOCK"),
-        "evidence": sorted(set(evidence)),
-        "changes": changes,
-        "reason_codes": sorted(set(reason_codes)),
-        "meta": {
-            "generated_at": now,
-            "source": "mmar_findings",
-            "case_id": case_id,
-            "asof": asof,
-            "flags": flags
         }
-    }
-    return out
+
+    def finish(self, case_id, asof, findings_digest: str, changes, now: str) -> dict:
+        severity = "PASS"
+        if self.has_block:
+            severity = "BLOCK"
+        elif self.has_delay:
+            severity = "DELAY"
+
+        return {
+            "delta_id": f"{case_id}:{asof}:{findings_digest}",
+            "severity": severity,
+            "until": None,
+            "block": (severity == "BLOCK"),
+            "evidence": sorted(self.evidence),
+            "changes": changes,
+            "reason_codes": sorted(self.reason_codes),
+            "meta": {
+                "generated_at": now,
+                "source": "mmar_findings",
+                "case_id": case_id,
+                "asof": asof,
+                "flags": self.flags
+            }
+        }
+
+
+def _findings_to_delta(findings_doc: dict, encodings: list = None) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+
+    case_id = findings_doc.get("case_id", "unknown")
+    asof = findings_doc.get("asof", "unknown")
+    findings = findings_doc.get("findings", [])
+
+    acc = DeltaAccumulator()
+    changes = [acc.add(f) for f in findings]
+
+    with metrics.stage("hash"):  # one per document: the disabled no-op is noise next to the hash
+        h = findings_hash(encodings) if encodings is not None else _stable_hash(findings)
+
+    return acc.finish(case_id, asof, h, changes, now)
 
 
 if __name__ == "__main__":
     import argparse
+
+    from core.schemas import SchemaValidationError, add_validate_arg, validate
+
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="inp", required=True, help="path to mmar_findings.json")
     ap.add_argument("--out", dest="outp", required=True, help="path to delta_entry.json")
+    ap.add_argument("--compact", action="store_true", help="write compact JSON (machine-to-machine)")
+    ap.add_argument("--stream", action="store_true",
+                    help="parse the findings one at a time (very large documents); same output")
+    add_validate_arg(ap)
+    metrics.add_metrics_args(ap)
     args = ap.parse_args()
+    if args.stream and (args.compact or args.validate):
+        ap.error("--stream writes pretty JSON and does not hold the document: drop --compact / --validate")
+    metrics.start_from_args(args)
+
+    if args.stream:
+        from core.findings_stream import stream_findings_file
+        try:
+            out, n = stream_findings_file(Path(args.inp), delta_out=Path(args.outp))
+        except ValueError as e:
+            sys.exit(f"[findings_to_delta] {e}")
+        metrics.count("delta_severity", 1, severity=out["severity"])
+        metrics.finish_from_args(args, "findings_to_delta")
+        print(f"[findings_to_delta] wrote -> {args.outp} severity={out['severity']} findings={n} (streamed)")
+        sys.exit(0)
 
     doc = _load_json(Path(args.inp), {})
-    out = findings_to_delta(doc)
-    _save_json(Path(args.outp), out)
+    try:
+        validate("mmar_findings", doc, args.validate, where=args.inp)
+        out = findings_to_delta(doc)
+        validate("delta_entry", out, args.validate, where=args.outp)
+    except SchemaValidationError as e:
+        sys.exit(str(e))
+    _save_json(Path(args.outp), out, compact=args.compact)
+    metrics.count("delta_severity", 1, severity=out["severity"])
+    metrics.finish_from_args(args, "findings_to_delta")
     print(f"[findings_to_delta] wrote -> {args.outp} severity={out['severity']}")
-
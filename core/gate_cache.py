@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from pathlib import Path
+
+from core.gate_rules import RULE_VERSION, default_until
+from core.jsonio import dumps_compact, load_json, loads, save_json, stable_hash
+
+CACHE_VERSION = "gate-cache-v1"
+AUTO_UNTIL_CODE = "AUTO_DELAY_UNTIL_SET_48H"
+
+
+class GateCache:
+    """
+    Content-addressed decision_gate cache with LRU eviction (max_entries).
+    Key = sha256(rule version, canonical As-of pack, canonical Δ).
+
+    The gate is deterministic except the 48h `until` default. Such entries are
+    stored with until=None and a flag; a hit re-derives `until` from the
+    caller's clock (`now`), so a hit returns exactly what a recompute would.
+    """
+
+    def __init__(self, path: Path = None, max_entries: int = 100000):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (until_auto, gate_json); oldest first
+        if self.path and self.path.exists():
+            doc = load_json(self.path, {})
+            if doc.get("version") == CACHE_VERSION and doc.get("rule_version") == RULE_VERSION:
+                for key, until_auto, gate_json in doc.get("entries", []):
+                    self._entries[key] = (until_auto, gate_json)
+            self._evict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def asof_digest(asof: dict) -> str:
+        return stable_hash(asof)
+
+    @staticmethod
+    def key(asof_digest: str, delta: dict) -> str:
+        return stable_hash([RULE_VERSION, asof_digest, delta])
+
+    def get(self, key: str, now=None):
+        e = self._entries.get(key)
+        if e is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        until_auto, gate_json = e
+        gate = loads(gate_json)
+        if until_auto:
+            gate["until"] = default_until(now)
+        return gate
+
+    def put(self, key: str, gate: dict):
+        until_auto = AUTO_UNTIL_CODE in (gate.get("reason_codes") or [])
+        stored = dict(gate, until=None) if until_auto else gate
+        self._entries[key] = (until_auto, dumps_compact(stored))
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        doc = {
+            "version": CACHE_VERSION,
+            "rule_version": RULE_VERSION,
+            "entries": [[k, ua, g] for k, (ua, g) in self._entries.items()],
+        }
+        save_json(self.path, doc, compact=True, atomic=True)
@@ -0,0 +1,210 @@
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+
+SEVERITIES = ("PASS", "DELAY", "BLOCK")
+
+
+def default_until(now: datetime = None) -> str:
+    """48h DELAY default, in local time (now defaults to the wall clock)."""
+    now_local = (now or datetime.now(timezone.utc)).astimezone()
+    until_dt = now_local + timedelta(hours=48)
+    return until_dt.isoformat(timespec="seconds")
+
+
+def until_ts(until) -> float:
+    """`until` -> POSIX seconds. Naive timestamps are read as UTC; unparseable ones sort first (0)."""
+    try:
+        dt = datetime.fromisoformat(str(until))
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class GateState:
+    """Working state of one gate evaluation; rules read and update it."""
+    __slots__ = ("delta", "now", "raw_severity", "severity", "evidence", "externality", "irreversibility",
+                 "until", "reason_codes", "evidence_paths", "suggested_fix", "recheck", "next_action")
+
+    def __init__(self, delta: dict, now: datetime = None):
+        self.delta = delta
+        self.now = now
+        self.raw_severity = delta.get("severity", "PASS")
+        self.severity = self.raw_severity if self.raw_severity in SEVERITIES else "BLOCK"
+        # carry through evidence list (dedupe, preserve order)
+        self.evidence = list(dict.fromkeys(delta.get("evidence", [])))
+        impact = delta.get("impact", {})
+        if not isinstance(impact, dict):
+            impact = {}
+        self.externality = str(impact.get("externality", "")).lower().strip()
+        self.irreversibility = str(impact.get("irreversibility", "")).lower().strip()
+        self.until = delta.get("until", None)
+        self.reason_codes = []
+        self.evidence_paths = []
+        self.suggested_fix = []
+        self.recheck = []
+        self.next_action = None
+
+
+class Rule:
+    """
+    One row of the gate rule table.
+      severities: severities under which the rule can fire (checked before `when`)
+      when:       predicate on GateState (None = always)
+      severity:   severity set when the rule fires (None = unchanged)
+      reason_codes / evidence_paths / suggested_fix: appended, in order, when it fires
+      then:       extra effect on GateState (None = nothing)
+    """
+    __slots__ = ("name", "severities", "when", "severity", "reason_codes", "evidence_paths", "suggested_fix",
+                 "then", "order")
+
+    def __init__(self, name, severities=SEVERITIES, when=None, severity=None,
+                 reason_codes=(), evidence_paths=(), suggested_fix=(), then=None):
+        self.name = name
+        self.severities = frozenset(severities)
+        self.when = when
+        self.severity = severity
+        self.reason_codes = tuple(reason_codes)
+        self.evidence_paths = tuple(evidence_paths)
+        self.suggested_fix = tuple(suggested_fix)
+        self.then = then
+        self.order = None
+
+
+def _is_mmar_block(st: GateState) -> bool:
+    d_rc = st.delta.get("reason_codes", []) or []
+    return any(isinstance(x, str) and x.startswith("MMAR:") for x in d_rc)
+
+
+def _set_default_until(st: GateState):
+    st.until = default_until(st.now)
+
+
+def _set_recheck(st: GateState):
+    st.recheck = [
+        "Add evidence (links / hashes / screenshots) to `delta.evidence`",
+        "Reconfirm irreversibility/externality assumptions under As-of constraints",
+        "Re-run the gate after `until`",
+    ]
+    st.next_action = "RERUN_AFTER_UNTIL"
+
+
+# bump when RULES change (part of the decision cache key, core/gate_cache.py)
+RULE_VERSION = "gate-v0.1"
+
+# in evaluation order
+RULES = [
+    # severity coercion (minimal contract)
+    Rule("invalid_severity",
+         when=lambda st: st.raw_severity not in SEVERITIES,
+         severity="BLOCK",
+         reason_codes=["INVALID_SEVERITY_COERCED_TO_BLOCK"],
+         evidence_paths=["delta.severity"],
+         suggested_fix=["Set `delta.severity` to PASS/DELAY/BLOCK."]),
+
+    # Rule 0: explicit block flag overrides everything
+    Rule("explicit_block_mmar",
+         when=lambda st: st.delta.get("block") is True and _is_mmar_block(st),
+         severity="BLOCK",
+         reason_codes=["MMAR_EXPLICIT_BLOCK"],
+         evidence_paths=["delta.block"],
+         suggested_fix=["Remove `delta.block=true` or replace with `severity=DELAY` and provide evidence."]),
+    Rule("explicit_block_manual",
+         when=lambda st: st.delta.get("block") is True and not _is_mmar_block(st),
+         severity="BLOCK",
+         reason_codes=["MANUAL_BLOCK_FLAG"],
+         evidence_paths=["delta.block"],
+         suggested_fix=["Remove `delta.block=true` or replace with `severity=DELAY` and provide evidence."]),
+
+    # AUTO rule: no evidence -> don't trust the change
+    Rule("auto_block_high_x_high_no_evidence", severities=("PASS", "DELAY"),
+         when=lambda st: not st.evidence and st.externality == "high" and st.irreversibility == "high",
+         severity="BLOCK",
+         reason_codes=["AUTO_BLOCK_HIGH_X_HIGH_NO_EVIDENCE"],
+         evidence_paths=["delta.impact.externality", "delta.impact.irreversibility", "delta.evidence"],
+         suggested_fix=["Add evidence or reduce externality/irreversibility; otherwise keep BLOCK."]),
+    Rule("auto_delay_no_evidence", severities=("PASS", "DELAY"),
+         when=lambda st: not st.evidence,
+         severity="DELAY",
+         reason_codes=["AUTO_DELAY_NO_EVIDENCE", "MMAR_DELAY_EVIDENCE_GAP"],
+         evidence_paths=["delta.evidence"],
+         suggested_fix=["Add at least one item to `delta.evidence` to move from DELAY to PASS/BLOCK."]),
+
+    # DELAY operationalization (48h default)
+    Rule("delay_until_48h", severities=("DELAY",),
+         when=lambda st: st.until is None,
+         reason_codes=["AUTO_DELAY_UNTIL_SET_48H"],
+         evidence_paths=["delta.until"],
+         suggested_fix=["Provide a concrete `delta.until` if 48h is not appropriate."],
+         then=_set_default_until),
+    Rule("delay_recheck", severities=("DELAY",), then=_set_recheck),
+]
+
+
+class GatePlan:
+    """
+    A rule table compiled once into per-severity evaluation lists.
+    Rules that cannot fire under the current severity are never visited; when a
+    rule changes the severity, evaluation continues in that severity's list
+    right after the rule. Per-rule hit counts are always kept; `timing=True`
+    also accumulates time spent per rule (perf_counter).
+    """
+
+    def __init__(self, rules=RULES, timing: bool = False):
+        self.rules = list(rules)
+        for i, r in enumerate(self.rules):
+            r.order = i
+        self._steps = {s: [r for r in self.rules if s in r.severities] for s in SEVERITIES}
+        self._orders = {s: [r.order for r in steps] for s, steps in self._steps.items()}
+        self.timing = timing
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.evaluations = 0
+        self.hits = {r.name: 0 for r in self.rules}
+        self.checked = {r.name: 0 for r in self.rules}
+        self.seconds = {r.name: 0.0 for r in self.rules}
+
+    def run(self, delta: dict, now: datetime = None) -> GateState:
+        st = GateState(delta, now)
+        self.evaluations += 1
+        timing = self.timing
+        sev = st.severity
+        steps = self._steps[sev]
+        k = 0
+        while k < len(steps):
+            r = steps[k]
+            k += 1
+            t0 = time.perf_counter() if timing else 0.0
+            self.checked[r.name] += 1
+            if r.when is None or r.when(st):
+                self.hits[r.name] += 1
+                if r.severity is not None:
+                    st.severity = r.severity
+                st.reason_codes += r.reason_codes
+                st.evidence_paths += r.evidence_paths
+                st.suggested_fix += r.suggested_fix
+                if r.then is not None:
+                    r.then(st)
+                if st.severity != sev:
+                    sev = st.severity
+                    steps = self._steps[sev]
+                    k = bisect_right(self._orders[sev], r.order)
+            if timing:
+                self.seconds[r.name] += time.perf_counter() - t0
+        return st
+
+    def stats(self) -> dict:
+        return {
+            "evaluations": self.evaluations,
+            "rules": [
+                {"rule": r.name, "checked": self.checked[r.name], "hits": self.hits[r.name],
+                 "seconds": round(self.seconds[r.name], 6) if self.timing else None}
+                for r in self.rules
+            ],
+        }
+
+
+DEFAULT_PLAN = GatePlan()
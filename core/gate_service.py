@@ -0,0 +1,294 @@
+"""
+Long-running gate service (asyncio). Keeps the rules and As-of packs / profiles warm.
+
+Transports:
+  --unix PATH         newline-delimited JSON, one request per line, responses in request order
+  --http HOST:PORT    HTTP/1.1 (keep-alive + pipelining), POST /v1/<op> with a JSON body;
+                      loopback hosts only unless --allow-remote (there is no authentication)
+
+Request:  {"id": any, "op": "gate" | "findings_to_delta" | "intervene" | "pipeline" | "ping", ...}
+  gate:              delta, asof | asof_id, [now]
+  findings_to_delta: findings
+  intervene:         gate, profile | profile_id
+  pipeline:          findings, asof | asof_id, profile | profile_id, [now]
+Response: {"id": ..., "ok": true, "result": ...} or {"id": ..., "ok": false, "error": "..."}
+  (over HTTP a failed request is answered 400; an unframeable request 400/413/431 and the connection closes)
+Results are the same documents the CLIs write (decision_gate / delta_entry / intervene).
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import os
+import socket
+import stat
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core.findings_to_delta import findings_to_delta
+from core.gate_rules import DEFAULT_PLAN
+from core.jsonio import dumps_compact, loads
+from core.run_once import evaluate_gate
+from core.schemas import add_validate_arg, validate
+from tools.intervene_gate import decide_intervene
+
+# max bytes per request line / header block
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class GateService:
+    def __init__(self, asofs: dict = None, profiles: dict = None, validate_mode: str = None):
+        self.asofs = asofs or {}
+        self.profiles = profiles or {}
+        self.validate_mode = validate_mode
+        self.served = 0
+
+    def _asof(self, req: dict) -> dict:
+        if "asof" in req:
+            return req["asof"]
+        name = req.get("asof_id", "default")
+        if name not in self.asofs:
+            raise KeyError(f"unknown asof_id: {name}")
+        return self.asofs[name]
+
+    def _profile(self, req: dict) -> dict:
+        if "profile" in req:
+            return req["profile"]
+        name = req.get("profile_id", "default")
+        if name not in self.profiles:
+            raise KeyError(f"unknown profile_id: {name}")
+        return self.profiles[name]
+
+    @staticmethod
+    def _input(req: dict, key: str) -> dict:
+        """The op's input document; a missing (e.g. misspelled) or non-object input is an error, not {}."""
+        if key not in req:
+            raise KeyError(f"op {req.get('op')!r} needs {key!r}")
+        if not isinstance(req[key], dict):
+            raise ValueError(f"{key!r} must be a JSON object")
+        return req[key]
+
+    @staticmethod
+    def _now(req: dict):
+        if not req.get("now"):
+            return None
+        now = datetime.fromisoformat(req["now"])
+        return now if now.tzinfo else now.replace(tzinfo=timezone.utc)
+
+    def handle(self, req: dict):
+        op = req.get("op")
+        mode = self.validate_mode
+        if op == "ping":
+            return {"served": self.served, "asof_ids": sorted(self.asofs), "profile_ids": sorted(self.profiles),
+                    "rules": DEFAULT_PLAN.stats()}
+        if op == "gate":
+            delta = self._input(req, "delta")
+            validate("delta_entry", delta, mode, where="delta")
+            return evaluate_gate(self._asof(req), delta, now=self._now(req))
+        if op == "findings_to_delta":
+            findings = self._input(req, "findings")
+            validate("mmar_findings", findings, mode, where="findings")
+            return findings_to_delta(findings)
+        if op == "intervene":
+            gate = self._input(req, "gate")
+            validate("decision_gate", gate, mode, where="gate")
+            return decide_intervene(gate, self._profile(req))
+        if op == "pipeline":
+            findings = self._input(req, "findings")
+            validate("mmar_findings", findings, mode, where="findings")
+            delta = findings_to_delta(findings)
+            gate = evaluate_gate(self._asof(req), delta, now=self._now(req))
+            return {"delta": delta, "decision_gate": gate, "intervene": decide_intervene(gate, self._profile(req))}
+        raise ValueError(f"unknown op: {op!r}")
+
+    def respond(self, raw: bytes, op: str = None) -> bytes:
+        return dumps_compact(self.reply(raw, op)).encode("utf-8")
+
+    def reply(self, raw: bytes, op: str = None) -> dict:
+        rid = None
+        try:
+            req = loads(raw)
+            if not isinstance(req, dict):
+                raise ValueError("request must be a JSON object")
+            if op is not None:  # the URL names the op; a body that says otherwise is rejected
+                if req.get("op", op) != op:
+                    raise ValueError(f"op {req['op']!r} in the body does not match /v1/{op}")
+                req["op"] = op
+            rid = req.get("id")
+            out = {"id": rid, "ok": True, "result": self.handle(req)}
+        except Exception as e:  # one bad request must not take the connection down
+            out = {"id": rid, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.served += 1
+        return out
+
+    # --- NDJSON over a Unix socket ---
+    async def serve_lines(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self.respond(line) + b"\n")
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    # --- minimal HTTP/1.1 (keep-alive, pipelined requests answered in order) ---
+    async def serve_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = (lines[0].split(" ") + ["", "", ""])[:3]
+                headers = {}
+                for h in lines[1:]:
+                    if ":" in h:
+                        k, v = h.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= STREAM_LIMIT:
+                    # the body cannot be framed: answer and drop the connection
+                    status = "413 Content Too Large" if length > STREAM_LIMIT else "400 Bad Request"
+                    await self._http_reply(writer, status, _error("bad Content-Length"), close=True)
+                    break
+                body = await reader.readexactly(length)
+
+                if method == "POST" and target.startswith("/v1/"):
+                    out = self.reply(body or b"{}", op=target[len("/v1/"):].strip("/"))
+                    status, payload = ("200 OK" if out["ok"] else "400 Bad Request"), dumps_compact(out).encode("utf-8")
+                elif method == "GET" and target in ("/v1/ping", "/healthz"):
+                    status, payload = "200 OK", self.respond(b'{"op": "ping"}')
+                else:
+                    status, payload = "404 Not Found", _error("not found")
+
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                await self._http_reply(writer, status, payload, close)
+                if close:
+                    break
+        except asyncio.LimitOverrunError:
+            try:
+                await self._http_reply(writer, "431 Request Header Fields Too Large", _error("header too large"), True)
+            except (ConnectionResetError, BrokenPipeError):
+                pass
+        except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _http_reply(writer: asyncio.StreamWriter, status: str, payload: bytes, close: bool):
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+            .encode("latin-1") + payload
+        )
+        await writer.drain()
+
+
+def _error(msg: str) -> bytes:
+    return dumps_compact({"ok": False, "error": msg}).encode("utf-8")
+
+
+def _named_docs(specs) -> dict:
+    """
+    ["name=path", "path"] -> {name: doc}; a bare path is registered as "default".
+    Read strictly: a mistyped path raises OSError instead of registering an empty doc.
+    """
+    out = {}
+    for spec in specs or []:
+        name, _, path = spec.rpartition("=")
+        out[name or "default"] = loads(Path(path).read_bytes())
+    return out
+
+
+def clear_stale_socket(path: str):
+    """
+    Remove a socket left behind by a previous run. Anything else at `path`
+    (a regular file, a directory, a socket a live server still answers on)
+    raises ValueError instead of being deleted.
+    """
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise ValueError(f"--unix {path} exists and is not a socket; refusing to remove it")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            pass  # nobody listening: stale
+        else:
+            raise ValueError(f"--unix {path} is in use by a running server")
+    os.unlink(path)
+
+
+def parse_http(spec: str, allow_remote: bool = False) -> tuple[str, int]:
+    """HOST:PORT (HOST defaults to 127.0.0.1) -> (host, port); non-loopback hosts need allow_remote."""
+    host, _, port = spec.rpartition(":")
+    host = host.strip("[]") or "127.0.0.1"
+    if not allow_remote:
+        try:
+            loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            loopback = False
+        if not loopback:
+            raise ValueError(f"--http {spec}: {host} is not a loopback address (pass --allow-remote to expose it)")
+    return host, int(port)
+
+
+async def serve(service: GateService, unix: str = None, http: str = None, allow_remote: bool = False):
+    servers = []
+    if unix:
+        clear_stale_socket(unix)
+        servers.append(await asyncio.start_unix_server(service.serve_lines, path=unix, limit=STREAM_LIMIT))
+        print(f"[gate-service] unix socket {unix}", file=sys.stderr)
+    if http:
+        host, port = parse_http(http, allow_remote)
+        servers.append(await asyncio.start_server(service.serve_http, host, port, limit=STREAM_LIMIT))
+        print(f"[gate-service] http://{host}:{port}", file=sys.stderr)
+    await asyncio.gather(*(s.serve_forever() for s in servers))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="warm gate / findings_to_delta / intervene service")
+    ap.add_argument("--unix", default=None, help="Unix socket path (NDJSON protocol)")
+    ap.add_argument("--http", default=None, help="HOST:PORT for localhost HTTP (e.g. 127.0.0.1:8765)")
+    ap.add_argument("--allow-remote", action="store_true",
+                    help="allow --http on a non-loopback host (the service has no authentication)")
+    ap.add_argument("--asof", action="append", default=[], help="[name=]path to an As-of pack (repeatable)")
+    ap.add_argument("--profile", action="append", default=[], help="[name=]path to an intervene profile (repeatable)")
+    add_validate_arg(ap)
+    args = ap.parse_args(argv)
+    if not args.unix and not args.http:
+        ap.error("give --unix and/or --http")
+
+    if args.http:
+        try:
+            parse_http(args.http, args.allow_remote)
+        except ValueError as e:
+            ap.error(str(e))
+
+    try:
+        service = GateService(_named_docs(args.asof), _named_docs(args.profile), validate_mode=args.validate)
+    except OSError as e:
+        sys.exit(f"[gate-service] {e}")
+    try:
+        asyncio.run(serve(service, unix=args.unix, http=args.http, allow_remote=args.allow_remote))
+    except KeyboardInterrupt:
+        pass
+    except ValueError as e:
+        sys.exit(f"[gate-service] {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
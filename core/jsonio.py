@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from core import metrics
+
+try:  # optional fast parser; stdlib is always the fallback
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# --- load / save ---
+
+def loads(data):
+    """bytes/str -> object (orjson if available; stdlib for anything orjson rejects, e.g. NaN / huge ints)."""
+    if metrics.enabled:
+        with metrics.stage("json_load"):
+            return _loads(data)
+    return _loads(data)
+
+
+def _loads(data):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def load_json(path: Path, default):
+    path = Path(path)
+    if not path.exists():
+        return default
+    return loads(path.read_bytes())
+
+
+def dumps_pretty(obj, sort_keys: bool = False) -> str:
+    """Human-facing files (the historical default): indent=2, UTF-8, stdlib."""
+    return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys)
+
+
+def dumps_compact(obj) -> str:
+    """
+    Machine-to-machine files: no whitespace, UTF-8, stdlib.
+    Not orjson: its floats (1e300 vs 1e+300) and NaN (null) differ, and these files are persisted.
+    """
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def save_json(path: Path, obj, compact: bool = False, atomic: bool = False):
+    """
+    Default output is byte-identical to the historical
+    json.dumps(obj, ensure_ascii=False, indent=2) (no trailing newline).
+    atomic=True writes a temp file and renames it over `path`.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with metrics.stage("json_save"):
+        text = dumps_compact(obj) if compact else dumps_pretty(obj)
+        if not atomic:
+            path.write_text(text, encoding="utf-8")
+            return
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# --- canonical encoding + hashing (always stdlib: hashes must stay bit-compatible) ---
+
+def canonical_dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True)
+
+
+def sha256_hex(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def stable_hash(obj, n: int = None) -> str:
+    h = sha256_hex(canonical_dumps(obj))
+    return h[:n] if n else h
+
+
+# fields of the recurrence fingerprint base, in canonical (sorted) order
+_FP_FIELDS = ("claim", "delta", "needs", "signals", "tag", "type")
+
+
+class FindingEncoding:
+    """
+    Canonical encodings of one finding, built from per-field encodings computed once:
+      - doc:         canonical_dumps(finding)             (element of the delta_id hash input)
+      - fingerprint: stable_hash(fingerprint base, 16)   (recurrence fingerprint)
+    """
+    __slots__ = ("doc", "fingerprint")
+
+    def __init__(self, f: dict):
+        enc = {k: canonical_dumps(v) for k, v in f.items()}
+        keys = sorted(enc)
+        self.doc = "{" + ", ".join(f"{canonical_dumps(k)}: {enc[k]}" for k in keys) + "}"
+
+        parts = []
+        for k in _FP_FIELDS:
+            v = enc.get(k)
+            if v is None:
+                v = "{}" if k == "signals" else "null"
+            parts.append(f'"{k}": {v}')
+        self.fingerprint = sha256_hex("{" + ", ".join(parts) + "}")[:16]
+
+
+def encode_findings(findings) -> list:
+    return [FindingEncoding(f) for f in findings]
+
+
+def findings_hash(encodings, n: int = 12) -> str:
+    """== stable_hash(findings, n), composed from the per-finding encodings."""
+    h = hashlib.sha256()
+    h.update(b"[")
+    for i, e in enumerate(encodings):
+        if i:
+            h.update(b", ")
+        h.update(e.doc.encode("utf-8"))
+    h.update(b"]")
+    return h.hexdigest()[:n]
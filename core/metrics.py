@@ -0,0 +1,214 @@
+"""
+Hot-path instrumentation: per-stage timers, counters, optional cProfile.
+
+Off by default. While disabled, `stage()` returns one shared no-op context
+manager and `count()` / `observe_gate()` return immediately. Per-item hot
+paths (a few hundred ns of `with` overhead matters there) check the flag
+first, so disabled they cost one attribute lookup:
+
+    from core import metrics
+    if metrics.enabled:
+        with metrics.stage("gate_rules"):
+            st = plan.run(delta, now)
+    else:
+        st = plan.run(delta, now)
+    metrics.count("findings_processed", n)
+
+Stages used across the pipeline: json_load, json_save, findings_map, hash,
+gate_rules, recurrence_merge, aggregate_merge, intervene. Stages may nest
+(hash runs inside findings_map), so their times do not add up to the wall time.
+
+Collection is per process: with --workers > 1, per-item stages that run in
+pool workers are not counted (the parent's load/merge/save stages still are).
+"""
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+METRICS_VERSION = "metrics-v1"
+PREFIX = "mmar"
+
+enabled = False
+_timers = {}     # stage -> [calls, total_ns, max_ns]
+_counters = {}   # (name, ((label, value), ...)) -> value
+_profiler = None
+_started = None
+_NULL = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter_ns() - self.t0
+        t = _timers.get(self.name)
+        if t is None:
+            _timers[self.name] = [1, dt, dt]
+        else:
+            t[0] += 1
+            t[1] += dt
+            if dt > t[2]:
+                t[2] = dt
+        return False
+
+
+def stage(name: str):
+    """Time a block as one call of `name` (no-op while disabled)."""
+    if not enabled:
+        return _NULL
+    return _Stage(name)
+
+
+def count(name: str, n: int = 1, **labels):
+    if not enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    _counters[key] = _counters.get(key, 0) + n
+
+
+def observe_gate(gate: dict):
+    """Severity distribution + reason-code frequencies of one decision_gate."""
+    if not enabled:
+        return
+    count("gate_decisions", 1, severity=str(gate.get("severity")))
+    for rc in gate.get("reason_codes") or []:
+        count("reason_codes", 1, code=str(rc))
+
+
+def enable(profile: bool = False):
+    global enabled, _profiler, _started
+    reset()
+    enabled = True
+    _started = time.perf_counter_ns()
+    if profile:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def disable():
+    global enabled, _profiler
+    enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+
+
+def reset():
+    global _profiler
+    _timers.clear()
+    _counters.clear()
+    _profiler = None
+
+
+def snapshot(command: str = None) -> dict:
+    """JSON metrics document."""
+    wall = (time.perf_counter_ns() - _started) / 1e9 if _started else 0.0
+    counters = {}
+    for (name, labels), v in sorted(_counters.items()):
+        counters.setdefault(name, []).append({"labels": dict(labels), "value": v})
+    return {
+        "version": METRICS_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "command": command,
+        "pid": os.getpid(),
+        "wall_seconds": round(wall, 6),
+        "stages": {
+            name: {"calls": c, "seconds": round(total / 1e9, 6), "max_ms": round(mx / 1e6, 4)}
+            for name, (c, total, mx) in sorted(_timers.items())
+        },
+        "counters": counters,
+    }
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def to_prometheus(doc: dict) -> str:
+    """Prometheus text exposition (node_exporter textfile collector)."""
+    cmd = {"command": doc["command"]} if doc.get("command") else {}
+    lines = [
+        f"# TYPE {PREFIX}_stage_seconds_total counter",
+        *(f"{PREFIX}_stage_seconds_total{_label_str({**cmd, 'stage': s})} {v['seconds']}"
+          for s, v in doc["stages"].items()),
+        f"# TYPE {PREFIX}_stage_calls_total counter",
+        *(f"{PREFIX}_stage_calls_total{_label_str({**cmd, 'stage': s})} {v['calls']}"
+          for s, v in doc["stages"].items()),
+        f"# TYPE {PREFIX}_stage_max_seconds gauge",
+        *(f"{PREFIX}_stage_max_seconds{_label_str({**cmd, 'stage': s})} {v['max_ms'] / 1000}"
+          for s, v in doc["stages"].items()),
+    ]
+    for name, series in doc["counters"].items():
+        lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+        lines += [f"{PREFIX}_{name}_total{_label_str({**cmd, **x['labels']})} {x['value']}" for x in series]
+    lines += [
+        f"# TYPE {PREFIX}_run_wall_seconds gauge",
+        f"{PREFIX}_run_wall_seconds{_label_str(cmd)} {doc['wall_seconds']}",
+        f"# TYPE {PREFIX}_run_timestamp_seconds gauge",
+        f"{PREFIX}_run_timestamp_seconds{_label_str(cmd)} {time.time():.3f}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write(path: Path, command: str = None) -> dict:
+    """
+    Write the metrics: *.prom -> Prometheus textfile, anything else -> JSON.
+    Atomic (temp file + rename), so a textfile collector never reads a partial file.
+    """
+    path = Path(path)
+    doc = snapshot(command)
+    text = to_prometheus(doc) if path.suffix == ".prom" else json.dumps(doc, ensure_ascii=False, indent=2)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    return doc
+
+
+def write_profile(path: Path):
+    """cProfile stats (pstats format; `python -m pstats PATH`)."""
+    if _profiler is not None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        _profiler.dump_stats(str(path))
+
+
+# --- CLI wiring ---
+
+def add_metrics_args(ap):
+    ap.add_argument("--metrics", default=None,
+                    help="write stage timers + counters: *.prom (Prometheus textfile) or JSON")
+    ap.add_argument("--metrics-profile", default=None, help="also capture a cProfile (pstats) to this path")
+
+
+def start_from_args(args):
+    if args.metrics or args.metrics_profile:
+        enable(profile=bool(args.metrics_profile))
+
+
+def finish_from_args(args, command: str):
+    if not enabled:
+        return
+    disable()
+    if args.metrics_profile:
+        write_profile(args.metrics_profile)
+    if args.metrics:
+        doc = write(args.metrics, command)
+        busy = " ".join(f"{s}={v['seconds']:.3f}s" for s, v in doc["stages"].items())
+        print(f"[metrics] {busy} -> {args.metrics}", file=sys.stderr)
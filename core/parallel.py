@@ -0,0 +1,40 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+
+def _run_chunk(fn, chunk: list) -> list:
+    return [fn(x) for x in chunk]
+
+
+def _chunks(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ordered_map(fn, iterable, workers: int = 1, chunksize: int = 64, inflight: int = 2):
+    """
+    map(fn, iterable) over a process pool, yielding results in input order.
+      - workers <= 1: plain serial map (no pool)
+      - chunked dispatch: `chunksize` items per task
+      - bounded: at most workers * inflight chunks are pending, so memory stays
+        constant for arbitrarily long (streamed) inputs
+    `fn` must be picklable (module-level function or functools.partial of one).
+    """
+    if workers <= 1:
+        yield from map(fn, iterable)
+        return
+
+    limit = max(1, workers * inflight)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+        for chunk in _chunks(iterable, max(1, chunksize)):
+            pending.append(ex.submit(_run_chunk, fn, chunk))
+            if len(pending) >= limit:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,164 @@
+import sys
+from functools import reduce
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.gate_rules import until_ts
+from core.jsonio import canonical_dumps, load_json, save_json, stable_hash
+from core.parallel import ordered_map
+
+MERGE_SOURCE = "pic_merge"
+
+# severity OR: PASS < DELAY < BLOCK < anything invalid (kept, so the gate still reports the coercion)
+SEVERITY_RANK = {"PASS": 0, "DELAY": 1, "BLOCK": 2}
+IMPACT_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def _severity_key(s):
+    return (SEVERITY_RANK.get(s, 3), canonical_dumps(s))
+
+
+def _impact_key(v):
+    return (IMPACT_RANK.get(str(v).lower().strip(), -1), canonical_dumps(v))
+
+
+def _until_key(u):
+    return (until_ts(u), canonical_dumps(u))
+
+
+def _sorted_union(a, b) -> list:
+    seen = {}
+    for v in list(a) + list(b):
+        seen.setdefault(canonical_dumps(v), v)
+    return [seen[k] for k in sorted(seen)]
+
+
+def _members(d: dict) -> list:
+    meta = d.get("meta") or {}
+    if isinstance(meta, dict) and meta.get("source") == MERGE_SOURCE:
+        return list(meta.get("merged_from") or [])
+    return [d.get("delta_id")]
+
+
+def _meta(d: dict) -> dict:
+    meta = d.get("meta")
+    return meta if isinstance(meta, dict) else {}
+
+
+def _merged_meta(a: dict, b: dict, merged_from: list) -> dict:
+    """
+    case_id: carried when the inputs agree (a missing one is no vote); a conflict raises ValueError.
+    asof:    the latest of the inputs' as-of labels (deltas from several runs of one case).
+    """
+    meta = {"source": MERGE_SOURCE, "merged_from": merged_from}
+    ids = {canonical_dumps(m["case_id"]): m["case_id"] for m in (_meta(a), _meta(b)) if m.get("case_id") is not None}
+    if len(ids) > 1:
+        raise ValueError(f"cannot PIC-merge deltas of different cases: {', '.join(sorted(ids))}")
+    if ids:
+        meta["case_id"] = next(iter(ids.values()))
+    asofs = [m["asof"] for m in (_meta(a), _meta(b)) if m.get("asof") is not None]
+    if asofs:
+        meta["asof"] = max(asofs, key=_until_key)
+    return meta
+
+
+def merge2(a: dict, b: dict) -> dict:
+    """
+    PIC merge of two delta entries (either may itself be a merge result):
+      severity      OR by rank (PASS < DELAY < BLOCK < invalid)
+      block         OR
+      until         max (None = unset)
+      evidence      sorted ∪
+      reason_codes  sorted ∪
+      impact        per-key max (low < medium < high)
+      changes       sorted ∪ (canonical JSON order)
+      meta          source + merged_from, plus case_id / asof (see _merged_meta), so
+                    merged output can be grouped by case again
+    Associative, commutative and idempotent; other top-level keys are dropped.
+    Raises ValueError for deltas whose meta.case_id differ.
+    """
+    untils = [u for u in (a.get("until"), b.get("until")) if u is not None]
+    impact = {}
+    for d in (a, b):
+        imp = d.get("impact")
+        if isinstance(imp, dict):
+            for k, v in imp.items():
+                if k not in impact or _impact_key(v) > _impact_key(impact[k]):
+                    impact[k] = v
+    merged_from = _sorted_union(_members(a), _members(b))
+    out = {
+        "delta_id": f"{MERGE_SOURCE}:{stable_hash(merged_from, 12)}",
+        "severity": max(a.get("severity", "PASS"), b.get("severity", "PASS"), key=_severity_key),
+        "until": max(untils, key=_until_key) if untils else None,
+        "block": a.get("block") is True or b.get("block") is True,
+        "evidence": _sorted_union(a.get("evidence") or [], b.get("evidence") or []),
+        "changes": _sorted_union(a.get("changes") or [], b.get("changes") or []),
+        "reason_codes": _sorted_union(a.get("reason_codes") or [], b.get("reason_codes") or []),
+    }
+    if impact:
+        out["impact"] = {k: impact[k] for k in sorted(impact)}
+    out["meta"] = _merged_meta(a, b, merged_from)
+    return out
+
+
+def merge_deltas(deltas) -> dict:
+    """
+    Effective delta for one case. A single delta passes through unchanged;
+    two or more are folded with merge2 (any order / grouping gives the same result).
+    """
+    deltas = list(deltas)
+    if not deltas:
+        raise ValueError("merge_deltas needs at least one delta")
+    if len(deltas) == 1:
+        return deltas[0]
+    return reduce(merge2, deltas)
+
+
+def merge_tree(deltas, workers: int = 1, chunksize: int = 64) -> dict:
+    """merge_deltas as a tree reduction: chunks are merged (in a process pool if workers > 1), then the partials."""
+    deltas = list(deltas)
+    if len(deltas) <= chunksize:
+        return merge_deltas(deltas)
+    chunks = [deltas[i:i + chunksize] for i in range(0, len(deltas), chunksize)]
+    return merge_deltas(ordered_map(merge_deltas, chunks, workers=workers, chunksize=1))
+
+
+def case_key(delta: dict) -> str:
+    meta = delta.get("meta") or {}
+    return str(meta.get("case_id") or "unknown") if isinstance(meta, dict) else "unknown"
+
+
+def group_by_case(deltas) -> dict:
+    groups = {}
+    for d in deltas:
+        groups.setdefault(case_key(d), []).append(d)
+    return groups
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from core.pipeline import _safe_name
+    from core.run_once import iter_batch
+
+    ap = argparse.ArgumentParser(description="PIC-merge delta entries per case (meta.case_id)")
+    ap.add_argument("--in", dest="inp", required=True, nargs="+",
+                    help="delta_entry.json files, directories of them, or .jsonl files")
+    ap.add_argument("--out", required=True, help="directory for <case_id>.json effective deltas")
+    ap.add_argument("--workers", type=int, default=1, help="process pool size for per-case merges")
+    args = ap.parse_args()
+
+    deltas = []
+    for p in map(Path, args.inp):
+        if p.is_dir() or p.suffix == ".jsonl":
+            deltas.extend(d for _, d in iter_batch(p))
+        else:
+            deltas.append(load_json(p, {}))
+    groups = group_by_case(deltas)
+    names = sorted(groups)
+    merged = ordered_map(merge_deltas, (groups[n] for n in names), workers=args.workers, chunksize=16)
+    out = Path(args.out)
+    for name, d in zip(names, merged):
+        save_json(out / f"{_safe_name(name)}.json", d)
+    print(f"[pic-merge] deltas={len(deltas)} cases={len(names)} -> {args.out}")
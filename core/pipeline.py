@@ -0,0 +1,204 @@
+import argparse
+import json
+import re
+import sys
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+from core import metrics
+from core.findings_to_delta import findings_to_delta
+from core.jsonio import encode_findings, load_json, loads, save_json as _save_json
+from core.parallel import ordered_map
+from core.recurrence_update import _apply_finding, _extract_support, finalize_items
+from core.run_once import evaluate_gate, _write_gate
+from core.schemas import SchemaValidationError, add_validate_arg, validate
+from tools.intervene_gate import decide_intervene
+
+
+def iter_jsonl(fh):
+    """Yield one document per non-empty line (constant memory)."""
+    for line in fh:
+        if line.strip():
+            yield loads(line)
+
+
+def run_case(asof: dict, profile: dict, findings_doc: dict, recurrence: bool = False, intervene: bool = True) -> dict:
+    """
+    findings -> delta -> gate -> intervene for one mmar_findings document (all in memory).
+    intervene=False leaves "intervene" as None (the caller decides it, e.g. with measured stagnation).
+    recurrence=True also returns the recurrence observations under "recurrence":
+    each finding is canonically encoded once, for both the delta_id and its fingerprint.
+    """
+    encodings = None
+    if recurrence:
+        findings = findings_doc.get("findings", [])
+        encodings = encode_findings(findings)
+    delta = findings_to_delta(findings_doc, encodings=encodings)
+    gate = evaluate_gate(asof, delta)
+    decision = None
+    if intervene:
+        with metrics.stage("intervene"):
+            decision = decide_intervene(gate, profile)
+    rec = {
+        "case_id": delta["meta"]["case_id"],
+        "asof": delta["meta"]["asof"],
+        "delta_id": delta["delta_id"],
+        "delta": delta,
+        "decision_gate": gate,
+        "intervene": decision,
+    }
+    if recurrence:
+        rec["recurrence"] = [(e.fingerprint, f.get("type"), f.get("tag"), _extract_support(f))
+                             for e, f in zip(encodings, findings)]
+    return rec
+
+
+def _fold_recurrence(log: dict, rec: dict):
+    """Apply one case's observations to the recurrence log, as ingest_findings_doc does."""
+    now = datetime.now(timezone.utc).isoformat()
+    log["version"] = "v1.1"
+    items = log.setdefault("items", {})
+    obs = rec.pop("recurrence")
+    for fp, t, tag, support in obs:
+        _apply_finding(items, fp, t, tag, support, rec["case_id"], rec["asof"], now)
+    metrics.count("findings_processed", len(obs), stage="recurrence")
+
+
+def _validated(docs, mode):
+    for n, doc in enumerate(docs, 1):
+        validate("mmar_findings", doc, mode, where=f"record {n}")
+        yield doc
+
+
+def _with_stagnation(rec: dict, profile: dict, detector) -> dict:
+    """Feed the case's findings + gate to the detector; decide intervene with the measured flag."""
+    delta, gate = rec["delta"], rec["decision_gate"]
+    at = delta["meta"].get("asof")
+    detector.observe_findings(rec["case_id"], delta.get("changes"), at)
+    detector.observe_gate(rec["case_id"], gate, at)
+    deadline = profile.get("deadline_days")
+    status = detector.status(rec["case_id"], at, float(deadline) if deadline is not None else None)
+    with metrics.stage("intervene"):
+        rec["intervene"] = decide_intervene(gate, profile, stagnation=status)
+    return rec
+
+
+def pipeline(asof: dict, profile: dict, docs, workers: int = 1, chunksize: int = 64, validate_mode: str = None,
+             stagnation=None, recurrence: dict = None):
+    """
+    Generator: one result per input document, in input order (also with workers > 1).
+    validate_mode ("fast" / "full"): schema-check inputs and every stage's output.
+    stagnation (core.stagnation.StagnationDetector): updated with every case in input
+    order; intervene then uses its measured stagnation flag instead of the reason-code guess.
+    recurrence (an in-memory recurrence log): every case's findings are folded in, in input
+    order, in the same pass (finalize_items is left to the caller).
+    """
+    if validate_mode:
+        docs = _validated(docs, validate_mode)
+    # with a detector, intervene needs the status after this case, so it is decided here (once), in input order
+    case = partial(run_case, asof, profile, recurrence=recurrence is not None, intervene=stagnation is None)
+    for n, rec in enumerate(ordered_map(case, docs, workers=workers, chunksize=chunksize), 1):
+        if recurrence is not None:
+            _fold_recurrence(recurrence, rec)
+        if stagnation is not None:
+            rec = _with_stagnation(rec, profile, stagnation)
+        if validate_mode:
+            where = f"record {n}"
+            validate("delta_entry", rec["delta"], validate_mode, where=where)
+            validate("decision_gate", rec["decision_gate"], validate_mode, where=where)
+            validate("intervene", rec["intervene"], validate_mode, where=where)
+        metrics.observe_gate(rec["decision_gate"])
+        metrics.count("intervene_actions", 1, action=rec["intervene"]["action"])
+        yield rec
+
+
+def _safe_name(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(s)) or "case"
+
+
+def write_intermediates(root: Path, n: int, rec: dict):
+    """Same files (and bytes) the three CLIs would write, under <root>/<n>-<case_id>/."""
+    d = root / f"{n:06d}-{_safe_name(rec['case_id'])}"
+    _save_json(d / "delta_entry.json", rec["delta"])
+    _write_gate(d / "decision_gate.json", rec["decision_gate"])
+    _save_json(d / "intervene.json", rec["intervene"])
+
+
+def to_record(rec: dict) -> str:
+    """One JSONL output line (the delta itself is only kept in intermediates)."""
+    out = {k: v for k, v in rec.items() if k != "delta"}
+    return json.dumps(out, ensure_ascii=False, sort_keys=True) + "\n"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="mmar_findings JSONL -> delta -> gate -> intervene (one JSONL record per case)")
+    ap.add_argument("--asof", required=True, help="path to asof_pack.json")
+    ap.add_argument("--profile", default=None, help="path to intervene_profile.json (defaults used if omitted)")
+    ap.add_argument("--in", dest="inp", default="-", help="JSONL of mmar_findings documents ('-' = stdin)")
+    ap.add_argument("--out", dest="outp", default="-", help="output JSONL ('-' = stdout)")
+    ap.add_argument("--intermediates", default=None,
+                    help="if set, also write delta_entry/decision_gate/intervene.json per case under this dir")
+    ap.add_argument("--workers", type=int, default=1, help="process pool size (1 = serial)")
+    ap.add_argument("--chunksize", type=int, default=64, help="documents per dispatched task")
+    ap.add_argument("--stagnation", default=None,
+                    help="stagnation detector state (core.stagnation): feed it every case and use its flag in intervene")
+    ap.add_argument("--recurrence", default=None,
+                    help="also fold every case's findings into this recurrence log (as core/recurrence_update.py)")
+    add_validate_arg(ap)
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args(argv)
+    metrics.start_from_args(args)
+
+    # read as strictly as run_once: a mistyped --asof/--profile must not gate against an empty pack
+    try:
+        asof = loads(Path(args.asof).read_bytes())
+        profile = loads(Path(args.profile).read_bytes()) if args.profile else {}
+    except OSError as e:
+        sys.exit(f"[pipeline] {e}")
+    inter = Path(args.intermediates) if args.intermediates else None
+    detector = None
+    if args.stagnation:
+        from core.stagnation import StagnationDetector
+        detector = StagnationDetector(Path(args.stagnation))
+    log = load_json(Path(args.recurrence), {"version": "v1.1", "items": {}}) if args.recurrence else None
+
+    fin = sys.stdin if args.inp == "-" else open(args.inp, "r", encoding="utf-8")
+    if args.outp == "-":
+        fout = sys.stdout
+    else:
+        Path(args.outp).parent.mkdir(parents=True, exist_ok=True)
+        fout = open(args.outp, "w", encoding="utf-8")
+
+    n = 0
+    try:
+        validate("asof_pack", asof, args.validate, where=args.asof)
+        for rec in pipeline(asof, profile, iter_jsonl(fin), workers=args.workers, chunksize=args.chunksize,
+                            validate_mode=args.validate, stagnation=detector, recurrence=log):
+            n += 1
+            if inter is not None:
+                write_intermediates(inter, n, rec)
+            fout.write(to_record(rec))
+    except (SchemaValidationError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+        metrics.finish_from_args(args, "pipeline")
+
+    if log is not None:
+        finalize_items(log["items"])
+        _save_json(Path(args.recurrence), log)
+        print(f"[pipeline] recurrence items={len(log['items'])} -> {args.recurrence}", file=sys.stderr)
+    if detector is not None:
+        detector.save()
+        print(f"[pipeline] stagnation cases={len(detector)} -> {args.stagnation}", file=sys.stderr)
+    print(f"[pipeline] cases={n} -> {args.outp}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.jsonio import dumps_compact, loads
+from core.recurrence_update import ROOT, _extract_support, _fingerprint_finding
+
+try:  # optional; the pure-Python path gives the same signatures
+    import numpy as np
+except ImportError:
+    np = None
+
+CLUSTER_PATH = ROOT / ".mmar" / "recurrence_clusters.jsonl"
+CLUSTER_VERSION = "recurrence-clusters-v2"
+
+# 64 hashes in 16 bands of 4 rows: pairs above ~0.5 Jaccard almost always share a band
+NUM_PERM = 64
+BANDS = 16
+SEED = 1
+
+_P = (1 << 31) - 1  # Mersenne prime; a * x < 2**62, so numpy uint64 never overflows
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _h32(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") % _P
+
+
+def finding_shingles(f: dict) -> set:
+    """
+    Support fragments + claim words and word bigrams (lowercased).
+    The type fragment is left out: buckets are already keyed by type, and a
+    fragment every finding of that type shares only inflates Jaccard.
+    """
+    out = {s for s in _extract_support(f) if not s.startswith("type:")}
+    words = _WORD.findall(str(f.get("claim") or "").lower())
+    out.update(f"w:{w}" for w in words)
+    out.update(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    return out
+
+
+class MinHasher:
+    """MinHash over 31-bit shingle hashes with universal hashing (a*x + b) mod (2**31 - 1)."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # deterministic coefficients (hash-derived, independent of the random module)
+        self.a = [_h32(f"a:{seed}:{i}") or 1 for i in range(num_perm)]
+        self.b = [_h32(f"b:{seed}:{i}") for i in range(num_perm)]
+        if np is not None:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, shingles) -> list:
+        xs = sorted({_h32(s) for s in shingles}) or [0]
+        if np is not None:
+            x = np.array(xs, dtype=np.uint64)[None, :]
+            return [int(v) for v in ((self._a * x + self._b) % _P).min(axis=1)]
+        return [min((a * x + b) % _P for x in xs) for a, b in zip(self.a, self.b)]
+
+    def band_keys(self, sig: list, prefix: str = "") -> list:
+        """One bucket key per band; `prefix` (the finding type) keeps types apart."""
+        r = self.rows
+        return [
+            hashlib.blake2b(f"{prefix}|{i}|{sig[i * r:(i + 1) * r]}".encode("utf-8"), digest_size=8).hexdigest()
+            for i in range(self.bands)
+        ]
+
+
+class ClusterIndex:
+    """
+    Incremental near-duplicate clustering of recurrence fingerprints (MinHash + LSH banding).
+
+    Each new fingerprint is hashed into BANDS buckets; it is unioned with the
+    first fingerprint seen in every bucket it lands in, so adding n findings
+    costs O(n * bands) instead of pairwise comparison. Buckets are keyed by
+    finding type, so different types never merge.
+
+    Cluster id = "cl-" + the first-inserted fingerprint of the cluster: a new
+    fingerprint joins under the existing root, so an id is stable until a new
+    fingerprint bridges two clusters. Then the older root wins, and the younger
+    cluster's members move to the older id; resolve() maps the retired id (and
+    any member's) to the current one.
+
+    The index file is append-only JSONL: a header line with the parameters,
+    then one {"fp", "keys"} line per fingerprint in insertion order. Loading
+    replays the lines (no re-hashing); save() appends only the new ones.
+    """
+
+    def __init__(self, path: Path = CLUSTER_PATH, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = SEED):
+        self.path = Path(path) if path else None
+        self.params = {"num_perm": num_perm, "bands": bands, "seed": seed}
+        self.hasher = MinHasher(num_perm, bands, seed)
+        self.parent = {}   # fp -> parent fp (root: itself)
+        self.seq = {}      # fp -> insertion order; the lower root wins a union
+        self.buckets = {}  # band key -> first fp seen
+        self._pending = []  # records not yet written
+        self._rewrite = True
+        if self.path and self.path.exists():
+            self._load()
+
+    def _load(self):
+        with self.path.open("r", encoding="utf-8") as fh:
+            header = loads(fh.readline() or "{}")
+            if header.get("version") != CLUSTER_VERSION or header.get("params") != self.params:
+                return  # other format or parameters: start over, rewritten on save
+            for line in fh:
+                if line.strip():
+                    r = loads(line)
+                    self._insert(r["fp"], r["keys"])
+        self._rewrite = False
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _find(self, fp: str) -> str:
+        parent = self.parent
+        root = fp
+        while parent[root] != root:
+            root = parent[root]
+        while parent[fp] != root:  # path compression
+            parent[fp], fp = root, parent[fp]
+        return root
+
+    def _union(self, a: str, b: str):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            old, new = (ra, rb) if self.seq[ra] < self.seq[rb] else (rb, ra)
+            self.parent[new] = old
+
+    def _insert(self, fp: str, keys: list):
+        self.parent[fp] = fp
+        self.seq[fp] = len(self.seq)
+        for key in keys:
+            first = self.buckets.setdefault(key, fp)
+            if first != fp:
+                self._union(fp, first)
+
+    def add_finding(self, f: dict, fp: str = None) -> str:
+        """Add one finding (no-op if its fingerprint is known). Returns the fingerprint."""
+        fp = fp or _fingerprint_finding(f)
+        if fp in self.parent:
+            return fp
+        sig = self.hasher.signature(finding_shingles(f))
+        keys = self.hasher.band_keys(sig, prefix=str(f.get("type")))
+        self._insert(fp, keys)
+        self._pending.append({"fp": fp, "keys": keys})
+        return fp
+
+    def add_docs(self, docs) -> int:
+        n = 0
+        for doc in docs:
+            for f in doc.get("findings", []):
+                self.add_finding(f)
+                n += 1
+        return n
+
+    def cluster_of(self, fp: str) -> str:
+        """Cluster id for a fingerprint; unknown fingerprints are their own cluster."""
+        return "cl-" + (self._find(fp) if fp in self.parent else fp)
+
+    def resolve(self, cluster_id: str) -> str:
+        """Current id for a cluster id handed out earlier (ids retired by a merge are aliases)."""
+        fp = cluster_id[len("cl-"):] if cluster_id.startswith("cl-") else cluster_id
+        return self.cluster_of(fp)
+
+    def mapping(self) -> dict:
+        return {fp: self.cluster_of(fp) for fp in self.parent}
+
+    def save(self):
+        """Append the fingerprints added since load (the whole index only for a new or stale file)."""
+        if not self.path:
+            return
+        if self._rewrite:
+            header = {"version": CLUSTER_VERSION, "params": self.params}
+            # a fresh (or stale) index has nothing on disk, so every fingerprint is pending
+            lines = [dumps_compact(r) + "\n" for r in [header, *self._pending]]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text("".join(lines), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._rewrite = False
+        elif self._pending:
+            with self.path.open("a", encoding="utf-8") as fh:
+                fh.write("".join(dumps_compact(r) + "\n" for r in self._pending))
+        self._pending = []
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from core.recurrence_update import iter_findings_docs
+
+    ap = argparse.ArgumentParser(description="MinHash/LSH near-duplicate clusters of recurrence fingerprints")
+    ap.add_argument("--index", default=str(CLUSTER_PATH), help="cluster index path")
+    ap.add_argument("--in", dest="inp", required=True, nargs="+", help="mmar_findings files, directories, globs or .jsonl")
+    ap.add_argument("--num-perm", type=int, default=NUM_PERM)
+    ap.add_argument("--bands", type=int, default=BANDS)
+    args = ap.parse_args()
+
+    idx = ClusterIndex(Path(args.index), num_perm=args.num_perm, bands=args.bands)
+    n = idx.add_docs(iter_findings_docs(args.inp))
+    idx.save()
+    clusters = len(set(idx.mapping().values()))
+    print(f"[cluster] findings={n} fingerprints={len(idx)} clusters={clusters} -> {args.index}")
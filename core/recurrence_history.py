@@ -0,0 +1,306 @@
+import struct
+import sys
+from bisect import bisect_right
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.gate_rules import until_ts
+from core.jsonio import dumps_compact, load_json, loads, save_json
+from core.recurrence_update import ROOT, _apply_finding, _extract_support, _fingerprint_finding, finalize_items
+
+HISTORY_DIR = ROOT / ".mmar" / "recurrence_history"
+HISTORY_VERSION = "recurrence-history-v1"
+CHECKPOINT_EVERY = 1000
+CHECKPOINT_KEEP = 4   # checkpoints kept per thinning level (see _thin)
+_IDX = struct.Struct("<dqQ")  # ts, seq, byte offset into events.jsonl
+_END = float("inf")  # sorts after every seq / offset at the same ts
+
+# gate consult: a (type, tag) seen at least this often as of the pack's asof is flagged
+RECURRENCE_MIN_COUNT = 2
+
+
+def asof_key(asof):
+    """As-of label (ISO string or datetime) -> sort key (POSIX seconds); None if it is not a timestamp."""
+    if isinstance(asof, datetime):
+        asof = asof.isoformat()
+    try:
+        datetime.fromisoformat(str(asof))
+    except ValueError:
+        return None
+    return until_ts(asof)
+
+
+def _empty_log() -> dict:
+    return {"version": "v1.1", "items": {}}
+
+
+class RecurrenceHistory:
+    """
+    As-of indexed recurrence history (Time V2: no hindsight).
+
+    Layout under `root`:
+      events.jsonl        append-only events, one per finding, stamped with the
+                          document's `asof` label (not the wall clock)
+      events.idx          append-only fixed-width (ts, seq, offset) records, in arrival order
+      manifest.json       counters + checkpoint list (small; rewritten per append)
+      checkpoints/*.json  folded log up to a (asof, seq) key
+
+    An append writes O(events appended) bytes. as_of(T) starts from the last
+    checkpoint at or before T and replays only the events between it and T
+    (read by offset), in (asof, seq) order. Items' first_seen/last_seen are
+    as-of labels, so the view does not depend on when documents were ingested.
+    A late (out-of-order) event drops the checkpoints it would change. Old
+    checkpoints are thinned geometrically (_thin), so their number grows with
+    log(history), not with the history itself. Events whose `asof` is not a
+    timestamp are stored but are never part of an as-of view.
+    """
+
+    def __init__(self, root: Path = HISTORY_DIR, checkpoint_every: int = CHECKPOINT_EVERY,
+                 checkpoint_keep: int = CHECKPOINT_KEEP):
+        self.root = Path(root)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_keep = checkpoint_keep
+        man = load_json(self.root / "manifest.json", {})
+        if man.get("version") != HISTORY_VERSION:
+            man = {}
+        self.seq = man.get("seq", 0)
+        self.unindexed = man.get("unindexed", 0)
+        self.indexed = man.get("indexed", 0)
+        self.max_key = tuple(man["max_key"]) if man.get("max_key") else None
+        self.cp_count = man.get("cp_count", 0)
+        # sorted (ts, seq, file name, ordinal, events covered)
+        self.checkpoints = [tuple(c) for c in man.get("checkpoints", [])]
+        self._keys = None
+
+    @property
+    def events_path(self) -> Path:
+        return self.root / "events.jsonl"
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "events.idx"
+
+    @property
+    def keys(self) -> list:
+        """Indexed events as sorted (ts, seq, offset); loaded on first use."""
+        if self._keys is None:
+            keys = []
+            if self.indexed:
+                with self.index_path.open("rb") as fh:
+                    keys = list(_IDX.iter_unpack(fh.read(self.indexed * _IDX.size)))
+            keys.sort()  # already sorted unless events arrived late (timsort: linear then)
+            self._keys = keys
+        return self._keys
+
+    def __len__(self):
+        return self.seq
+
+    # --- write ---
+
+    def append_docs(self, docs) -> int:
+        """Record every finding of every mmar_findings document as an event. Returns events written."""
+        start = self.seq
+        with self.appending() as add:
+            for doc in docs:
+                add(doc)
+        return self.seq - start
+
+    @contextmanager
+    def appending(self):
+        """
+        Push-style append_docs: yields add(doc), so the documents can be fed
+        while another consumer reads the same stream. The index, checkpoints
+        and manifest are written once, on exit.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        new = []
+        try:
+            with self.events_path.open("ab") as fh:
+                def add(doc: dict):
+                    case_id = doc.get("case_id", "unknown")
+                    asof = doc.get("asof", "unknown")
+                    ts = asof_key(asof)
+                    for f in doc.get("findings", []):
+                        self.seq += 1
+                        ev = {"seq": self.seq, "asof": asof, "case_id": case_id, "fp": _fingerprint_finding(f),
+                              "type": f.get("type"), "tag": f.get("tag"), "support": _extract_support(f)}
+                        offset = fh.tell()
+                        fh.write((dumps_compact(ev) + "\n").encode("utf-8"))
+                        if ts is None:
+                            self.unindexed += 1
+                        else:
+                            new.append((ts, self.seq, offset))
+
+                yield add
+        finally:  # events already written must be indexed even if the feeder fails
+            self._index(new)
+
+    def _index(self, new: list):
+        """Index appended (ts, seq, offset) keys, checkpoint, save the manifest."""
+        if new:
+            with self.index_path.open("ab") as fh:
+                fh.truncate(self.indexed * _IDX.size)  # drop a record tail left by an interrupted append
+                fh.write(b"".join(_IDX.pack(*k) for k in new))
+            self.indexed += len(new)
+            new.sort()
+            late = self.max_key is not None and new[0] < self.max_key
+            if late:
+                self._drop_checkpoints_after(new[0])
+            if self._keys is not None:
+                self._keys = sorted(self._keys + new) if late else self._keys + new
+            if self.max_key is None or new[-1] > self.max_key:
+                self.max_key = new[-1]
+            self._checkpoint()
+        self._save_manifest()
+
+    def _drop_checkpoints_after(self, key):
+        keep = []
+        for c in self.checkpoints:
+            if c[:2] < key[:2]:
+                keep.append(c)
+            else:
+                (self.root / "checkpoints" / c[2]).unlink(missing_ok=True)
+        self.checkpoints = keep
+
+    def _checkpoint(self):
+        """
+        Write a checkpoint every `checkpoint_every` indexed events past the last one.
+        A checkpoint records how many events it covers: later events always sort
+        after every kept checkpoint (_drop_checkpoints_after), so that count stays
+        valid and no index load is needed to decide.
+        """
+        lo = self.checkpoints[-1][4] if self.checkpoints else 0
+        if self.indexed - lo < self.checkpoint_every:
+            return
+        keys = self.keys
+        log = self._load_checkpoint(self.checkpoints[-1]) if self.checkpoints else _empty_log()
+        with self.events_path.open("rb") as fh:
+            while len(keys) - lo >= self.checkpoint_every:
+                hi = lo + self.checkpoint_every
+                self._fold(fh, log, lo, hi)
+                ts, seq, _ = keys[hi - 1]
+                name = f"cp-{seq}.json"
+                save_json(self.root / "checkpoints" / name, log, compact=True, atomic=True)
+                self.cp_count += 1
+                self.checkpoints.append((ts, seq, name, self.cp_count, hi))
+                lo = hi
+        self._thin()
+
+    def _thin(self):
+        """
+        Geometric thinning: the newest `checkpoint_keep` checkpoints are kept, then
+        every 2nd one for the next 2*keep ordinals, every 4th for the next 4*keep, ...
+        Keeping ordinal k at age a requires k % 2**level(a) == 0, and level only grows
+        with age, so a dropped checkpoint is never needed again.
+        """
+        if not self.checkpoints:
+            return
+        newest = self.checkpoints[-1][3]
+        keep = []
+        for c in self.checkpoints:
+            age = newest - c[3]
+            level = (age // self.checkpoint_keep + 1).bit_length() - 1
+            if c[3] % (1 << level) == 0:
+                keep.append(c)
+            else:
+                (self.root / "checkpoints" / c[2]).unlink(missing_ok=True)
+        self.checkpoints = keep
+
+    def _save_manifest(self):
+        save_json(self.root / "manifest.json", {
+            "version": HISTORY_VERSION,
+            "seq": self.seq,
+            "unindexed": self.unindexed,
+            "indexed": self.indexed,
+            "max_key": list(self.max_key) if self.max_key else None,
+            "cp_count": self.cp_count,
+            "checkpoints": [list(c) for c in self.checkpoints],
+        }, compact=True, atomic=True)
+
+    # --- read ---
+
+    def _load_checkpoint(self, c) -> dict:
+        return load_json(self.root / "checkpoints" / c[2], None) or _empty_log()
+
+    def _fold(self, fh, log: dict, lo: int, hi: int):
+        items = log.setdefault("items", {})
+        for _, _, offset in self.keys[lo:hi]:
+            fh.seek(offset)
+            ev = loads(fh.readline())
+            _apply_finding(items, ev["fp"], ev.get("type"), ev.get("tag"), ev.get("support") or [],
+                           ev.get("case_id"), ev.get("asof"), ev.get("asof"))
+        finalize_items(items)
+
+    def as_of(self, asof) -> dict:
+        """The recurrence log as of `asof`: every event whose as-of label is <= asof, nothing later."""
+        ts = asof_key(asof)
+        if ts is None:
+            raise ValueError(f"asof is not a timestamp: {asof!r}")
+        hi = bisect_right(self.keys, (ts, _END, _END))
+        c = bisect_right(self.checkpoints, (ts, _END, "")) - 1
+        if c >= 0:
+            log, lo = self._load_checkpoint(self.checkpoints[c]), self.checkpoints[c][4]
+        else:
+            log, lo = _empty_log(), 0
+        if hi > lo:
+            with self.events_path.open("rb") as fh:
+                self._fold(fh, log, lo, hi)
+        return log
+
+
+# --- gate consult ---
+
+def type_tag_counts(log: dict) -> dict:
+    """{(type, tag): total observations} over a recurrence log (e.g. RecurrenceHistory.as_of(T))."""
+    out = {}
+    for it in log.get("items", {}).values():
+        k = (it.get("type"), it.get("tag"))
+        out[k] = out.get(k, 0) + int(it.get("count", 0))
+    return out
+
+
+def recurrence_reason_codes(delta: dict, counts: dict, min_count: int = RECURRENCE_MIN_COUNT) -> list[str]:
+    """RECURRENCE_AS_OF:<type>[:<tag>] for each change whose (type, tag) was seen >= min_count times as of T."""
+    codes = []
+    for ch in delta.get("changes") or []:
+        if not isinstance(ch, dict):
+            continue
+        t, tag = ch.get("type"), ch.get("tag")
+        if counts.get((t, tag), 0) >= min_count:
+            codes.append(f"RECURRENCE_AS_OF:{t}:{tag}" if tag else f"RECURRENCE_AS_OF:{t}")
+    return list(dict.fromkeys(codes))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from core.recurrence_update import iter_findings_docs
+
+    ap = argparse.ArgumentParser(description="as-of indexed recurrence history")
+    ap.add_argument("--root", default=str(HISTORY_DIR), help="history directory")
+    ap.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_app = sub.add_parser("append", help="record mmar_findings documents")
+    p_app.add_argument("--in", dest="inp", required=True, nargs="+", help="files, directories, globs or .jsonl")
+    p_as = sub.add_parser("asof", help="the recurrence log as of T")
+    p_as.add_argument("--at", required=True, help="ISO as-of timestamp, or an As-of pack path")
+    p_as.add_argument("--out", required=True, help="path to recurrence_log.json")
+    args = ap.parse_args()
+
+    hist = RecurrenceHistory(Path(args.root), checkpoint_every=args.checkpoint_every)
+    if args.cmd == "append":
+        n = hist.append_docs(iter_findings_docs(args.inp))
+        print(f"[history] appended events={n} total={len(hist)} checkpoints={len(hist.checkpoints)} -> {args.root}")
+    else:
+        at = args.at
+        if Path(at).is_file():
+            at = load_json(Path(at), {}).get("asof")
+        try:
+            log = hist.as_of(at)
+        except ValueError as e:
+            sys.exit(str(e))
+        save_json(Path(args.out), log)
+        print(f"[history] asof={at} items={len(log['items'])} -> {args.out}")
@@ -0,0 +1,101 @@
+from collections import OrderedDict, deque
+
+
+class BoundedOrderedSet:
+    """
+    Insertion-ordered set with a size bound; add() is amortized O(1).
+      keep="last":  evict the oldest entry when full (sliding window)
+      keep="first": ignore new entries once full (first-N union)
+    `key` maps a value to its dedupe key (the first value seen for a key is kept).
+    """
+    __slots__ = ("maxlen", "keep", "key", "_d")
+
+    def __init__(self, values=(), maxlen: int = 20, keep: str = "last", key=None):
+        self.maxlen = maxlen
+        self.keep = keep
+        self.key = key
+        self._d = OrderedDict()
+        for v in values:
+            k = key(v) if key else v
+            if k not in self._d:
+                self._d[k] = v
+        # same truncation the list-based code applies on first touch
+        if keep == "last":
+            while len(self._d) > maxlen:
+                self._d.popitem(last=False)
+        else:
+            while len(self._d) > maxlen:
+                self._d.popitem(last=True)
+
+    def add(self, value) -> bool:
+        d = self._d
+        k = self.key(value) if self.key else value
+        if k in d:
+            return False
+        if self.keep == "first":
+            if len(d) >= self.maxlen:
+                return False
+            d[k] = value
+            return True
+        d[k] = value
+        if len(d) > self.maxlen:
+            d.popitem(last=False)
+        return True
+
+    def __len__(self):
+        return len(self._d)
+
+    def __contains__(self, value):
+        return (self.key(value) if self.key else value) in self._d
+
+    def __iter__(self):
+        return iter(self._d.values())
+
+    def to_list(self) -> list:
+        return list(self._d.values())
+
+
+def _source_key(s: dict):
+    return (s.get("case_id"), s.get("asof"))
+
+
+class RecurrenceItem:
+    """
+    In-memory form of one recurrence_log item (v1.1).
+    Holds the original dict so to_dict() keeps its key order and any extra keys;
+    the on-disk JSON is the same as the plain-dict implementation produced.
+    """
+    __slots__ = ("raw", "count", "last_seen", "sources", "support", "examples")
+
+    def __init__(self, raw: dict):
+        self.raw = raw
+        self.count = raw.get("count", 0)
+        self.last_seen = raw.get("last_seen")
+        self.sources = BoundedOrderedSet(raw.get("sources") or [], maxlen=20, keep="last", key=_source_key)
+        self.support = BoundedOrderedSet(raw.get("support") or [], maxlen=200, keep="first")
+        self.examples = deque(raw.get("examples") or [], maxlen=5)
+
+    def observe(self, case_id, asof, support: list, now: str):
+        self.count += 1
+        self.last_seen = now
+        self.sources.add({"case_id": case_id, "asof": asof})
+        for s in support:
+            self.support.add(s)
+        self.examples.append({"case_id": case_id, "asof": asof})
+
+    def to_dict(self) -> dict:
+        raw = self.raw
+        raw["count"] = self.count
+        raw["last_seen"] = self.last_seen
+        raw["sources"] = self.sources.to_list()
+        raw["support"] = self.support.to_list()
+        raw["examples"] = list(self.examples)
+        return raw
+
+
+def finalize_items(items: dict) -> dict:
+    """Replace RecurrenceItem values with their plain dicts (in place)."""
+    for fp, it in items.items():
+        if isinstance(it, RecurrenceItem):
+            items[fp] = it.to_dict()
+    return items
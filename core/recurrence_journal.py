@@ -0,0 +1,164 @@
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime, timezone
+
+try:  # POSIX advisory locks; elsewhere the journal is single-process only
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from core.jsonio import dumps_compact, loads, save_json
+from core.recurrence_update import (
+    LOG_PATH,
+    _apply_finding,
+    _extract_support,
+    _fingerprint_finding,
+    _load_json,
+    finalize_items,
+)
+
+
+def journal_path(log_path: Path = LOG_PATH) -> Path:
+    """.mmar/recurrence_log.json -> .mmar/recurrence_log.journal.jsonl"""
+    return log_path.with_suffix(".journal.jsonl")
+
+
+def compacting_paths(log_path: Path = LOG_PATH) -> list[Path]:
+    """Journals moved aside by a compaction that has not finished yet, oldest first."""
+    jp = journal_path(log_path)
+    if not jp.parent.is_dir():
+        return []
+    return sorted(jp.parent.glob(f"{jp.name}.compacting-*"))
+
+
+@contextmanager
+def locked(log_path: Path = LOG_PATH, exclusive: bool = False, suffix: str = ".lock", create: bool = True):
+    """
+    flock on <log>.lock. Appenders and readers hold it shared; compaction takes
+    it exclusively only to move the journal aside and to swap the snapshot in.
+    create=False (readers) skips locking when no writer ever created the lock
+    file, so read-only artifact dirs are left untouched.
+    """
+    lp = log_path.with_suffix(suffix)
+    if fcntl is None or (not create and not lp.exists()):
+        yield
+        return
+    lp.parent.mkdir(parents=True, exist_ok=True)
+    with lp.open("a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def rotate_journal(log_path: Path = LOG_PATH) -> list[Path]:
+    """
+    Move the live journal aside (<journal>.compacting-<time_ns>) under the
+    exclusive lock: no appender has it open any more, and later appends start a
+    new journal. Returns every journal waiting to be folded, oldest first.
+    """
+    jp = journal_path(log_path)
+    with locked(log_path, exclusive=True):
+        if jp.exists():
+            os.replace(jp, jp.with_name(f"{jp.name}.compacting-{time.time_ns():020d}"))
+    return compacting_paths(log_path)
+
+
+def _record(f: dict, case_id, asof, now: str) -> dict:
+    # compact delta record: everything _apply_finding needs, nothing more
+    return {
+        "fp": _fingerprint_finding(f),
+        "type": f.get("type"),
+        "tag": f.get("tag"),
+        "support": _extract_support(f),
+        "case_id": case_id,
+        "asof": asof,
+        "at": now,
+    }
+
+
+def append_findings_docs(docs, log_path: Path = LOG_PATH) -> int:
+    """
+    Journaled update: append one compact line per finding.
+    Cost is O(findings ingested); the snapshot is not read or rewritten.
+    """
+    jp = journal_path(log_path)
+    jp.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    # the journal file exists after any update (even with zero findings), which
+    # is how the merged view knows to bump the version like update_recurrence does
+    with locked(log_path), jp.open("a", encoding="utf-8") as fh:
+        for findings_doc in docs:
+            now = datetime.now(timezone.utc).isoformat()
+            case_id = findings_doc.get("case_id", "unknown")
+            asof = findings_doc.get("asof", "unknown")
+            lines = [dumps_compact(_record(f, case_id, asof, now)) + "\n" for f in findings_doc.get("findings", [])]
+            fh.write("".join(lines))
+            n += len(lines)
+    return n
+
+
+def append_findings(mmar_findings_path: Path, log_path: Path = LOG_PATH) -> int:
+    return append_findings_docs([_load_json(mmar_findings_path, {})], log_path)
+
+
+def _iter_files(paths):
+    for p in paths:
+        with p.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield loads(line)
+
+
+def journal_files(log_path: Path = LOG_PATH) -> list[Path]:
+    """Journals in replay order: any being compacted, then the live one."""
+    jp = journal_path(log_path)
+    return compacting_paths(log_path) + ([jp] if jp.exists() else [])
+
+
+def iter_journal(log_path: Path = LOG_PATH):
+    return _iter_files(journal_files(log_path))
+
+
+def replay(log: dict, records) -> dict:
+    """Fold journal records into a log dict (same semantics as update_recurrence)."""
+    items = log.setdefault("items", {})
+    for r in records:
+        _apply_finding(items, r["fp"], r.get("type"), r.get("tag"), r.get("support") or [],
+                       r.get("case_id"), r.get("asof"), r["at"])
+    finalize_items(items)
+    return log
+
+
+def load_merged(log_path: Path = LOG_PATH) -> dict:
+    """Snapshot + journal = the log update_recurrence would have produced."""
+    with locked(log_path, create=False):
+        log = _load_json(log_path, {"version": "v1.1", "items": {}})
+        files = journal_files(log_path)
+        if files:
+            log["version"] = "v1.1"
+            replay(log, _iter_files(files))
+    return log
+
+
+def compact(log_path: Path = LOG_PATH) -> dict:
+    """
+    Fold the journal into the snapshot and drop it, without losing concurrent appends:
+    the journal is moved aside first (rotate_journal) and only that file is deleted,
+    in the same exclusive section that swaps the new snapshot in (atomic replace).
+    Readers therefore see either old snapshot + journal or new snapshot, never both.
+    """
+    with locked(log_path, exclusive=True, suffix=".compact.lock"):
+        folded = rotate_journal(log_path)
+        log = _load_json(log_path, {"version": "v1.1", "items": {}})
+        if folded:
+            log["version"] = "v1.1"
+            replay(log, _iter_files(folded))
+        with locked(log_path, exclusive=True):
+            save_json(log_path, log, atomic=True)
+            for p in folded:
+                p.unlink()
+    return log
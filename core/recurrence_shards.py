@@ -0,0 +1,125 @@
+import heapq
+import os
+import re
+import socket
+import sys
+import time
+from pathlib import Path
+from datetime import datetime, timezone
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.jsonio import dumps_compact, loads, save_json
+from core.recurrence_journal import _record, journal_files, locked, replay, rotate_journal
+from core.recurrence_update import LOG_PATH, _load_json
+
+
+def shard_dir(log_path: Path = LOG_PATH) -> Path:
+    """.mmar/recurrence_log.json -> .mmar/recurrence_log.d/"""
+    return log_path.with_suffix(".d")
+
+
+def default_writer() -> str:
+    """MMAR_WRITER_ID, else host-pid."""
+    return os.environ.get("MMAR_WRITER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _safe(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", s) or "writer"
+
+
+def write_shard(docs, log_path: Path = LOG_PATH, writer: str = None) -> tuple[Path, int]:
+    """
+    Record one update as a new, immutable shard of the writer:
+    recurrence_log.d/<writer>-<time_ns>.jsonl, written to a temp file and renamed.
+    Writers never touch each other's files (or their own older ones), so
+    concurrent writers need no lock and no update is lost.
+    Records are streamed to the temp file one document at a time, and their
+    `at` never decreases (a clock step back reuses the previous `at`), so a
+    shard is always `at`-ordered for the lazy merge.
+    Returns (shard path, records written); no shard is written for zero findings.
+    """
+    d = shard_dir(log_path)
+    d.mkdir(parents=True, exist_ok=True)
+    path = d / f"{_safe(writer or default_writer())}-{time.time_ns():020d}.jsonl"
+    tmp = d / f".{path.name}.tmp"
+    n, last = 0, ""
+    try:
+        with tmp.open("w", encoding="utf-8") as fh:
+            for findings_doc in docs:
+                now = last = max(last, datetime.now(timezone.utc).isoformat())
+                case_id = findings_doc.get("case_id", "unknown")
+                asof = findings_doc.get("asof", "unknown")
+                for f in findings_doc.get("findings", []):
+                    fh.write(dumps_compact(_record(f, case_id, asof, now)) + "\n")
+                    n += 1
+        if n:
+            os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path, n
+
+
+def list_shards(log_path: Path = LOG_PATH) -> list[Path]:
+    d = shard_dir(log_path)
+    if not d.is_dir():
+        return []
+    return sorted(p for p in d.glob("*.jsonl") if not p.name.startswith("."))
+
+
+def _iter_records(p: Path):
+    with p.open("r", encoding="utf-8") as fh:
+        for n, line in enumerate(fh):
+            if line.strip():
+                r = loads(line)
+                yield (r.get("at") or "", p.name, n), r
+
+
+def iter_merged_records(journals, shards):
+    """
+    Journal and shard records in (at, file, line) order: the order a single
+    serialized writer would have applied them.
+    Shards are `at`-ordered by construction (write_shard) and are streamed.
+    A journal is not (concurrent appenders interleave their lines), so each
+    journal is sorted in memory; compaction keeps journals small.
+    """
+    runs = [iter(sorted(_iter_records(p), key=lambda x: x[0])) for p in journals]
+    runs += [_iter_records(p) for p in shards]
+    for _, r in heapq.merge(*runs, key=lambda x: x[0]):
+        yield r
+
+
+def _merged(log_path: Path, journals: list, shards: list) -> dict:
+    log = _load_json(log_path, {"version": "v1.1", "items": {}})
+    if journals or shards:
+        log["version"] = "v1.1"
+        replay(log, iter_merged_records(journals, shards))
+    return log
+
+
+def load_sharded(log_path: Path = LOG_PATH) -> dict:
+    """
+    Lazy merged view: the snapshot, then every journal and shard record in `at` order.
+    Same log as one writer applying all the updates serially in that order.
+    """
+    with locked(log_path, create=False):
+        return _merged(log_path, journal_files(log_path), list_shards(log_path))
+
+
+def compact_shards(log_path: Path = LOG_PATH) -> tuple[dict, int]:
+    """
+    Fold the journal and the current shards into the snapshot (atomic replace),
+    then delete exactly what was folded: the journal is moved aside first
+    (rotate_journal), and shards written meanwhile stay for next time.
+    The swap and the deletes share one exclusive section, so readers never
+    count a record twice.
+    """
+    with locked(log_path, exclusive=True, suffix=".compact.lock"):
+        shards = list_shards(log_path)
+        journals = rotate_journal(log_path)
+        log = _merged(log_path, journals, shards)
+        with locked(log_path, exclusive=True):
+            save_json(log_path, log, atomic=True)
+            for p in journals + shards:
+                p.unlink()
+    return log, len(shards)
@@ -0,0 +1,265 @@
+import sqlite3
+import sys
+from pathlib import Path
+from datetime import datetime, timezone
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.jsonio import dumps_compact, loads
+from core.recurrence_update import (
+    ROOT,
+    _apply_finding,
+    _extract_support,
+    _fingerprint_finding,
+    _load_json,
+    _save_json,
+    finalize_items,
+)
+
+DB_PATH = ROOT / ".mmar" / "recurrence_log.sqlite"
+
+# item keys with their own column / child table; anything else round-trips through items.extra (JSON)
+_ITEM_KEYS = ("type", "tag", "first_seen", "last_seen", "count", "sources", "support", "examples")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS items (
+    fp TEXT PRIMARY KEY,
+    ord INTEGER NOT NULL,
+    type TEXT,
+    tag TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    count INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    fp TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    case_id TEXT,
+    asof TEXT,
+    PRIMARY KEY (fp, pos)
+);
+CREATE TABLE IF NOT EXISTS support (
+    fp TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (fp, pos)
+);
+CREATE TABLE IF NOT EXISTS examples (
+    fp TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    case_id TEXT,
+    asof TEXT,
+    PRIMARY KEY (fp, pos)
+);
+CREATE INDEX IF NOT EXISTS idx_items_type ON items (type);
+CREATE INDEX IF NOT EXISTS idx_items_tag ON items (tag);
+CREATE INDEX IF NOT EXISTS idx_items_type_tag ON items (type, tag);
+CREATE INDEX IF NOT EXISTS idx_items_last_seen ON items (last_seen);
+CREATE INDEX IF NOT EXISTS idx_items_count ON items (count);
+CREATE INDEX IF NOT EXISTS idx_support_value ON support (value);
+"""
+
+
+def connect(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30.0)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _get_version(conn, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    return row[0] if row else default
+
+
+def _read_items(conn, where: str = "", params=(), order: str = "ord", limit: int = None) -> dict:
+    """
+    Items matching `where` (SQL over the items table), in `order`, as {fp: item dict}.
+    Set-based: one query for the items and one per child table (ordered by fp, pos),
+    whatever the number of items.
+    """
+    tail = f"{where} ORDER BY {order}"
+    params = list(params)
+    if limit is not None:
+        tail += " LIMIT ?"
+        params.append(int(limit))
+    items = {}
+    for fp, t, tag, fs, ls, count, extra in conn.execute(
+            f"SELECT fp, type, tag, first_seen, last_seen, count, extra FROM items{tail}", params):
+        items[fp] = {"type": t, "tag": tag, "first_seen": fs, "last_seen": ls, "count": count,
+                     "sources": [], "support": [], "examples": []}
+        if extra:
+            items[fp].update(loads(extra))
+    if not items:
+        return items
+    scope = f" WHERE fp IN (SELECT fp FROM items{tail})" if where or limit is not None else ""
+    for fp, c, a in conn.execute(f"SELECT fp, case_id, asof FROM sources{scope} ORDER BY fp, pos", params):
+        items[fp]["sources"].append({"case_id": c, "asof": a})
+    for fp, v in conn.execute(f"SELECT fp, value FROM support{scope} ORDER BY fp, pos", params):
+        items[fp]["support"].append(v)
+    for fp, c, a in conn.execute(f"SELECT fp, case_id, asof FROM examples{scope} ORDER BY fp, pos", params):
+        items[fp]["examples"].append({"case_id": c, "asof": a})
+    return items
+
+
+def _read_item(conn, fp: str):
+    return _read_items(conn, " WHERE fp = ?", (fp,)).get(fp)
+
+
+def _write_items(conn, items: dict):
+    """Upsert whole items (children replaced). Caller owns the transaction."""
+    next_ord = conn.execute("SELECT COALESCE(MAX(ord), -1) + 1 FROM items").fetchone()[0]
+    for fp, it in items.items():
+        extra = {k: v for k, v in it.items() if k not in _ITEM_KEYS}
+        extra = dumps_compact(extra) if extra else None
+        cur = conn.execute(
+            "UPDATE items SET type = ?, tag = ?, first_seen = ?, last_seen = ?, count = ?, extra = ? WHERE fp = ?",
+            (it.get("type"), it.get("tag"), it.get("first_seen"), it.get("last_seen"), int(it.get("count", 0) or 0),
+             extra, fp),
+        )
+        if cur.rowcount == 0:
+            conn.execute(
+                "INSERT INTO items (fp, ord, type, tag, first_seen, last_seen, count, extra)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (fp, next_ord, it.get("type"), it.get("tag"), it.get("first_seen"), it.get("last_seen"),
+                 int(it.get("count", 0) or 0), extra),
+            )
+            next_ord += 1
+        for table in ("sources", "support", "examples"):
+            conn.execute(f"DELETE FROM {table} WHERE fp = ?", (fp,))
+        conn.executemany(
+            "INSERT INTO sources (fp, pos, case_id, asof) VALUES (?, ?, ?, ?)",
+            [(fp, i, s.get("case_id"), s.get("asof")) for i, s in enumerate(it.get("sources", []) or [])],
+        )
+        conn.executemany(
+            "INSERT INTO support (fp, pos, value) VALUES (?, ?, ?)",
+            [(fp, i, v) for i, v in enumerate(it.get("support", []) or [])],
+        )
+        conn.executemany(
+            "INSERT INTO examples (fp, pos, case_id, asof) VALUES (?, ?, ?, ?)",
+            [(fp, i, e.get("case_id"), e.get("asof")) for i, e in enumerate(it.get("examples", []) or [])],
+        )
+
+
+def update_recurrence_sqlite_docs(docs, db_path: Path = DB_PATH) -> int:
+    """
+    Same semantics as update_recurrence, stored in SQLite.
+    Only the touched items are read and written, in one transaction for all docs.
+    The transaction starts with BEGIN IMMEDIATE, so the reads of touched items
+    already hold the write lock and concurrent writers cannot lose each other's updates.
+    Returns the total item count.
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            touched = {}
+            for findings_doc in docs:
+                now = datetime.now(timezone.utc).isoformat()
+                case_id = findings_doc.get("case_id", "unknown")
+                asof = findings_doc.get("asof", "unknown")
+                for f in findings_doc.get("findings", []):
+                    fp = _fingerprint_finding(f)
+                    if fp not in touched:
+                        existing = _read_item(conn, fp)
+                        if existing is not None:
+                            touched[fp] = existing
+                    _apply_finding(touched, fp, f.get("type"), f.get("tag"), _extract_support(f), case_id, asof, now)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', 'v1.1')")
+            _write_items(conn, finalize_items(touched))
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def update_recurrence_sqlite(mmar_findings_path: Path, db_path: Path = DB_PATH) -> int:
+    return update_recurrence_sqlite_docs([_load_json(mmar_findings_path, {})], db_path)
+
+
+def export_log(conn) -> dict:
+    """SQLite -> recurrence_log.json dict (item order = first insertion)."""
+    return {"version": _get_version(conn, "v1.1"), "items": _read_items(conn)}
+
+
+def import_log(conn, log: dict):
+    """recurrence_log.json dict -> SQLite (replaces the current contents)."""
+    items = log.get("items", {})
+    if not isinstance(items, dict):
+        items = {}
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for table in ("items", "sources", "support", "examples", "meta"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (log.get("version", "v1.1"),))
+        _write_items(conn, items)
+
+
+def query_items(conn, type=None, tag=None, since=None, min_count=None, limit=None) -> list[dict]:
+    """
+    Indexed lookup, e.g. STRUCTURAL_ANOMALY:COORDINATION seen since a timestamp.
+    Returns [{"fp": ..., **item}] ordered by count desc.
+    """
+    where, params = [], []
+    if type is not None:
+        where.append("type = ?")
+        params.append(type)
+    if tag is not None:
+        where.append("tag = ?")
+        params.append(tag)
+    if since is not None:
+        where.append("last_seen >= ?")
+        params.append(since)
+    if min_count is not None:
+        where.append("count >= ?")
+        params.append(int(min_count))
+    items = _read_items(conn, " WHERE " + " AND ".join(where) if where else "", params,
+                        order="count DESC, ord", limit=limit)
+    return [{"fp": fp, **it} for fp, it in items.items()]
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import timedelta
+
+    ap = argparse.ArgumentParser(description="SQLite recurrence store: import / export / query")
+    ap.add_argument("--db", default=str(DB_PATH), help="sqlite path")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_imp = sub.add_parser("import", help="recurrence_log.json -> sqlite")
+    p_imp.add_argument("--log", required=True)
+    p_exp = sub.add_parser("export", help="sqlite -> recurrence_log.json")
+    p_exp.add_argument("--out", required=True)
+    p_q = sub.add_parser("query", help="indexed item lookup")
+    p_q.add_argument("--type", default=None)
+    p_q.add_argument("--tag", default=None)
+    p_q.add_argument("--days", type=float, default=None, help="only items seen in the last N days")
+    p_q.add_argument("--min-count", type=int, default=None)
+    p_q.add_argument("--limit", type=int, default=50)
+    args = ap.parse_args()
+
+    conn = connect(Path(args.db))
+    try:
+        if args.cmd == "import":
+            log = _load_json(Path(args.log), {"version": "v1.1", "items": {}})
+            import_log(conn, log)
+            print(f"[recurrence-sqlite] imported items={len(log.get('items', {}))} -> {args.db}")
+        elif args.cmd == "export":
+            log = export_log(conn)
+            _save_json(Path(args.out), log)
+            print(f"[recurrence-sqlite] exported items={len(log['items'])} -> {args.out}")
+        else:
+            since = None
+            if args.days is not None:
+                since = (datetime.now(timezone.utc) - timedelta(days=args.days)).isoformat()
+            rows = query_items(conn, type=args.type, tag=args.tag, since=since,
+                               min_count=args.min_count, limit=args.limit)
+            for r in rows:
+                tag = f":{r['tag']}" if r.get("tag") else ""
+                print(f"  {r['count']}x  {r.get('type')}{tag}  last_seen={r['last_seen']}  {r['fp']}")
+    finally:
+        conn.close()
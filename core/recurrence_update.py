@@ -1,21 +1,17 @@
-import json
-import hashlib
+import glob
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core import metrics
+from core.jsonio import load_json as _load_json, loads, save_json as _save_json, stable_hash
+from core.recurrence_items import RecurrenceItem, finalize_items
+
 ROOT = Path(__file__).resolve().parents[1]
 LOG_PATH = ROOT / ".mmar" / "recurrence_log.json"
-
-
-def _load_json(path: Path, default):
-    if not path.exists():
-        return default
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def _save_json(path: Path, obj):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+FINDINGS_GLOB = "mmar_findings*"  # what a directory --in picks up
 
 
 def _fingerprint_finding(f: dict) -> str:
@@ -32,8 +28,7 @@ def _fingerprint_finding(f: dict) -> str:
         "delta": f.get("delta"),
         "signals": f.get("signals", {}),
     }
-    s = json.dumps(base, ensure_ascii=True, sort_keys=True)
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()[:16]
+    return stable_hash(base, 16)
 
 
 def _extract_support(f: dict) -> list[str]:
@@ -74,68 +69,228 @@ def _extract_support(f: dict) -> list[str]:
     return out[:50]
 
 
-def update_recurrence(mmar_findings_path: Path) -> dict:
-    now = datetime.now(timezone.utc).isoformat()
-    log = _load_json(LOG_PATH, {"version": "v1.1", "items": {}})
+def _new_item(t, tag, now: str) -> dict:
+    return {
+        "type": t,
+        "tag": tag,
+        "first_seen": now,
+        "last_seen": now,
+        "count": 0,
+
+        # v1.1 additions
+        "sources": [],   # list[{case_id, asof}]
+        "support": [],   # list[str] (set-like, deduped)
+        "examples": []
+    }
+
+
+def _apply_finding(items: dict, fp: str, t, tag, support: list, case_id, asof, now: str):
+    """
+    One recurrence observation -> items[fp] (shared by the direct, journaled and sqlite paths).
+    Touched items become RecurrenceItem (bounded sets, amortized O(1) per observation);
+    call finalize_items() before the items are read or saved.
+      - sources: dedupe by (case_id, asof), keep the most recent 20
+      - support: union, first 200
+      - examples: last 5
+    """
+    item = items.get(fp)
+    if item is None:
+        item = RecurrenceItem(_new_item(t, tag, now))
+        items[fp] = item
+    elif not isinstance(item, RecurrenceItem):
+        item = RecurrenceItem(item)
+        items[fp] = item
+    item.observe(case_id, asof, support, now)
+
+
+def ingest_findings_doc(log: dict, findings_doc: dict, now: str = None) -> int:
+    """
+    Fold one mmar_findings document into an in-memory log. Returns findings ingested.
+    Touched items stay as RecurrenceItem until finalize_items(log["items"]).
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).isoformat()
     log["version"] = "v1.1"
+    items = log.setdefault("items", {})
 
-    findings_doc = _load_json(mmar_findings_path, {})
     case_id = findings_doc.get("case_id", "unknown")
     asof = findings_doc.get("asof", "unknown")
     findings = findings_doc.get("findings", [])
 
-    for f in findings:
-        fp = _fingerprint_finding(f)
-        item = log["items"].get(fp, {
-            "type": f.get("type"),
-            "tag": f.get("tag"),
-            "first_seen": now,
-            "last_seen": now,
-            "count": 0,
-
-            # v1.1 additions
-            "sources": [],   # list[{case_id, asof}]
-            "support": [],   # list[str] (set-like, deduped)
-            "examples": []
-        })
-
-        item["count"] += 1
-        item["last_seen"] = now
-
-        # sources (dedupe)
-        src = {"case_id": case_id, "asof": asof}
-        item["sources"].append(src)
-        # dedupe sources while keeping recent ones
-        seen = set()
-        dedup_sources = []
-        for s in item["sources"]:
-            key = (s.get("case_id"), s.get("asof"))
-            if key in seen:
-                continue
-            seen.add(key)
-            dedup_sources.append(s)
-        item["sources"] = dedup_sources[-20:]
-
-        # support (union, bounded)
-        item["support"] = list(dict.fromkeys(item.get("support", []) + _extract_support(f)))[:200]
-
-        # keep up to 5 examples for debugging
-        item["examples"].append({"case_id": case_id, "asof": asof})
-        item["examples"] = item["examples"][-5:]
-
-        log["items"][fp] = item
-
-    _save_json(LOG_PATH, log)
+    if not metrics.enabled:
+        return _ingest(items, findings, case_id, asof, now)
+    with metrics.stage("hash"):
+        fps = [_fingerprint_finding(f) for f in findings]
+    with metrics.stage("recurrence_merge"):
+        n = _ingest(items, findings, case_id, asof, now, fps=fps)
+    metrics.count("findings_processed", n, stage="recurrence")
+    return n
+
+
+def _ingest(items: dict, findings, case_id, asof, now: str, fps=None) -> int:
+    if fps is None:
+        fps = [_fingerprint_finding(f) for f in findings]
+    for fp, f in zip(fps, findings):
+        _apply_finding(items, fp, f.get("type"), f.get("tag"), _extract_support(f), case_id, asof, now)
+    return len(fps)
+
+
+def update_recurrence(mmar_findings_path: Path, log_path: Path = LOG_PATH) -> dict:
+    log = _load_json(log_path, {"version": "v1.1", "items": {}})
+    ingest_findings_doc(log, _load_json(mmar_findings_path, {}))
+    finalize_items(log["items"])
+    _save_json(log_path, log)
     return log
 
 
+def resolve_inputs(inputs) -> list[Path]:
+    """
+    Expand --in arguments, keeping argument order:
+      - glob patterns (*, ?, [) -> sorted matches
+      - directories -> sorted **/mmar_findings*.json and **/mmar_findings*.jsonl
+        (only findings files: logs, journals and gate outputs in the same tree are skipped)
+      - anything else -> as-is
+    """
+    out = []
+    for x in inputs:
+        s = str(x)
+        if any(ch in s for ch in "*?["):
+            out.extend(sorted(Path(m) for m in glob.glob(s, recursive=True)))
+            continue
+        p = Path(s)
+        if p.is_dir():
+            out.extend(sorted(q for q in p.rglob(FINDINGS_GLOB) if q.is_file() and q.suffix in (".json", ".jsonl")))
+        else:
+            out.append(p)
+    return out
+
+
+def iter_findings_docs(inputs):
+    """Yield mmar_findings documents from files / dirs / globs; .jsonl yields one doc per line."""
+    for p in resolve_inputs(inputs):
+        if p.suffix == ".jsonl":
+            with p.open("r", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        yield loads(line)
+        else:
+            yield _load_json(p, {})
+
+
+def update_recurrence_docs(docs, log_path: Path = LOG_PATH, compact: bool = False) -> tuple[dict, int]:
+    """
+    Bulk ingestion: one load -> update (every document, in order) -> save.
+    Same log as calling update_recurrence once per document in that order
+    (each document still gets its own `now`).
+    """
+    log = _load_json(log_path, {"version": "v1.1", "items": {}})
+    n_docs = 0
+    for doc in docs:
+        ingest_findings_doc(log, doc)
+        n_docs += 1
+    with metrics.stage("recurrence_merge"):
+        finalize_items(log["items"])
+    _save_json(log_path, log, compact=compact)
+    return log, n_docs
+
+
+def update_recurrence_many(inputs, log_path: Path = LOG_PATH, compact: bool = False) -> tuple[dict, int]:
+    """update_recurrence_docs over files / dirs / globs / .jsonl (see resolve_inputs)."""
+    return update_recurrence_docs(iter_findings_docs(inputs), log_path, compact=compact)
+
+
 if __name__ == "__main__":
     import argparse
+    from contextlib import ExitStack
+    from core import recurrence_journal, recurrence_sqlite
+    from core.schemas import SchemaValidationError, add_validate_arg, validate
+
     ap = argparse.ArgumentParser()
-    ap.add_argument("--in", dest="inp", required=True, help="path to mmar_findings.json")
+    ap.add_argument("--in", dest="inp", nargs="+", default=None,
+                    help="mmar_findings.json files, directories, globs or .jsonl streams (ingested in order)")
+    ap.add_argument("--log", default=str(LOG_PATH), help="recurrence log path (snapshot)")
+    ap.add_argument("--journal", action="store_true",
+                    help="append compact records to <log>.journal.jsonl instead of rewriting the log")
+    ap.add_argument("--shard", nargs="?", const="", default=None, metavar="WRITER",
+                    help="write this update as an immutable shard in <log>.d/ (writer id: WRITER, "
+                         "MMAR_WRITER_ID or host-pid); concurrent writers never contend")
+    ap.add_argument("--fold", action="store_true", help="fold the journal (and shards) into the snapshot")
+    ap.add_argument("--db", default=None, help="use the SQLite backend at this path instead of the JSON log")
+    ap.add_argument("--compact", action="store_true", help="write compact JSON (machine-to-machine)")
+    ap.add_argument("--stream", action="store_true",
+                    help="parse each .json input one finding at a time (very large documents); same log")
+    ap.add_argument("--history", default=None,
+                    help="also record the findings in this as-of history dir (core.recurrence_history)")
+    ap.add_argument("--clusters", default=None,
+                    help="also add the findings to this near-duplicate cluster index (core.recurrence_cluster)")
+    add_validate_arg(ap)
+    metrics.add_metrics_args(ap)
     args = ap.parse_args()
+    if not args.inp and not args.fold:
+        ap.error("--in is required unless --fold is given")
+    if sum(bool(x) for x in (args.db, args.journal, args.shard is not None)) > 1:
+        ap.error("--db, --journal and --shard are alternative backends: give at most one")
+    if args.stream and (args.db or args.journal or args.shard is not None or args.history or args.clusters
+                        or args.validate):
+        ap.error("--stream only updates the JSON log: drop --db / --journal / --shard / --history / --clusters / --validate")
+    metrics.start_from_args(args)
+
+    def _docs():
+        for n, doc in enumerate(iter_findings_docs(args.inp), 1):
+            validate("mmar_findings", doc, args.validate, where=f"document {n}")
+            yield doc
+
+    def _feed(docs, sink):
+        for doc in docs:
+            sink(doc)
+            yield doc
 
-    out = update_recurrence(Path(args.inp))
-    print(f"[recurrence] updated items={len(out['items'])} -> {LOG_PATH}")
+    log_path = Path(args.log)
 
+    def _backend(docs):
+        if args.db:
+            n = recurrence_sqlite.update_recurrence_sqlite_docs(docs, Path(args.db))
+            print(f"[recurrence] updated items={n} -> {args.db}")
+        elif args.shard is not None:
+            from core.recurrence_shards import write_shard
+            shard, n = write_shard(docs, log_path, writer=args.shard or None)
+            print(f"[recurrence] sharded records={n} -> {shard}")
+        elif args.journal:
+            n = recurrence_journal.append_findings_docs(docs, log_path)
+            print(f"[recurrence] journaled records={n} -> {recurrence_journal.journal_path(log_path)}")
+        elif args.stream:
+            from core.findings_stream import update_recurrence_stream
+            out, n_docs = update_recurrence_stream(args.inp, log_path, compact=args.compact)
+            print(f"[recurrence] updated docs={n_docs} items={len(out['items'])} -> {log_path} (streamed)")
+        else:
+            out, n_docs = update_recurrence_docs(docs, log_path, compact=args.compact)
+            print(f"[recurrence] updated docs={n_docs} items={len(out['items'])} -> {log_path}")
 
+    if args.inp:
+        # --history / --clusters see each document as the backend reads it: one pass, nothing held
+        docs = _docs()
+        history = idx = None
+        with ExitStack() as sinks:
+            if args.history:
+                from core.recurrence_history import RecurrenceHistory
+                history = RecurrenceHistory(Path(args.history))
+                events = len(history)
+                docs = _feed(docs, sinks.enter_context(history.appending()))
+            if args.clusters:
+                from core.recurrence_cluster import ClusterIndex
+                idx = ClusterIndex(Path(args.clusters))
+                docs = _feed(docs, lambda doc: idx.add_docs([doc]))
+            try:
+                _backend(docs)
+            except (SchemaValidationError, ValueError) as e:
+                sys.exit(str(e))
+        if history is not None:
+            print(f"[recurrence] history events={len(history) - events} -> {args.history}")
+        if idx is not None:
+            idx.save()
+            print(f"[recurrence] clustered fingerprints={len(idx)} -> {args.clusters}")
+    if args.fold:
+        from core.recurrence_shards import compact_shards
+        out, n_shards = compact_shards(log_path)
+        print(f"[recurrence] compacted items={len(out['items'])} shards={n_shards} -> {log_path}")
+    metrics.finish_from_args(args, "recurrence_update")
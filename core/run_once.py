@@ -1,109 +1,244 @@
 import argparse
 import json
 import sys
+from functools import partial
 from pathlib import Path
-from datetime import datetime, timedelta, timezone
-
-p = argparse.ArgumentParser()
-p.add_argument("--asof", required=True)
-p.add_argument("--delta", required=True)
-p.add_argument("--out", required=True)
-args = p.parse_args()
-
-asof = json.loads(Path(args.asof).read_text(encoding="utf-8"))
-delta = json.loads(Path(args.delta).read_text(encoding="utf-8"))
-
-# --- Determine severity (minimal contract) ---
-severity = delta.get("severity", "PASS")
-if severity not in ("PASS", "DELAY", "BLOCK"):
-    severity = "BLOCK"
-
-# --- Diagnostics ---
-reason_codes = []
-evidence_paths = []
-suggested_fix = []
-
-raw_sev = delta.get("severity", "PASS")
-if raw_sev not in ("PASS", "DELAY", "BLOCK"):
-    reason_codes.append("INVALID_SEVERITY_COERCED_TO_BLOCK")
-    evidence_paths.append("delta.severity")
-    suggested_fix.append("Set `delta.severity` to PASS/DELAY/BLOCK.")
-
-# Rule 0: explicit block flag overrides everything
-if delta.get("block") is True:
-    severity = "BLOCK"
-    d_rc = delta.get("reason_codes", []) or []
-    is_mmar = any(isinstance(x, str) and x.startswith("MMAR:") for x in d_rc)
-    reason_codes.append("MMAR_EXPLICIT_BLOCK" if is_mmar else "MANUAL_BLOCK_FLAG")
-    evidence_paths.append("delta.block")
-    suggested_fix.append("Remove `delta.block=true` or replace with `severity=DELAY` and provide evidence.")
-
-# Carry through evidence list (dedupe, preserve order)
-evidence_list = list(dict.fromkeys(delta.get("evidence", [])))
-
-# --- AUTO rule (the upgrade) ---
-# If no evidence, we don't trust the change.
-# - high externality x high irreversibility -> BLOCK
-# - otherwise -> DELAY (until +48h below)
-impact = delta.get("impact", {})
-if not isinstance(impact, dict):
-    impact = {}
-externality = str(impact.get("externality", "")).lower().strip()
-irreversibility = str(impact.get("irreversibility", "")).lower().strip()
-
-if severity != "BLOCK" and not evidence_list:
-    if externality == "high" and irreversibility == "high":
-        severity = "BLOCK"
-        reason_codes.append("AUTO_BLOCK_HIGH_X_HIGH_NO_EVIDENCE")
-        evidence_paths += ["delta.impact.externality", "delta.impact.irreversibility", "delta.evidence"]
-        suggested_fix.append("Add evidence or reduce externality/irreversibility; otherwise keep BLOCK.")
+from datetime import datetime, timezone
+
+from core import metrics
+from core.gate_rules import DEFAULT_PLAN, GatePlan
+from core.jsonio import dumps_pretty, load_json, loads, save_json
+from core.parallel import ordered_map
+from core.schemas import SchemaValidationError, add_validate_arg, validate
+
+def evaluate_gate(asof: dict, delta: dict, now: datetime = None, plan: GatePlan = None,
+                  recurrence: dict = None) -> dict:
+    """
+    Pure gate evaluation: As-of pack + Δ -> decision_gate (dict).
+    The rules live in core/gate_rules.py (RULES, compiled into DEFAULT_PLAN).
+    The only time-dependent output is the 48h `until` default; pass `now`
+    (aware datetime) to make it deterministic.
+    recurrence (opt-in): {(type, tag): count} from the recurrence history as of
+    the pack's asof; adds informational RECURRENCE_AS_OF:* codes, severity unchanged.
+    """
+    if metrics.enabled:
+        with metrics.stage("gate_rules"):
+            st = (plan or DEFAULT_PLAN).run(delta, now)
     else:
-        severity = "DELAY"
-        reason_codes.append("AUTO_DELAY_NO_EVIDENCE")
-        reason_codes.append("MMAR_DELAY_EVIDENCE_GAP")
-        evidence_paths.append("delta.evidence")
-        suggested_fix.append("Add at least one item to `delta.evidence` to move from DELAY to PASS/BLOCK.")
-
-# --- DELAY operationalization (48h default) ---
-until = delta.get("until", None)
-recheck = []
-next_action = None
-
-if severity == "DELAY":
-    if until is None:
-        now_local = datetime.now(timezone.utc).astimezone()
-        until_dt = now_local + timedelta(hours=48)
-        until = until_dt.isoformat(timespec="seconds")
-        reason_codes.append("AUTO_DELAY_UNTIL_SET_48H")
-        evidence_paths.append("delta.until")
-        suggested_fix.append("Provide a concrete `delta.until` if 48h is not appropriate.")
-
-    recheck = [
-        "Add evidence (links / hashes / screenshots) to `delta.evidence`",
-        "Reconfirm irreversibility/externality assumptions under As-of constraints",
-        "Re-run the gate after `until`",
-    ]
-    next_action = "RERUN_AFTER_UNTIL"
-
-upstream_reason_codes = [x for x in reason_codes if isinstance(x, str) and (x.startswith("MMAR_") or x.startswith("MMAR:"))]
-
-decision_gate = {
-    "severity": severity,
-    "until": until,
-    "evidence": evidence_list,
-    "reason_codes": list(dict.fromkeys(reason_codes)),
-    "upstream_reason_codes": upstream_reason_codes,
-    "evidence_paths": list(dict.fromkeys(evidence_paths)),
-    "suggested_fix": list(dict.fromkeys(suggested_fix)),
-    "recheck": recheck,
-    "next_action": next_action,
-}
-
-outp = Path(args.out)
-outp.parent.mkdir(parents=True, exist_ok=True)
-outp.write_text(
-    json.dumps(decision_gate, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
-    encoding="utf-8",
-)
-
-sys.exit(0)
+        st = (plan or DEFAULT_PLAN).run(delta, now)
+    if recurrence is not None:
+        from core.recurrence_history import recurrence_reason_codes
+        codes = recurrence_reason_codes(delta, recurrence)
+        if codes:
+            st.reason_codes += codes
+            st.evidence_paths.append("history.as_of")
+
+    upstream_reason_codes = [x for x in st.reason_codes if isinstance(x, str) and (x.startswith("MMAR_") or x.startswith("MMAR:"))]
+
+    return {
+        "severity": st.severity,
+        "until": st.until,
+        "evidence": st.evidence,
+        "reason_codes": list(dict.fromkeys(st.reason_codes)),
+        "upstream_reason_codes": upstream_reason_codes,
+        "evidence_paths": list(dict.fromkeys(st.evidence_paths)),
+        "suggested_fix": list(dict.fromkeys(st.suggested_fix)),
+        "recheck": st.recheck,
+        "next_action": st.next_action,
+    }
+
+
+def render_gate(decision_gate: dict) -> str:
+    """decision_gate.json file content (pretty, sorted keys, trailing newline)."""
+    return dumps_pretty(decision_gate, sort_keys=True) + "\n"
+
+
+def _write_gate(path: Path, decision_gate: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(render_gate(decision_gate), encoding="utf-8")
+
+
+def iter_batch(path: Path):
+    """
+    Yield (name, delta) pairs from a batch input:
+      - directory: every *.json file (sorted by name), name = file name
+      - *.jsonl file: one delta per non-empty line, name = 000001.json, ...
+    """
+    if path.is_dir():
+        for f in sorted(path.glob("*.json")):
+            yield f.name, load_json(f, {})
+        return
+
+    with path.open("r", encoding="utf-8") as fh:
+        n = 0
+        for line in fh:
+            if not line.strip():
+                continue
+            n += 1
+            yield f"{n:06d}.json", loads(line)
+
+
+def _gate_named(asof: dict, now, recurrence, item: tuple) -> tuple:
+    """-> (name, cache key, gate, hit); hit = the gate came from the cache."""
+    name, key, delta, gate = item
+    if gate is not None:
+        return name, key, gate, True
+    return name, key, evaluate_gate(asof, delta, now=now, recurrence=recurrence), False
+
+
+def _with_cache(items, cache, asof: dict, now, validate_mode=None):
+    """(name, delta) -> (name, key, delta, cached gate or None); hits skip the pool."""
+    asof_digest = cache.asof_digest(asof) if cache is not None else None
+    for name, delta in items:
+        validate("delta_entry", delta, validate_mode, where=name)
+        if cache is None:
+            yield name, None, delta, None
+            continue
+        key = cache.key(asof_digest, delta)
+        gate = cache.get(key, now=now)
+        yield name, key, (None if gate is not None else delta), gate
+
+
+def run_batch(asof: dict, batch: Path, out: Path, workers: int = 1, chunksize: int = 64,
+              cache=None, now: datetime = None, validate_mode: str = None, recurrence: dict = None) -> int:
+    """
+    Gate every delta in `batch` against one As-of pack.
+      - out ending with .jsonl: one compact decision_gate per line (input order)
+      - otherwise: out is a directory; each decision is written byte-identical
+        to the single-file mode, under the input's name
+    workers > 1 fans chunks out to a process pool; output order and bytes are
+    the same as the serial run.
+    cache (core.gate_cache.GateCache): hits are looked up before dispatch,
+    misses are stored after evaluation.
+    validate_mode ("fast" / "full"): schema-check every delta and decision (in this process).
+    recurrence: see evaluate_gate (not combined with the cache).
+    """
+    items = _with_cache(iter_batch(batch), cache, asof, now, validate_mode)
+    results = ordered_map(partial(_gate_named, asof, now, recurrence), items, workers=workers, chunksize=chunksize)
+
+    def _emit():
+        for name, key, gate, hit in results:
+            validate("decision_gate", gate, validate_mode, where=name)
+            metrics.observe_gate(gate)
+            if cache is not None and not hit:  # a hit was already moved to the LRU end by get()
+                cache.put(key, gate)
+            yield name, gate
+
+    n = 0
+    if out.suffix == ".jsonl":
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8") as fh:
+            for _, gate in _emit():
+                fh.write(json.dumps(gate, ensure_ascii=False, sort_keys=True) + "\n")
+                n += 1
+        return n
+
+    for name, gate in _emit():
+        _write_gate(out / name, gate)
+        n += 1
+    return n
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser()
+    p.add_argument("--asof", required=True)
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--delta", nargs="+",
+                     help="delta_entry.json path(s); several deltas for one case are PIC-merged first")
+    src.add_argument("--batch", help="directory of delta *.json files, or a .jsonl of deltas")
+    p.add_argument("--out", required=True, help="decision_gate.json (single) / output dir or .jsonl (batch)")
+    p.add_argument("--workers", type=int, default=1, help="batch only: process pool size (1 = serial)")
+    p.add_argument("--chunksize", type=int, default=64, help="batch only: deltas per dispatched task")
+    p.add_argument("--cache", default=None, help="batch only: decision cache file (content-addressed, LRU)")
+    p.add_argument("--cache-size", type=int, default=100000, help="max cached decisions")
+    p.add_argument("--now", default=None,
+                   help="ISO timestamp used as the clock for the 48h `until` default (default: wall clock)")
+    p.add_argument("--history", default=None,
+                   help="recurrence history dir (core.recurrence_history): flag changes that recur as of the pack's asof")
+    p.add_argument("--rule-stats", default=None,
+                   help="write per-rule checked/hit counts and time (JSON) for this run (in-process rules only)")
+    add_validate_arg(p)
+    metrics.add_metrics_args(p)
+    args = p.parse_args(argv)
+    if args.rule_stats and args.workers > 1:
+        p.error("--rule-stats counts rules evaluated in this process; use --workers 1")
+    if args.history and args.cache:
+        p.error("--history adds as-of history to the decision; it cannot be combined with --cache")
+    metrics.start_from_args(args)
+    try:
+        return _run(args)
+    except SchemaValidationError as e:
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        metrics.finish_from_args(args, "run_once")
+
+
+def _run(args) -> int:
+    asof = loads(Path(args.asof).read_bytes())
+    validate("asof_pack", asof, args.validate, where=args.asof)
+    now = datetime.fromisoformat(args.now) if args.now else None
+    if now is not None and now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    if args.rule_stats:
+        DEFAULT_PLAN.timing = True
+        DEFAULT_PLAN.reset_stats()
+    try:
+        return _run_gate(args, asof, now)
+    finally:
+        if args.rule_stats:
+            stats = DEFAULT_PLAN.stats()
+            save_json(Path(args.rule_stats), stats)
+            fired = " ".join(f"{r['rule']}={r['hits']}" for r in stats["rules"] if r["hits"])
+            print(f"[gate] rules evaluations={stats['evaluations']} {fired} -> {args.rule_stats}")
+
+
+def _recurrence_as_of(args, asof: dict):
+    if not args.history:
+        return None
+    from core.recurrence_history import RecurrenceHistory, type_tag_counts
+    try:
+        return type_tag_counts(RecurrenceHistory(Path(args.history)).as_of(asof.get("asof")))
+    except ValueError as e:
+        sys.exit(f"[gate] --history: {e}")
+
+
+def _run_gate(args, asof: dict, now) -> int:
+    recurrence = _recurrence_as_of(args, asof)
+
+    if args.batch:
+        cache = None
+        if args.cache:
+            from core.gate_cache import GateCache
+            cache = GateCache(Path(args.cache), max_entries=args.cache_size)
+        n = run_batch(asof, Path(args.batch), Path(args.out), workers=args.workers, chunksize=args.chunksize,
+                      cache=cache, now=now, validate_mode=args.validate, recurrence=recurrence)
+        if cache is not None:
+            cache.save()
+            metrics.count("gate_cache", cache.hits, result="hit")
+            metrics.count("gate_cache", cache.misses, result="miss")
+            print(f"[gate] cache hits={cache.hits} misses={cache.misses} entries={len(cache)}")
+        print(f"[gate] batch decisions={n} -> {args.out}")
+        return 0
+
+    deltas = []
+    for p in args.delta:
+        deltas.append(loads(Path(p).read_bytes()))
+        validate("delta_entry", deltas[-1], args.validate, where=p)
+    if len(deltas) > 1:
+        from core.pic_merge import merge_deltas
+        try:
+            delta = merge_deltas(deltas)
+        except ValueError as e:
+            sys.exit(f"[gate] {e}")
+    else:
+        delta = deltas[0]
+    gate = evaluate_gate(asof, delta, now=now, recurrence=recurrence)
+    metrics.observe_gate(gate)
+    validate("decision_gate", gate, args.validate, where=args.out)
+    _write_gate(Path(args.out), gate)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SCHEMA_FILES = {
+    "asof_pack": "asof_pack.schema.json",
+    "delta_entry": "delta_entry.schema.json",
+    "decision_gate": "decision_gate.schema.json",
+    "intervene": "intervene.schema.json",
+    "mmar_findings": "mmar_findings.schema.json",
+}
+
+# --validate            -> "full" (jsonschema, compiled once per process)
+# --validate fast       -> dependency-free checks of the hot required fields
+VALIDATE_MODES = ("fast", "full")
+
+SEVERITIES = ("PASS", "DELAY", "BLOCK")
+FINDING_TYPES = ("DISAGREEMENT", "MISSING_EVIDENCE", "STRUCTURAL_ANOMALY", "NOVEL_STRUCTURE")
+ACTIONS = ("NONE", "SUBTRACT", "ADD_MODEL")
+
+
+class SchemaValidationError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def load_schema(name: str) -> dict:
+    return json.loads((ROOT / SCHEMA_FILES[name]).read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=None)
+def compiled_validator(name: str):
+    """jsonschema validator for `name`, built (and schema-checked) once per process."""
+    try:
+        from jsonschema.validators import validator_for
+    except ImportError:
+        raise SchemaValidationError(
+            "jsonschema is not installed (python -m pip install jsonschema), or use --validate fast"
+        ) from None
+    schema = load_schema(name)
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+# --- fast path: hot required fields only, no dependencies ---
+
+def _is_str_list(x) -> bool:
+    return isinstance(x, list) and all(isinstance(v, str) for v in x)
+
+
+def _check_mmar_findings(doc: dict) -> list[str]:
+    errs = []
+    extra = set(doc) - {"case_id", "asof", "meta", "findings"}
+    if extra:
+        errs.append(f"unexpected keys {sorted(extra)}")
+    for k in ("case_id", "asof"):
+        if not isinstance(doc.get(k), str) or not doc.get(k):
+            errs.append(f"{k}: required non-empty string")
+    if "meta" in doc and not isinstance(doc["meta"], dict):
+        errs.append("meta: must be an object")
+    findings = doc.get("findings")
+    if not isinstance(findings, list):
+        return errs + ["findings: required array"]
+    for i, f in enumerate(findings):
+        if not isinstance(f, dict):
+            errs.append(f"findings[{i}]: must be an object")
+            continue
+        extra = set(f) - {"type", "tag", "claim", "needs", "delta", "signals"}
+        if extra:
+            errs.append(f"findings[{i}]: unexpected keys {sorted(extra)}")
+        if f.get("type") not in FINDING_TYPES:
+            errs.append(f"findings[{i}].type: must be one of {list(FINDING_TYPES)}")
+        if not isinstance(f.get("claim"), str) or not f.get("claim"):
+            errs.append(f"findings[{i}].claim: required non-empty string")
+        if f.get("tag") is not None and not isinstance(f["tag"], str):
+            errs.append(f"findings[{i}].tag: must be string or null")
+        needs = f.get("needs")
+        if needs is not None and not (_is_str_list(needs) and all(needs)):
+            errs.append(f"findings[{i}].needs: must be array of non-empty strings or null")
+        for k in ("delta", "signals"):
+            if f.get(k) is not None and not isinstance(f[k], dict):
+                errs.append(f"findings[{i}].{k}: must be object or null")
+    return errs
+
+
+def _check_delta_fields(doc: dict) -> list[str]:
+    errs = []
+    if "delta_id" in doc and not isinstance(doc["delta_id"], str):
+        errs.append("delta_id: must be string")
+    if "severity" in doc and doc["severity"] not in SEVERITIES:
+        errs.append(f"severity: must be one of {list(SEVERITIES)}")
+    if "until" in doc and doc["until"] is not None and not isinstance(doc["until"], str):
+        errs.append("until: must be string or null")
+    if "block" in doc and not isinstance(doc["block"], bool):
+        errs.append("block: must be boolean")
+    if "evidence" in doc and not _is_str_list(doc["evidence"]):
+        errs.append("evidence: must be array of strings")
+    return errs
+
+
+def _check_delta_entry(doc: dict) -> list[str]:
+    errs = [f"{k}: required" for k in ("delta_id", "severity", "until", "block", "evidence", "changes") if k not in doc]
+    if "changes" in doc and not isinstance(doc["changes"], list):
+        errs.append("changes: must be array")
+    return errs + _check_delta_fields(doc)
+
+
+def _check_asof_pack(doc: dict) -> list[str]:
+    errs = _check_delta_fields(doc)
+    for k in ("summary", "request"):
+        if k in doc and not isinstance(doc[k], str):
+            errs.append(f"{k}: must be string")
+    if "impact" in doc:
+        impact = doc["impact"]
+        if not isinstance(impact, dict):
+            errs.append("impact: must be object")
+        else:
+            for k, v in impact.items():
+                if k not in ("externality", "irreversibility") or v not in ("low", "medium", "high"):
+                    errs.append(f"impact.{k}: invalid")
+    return errs
+
+
+def _check_decision_gate(doc: dict) -> list[str]:
+    errs = [f"{k}: required" for k in ("severity", "until", "evidence") if k not in doc]
+    allowed = {"severity", "until", "evidence", "reason_codes", "upstream_reason_codes",
+               "evidence_paths", "suggested_fix", "recheck", "next_action"}
+    extra = set(doc) - allowed
+    if extra:
+        errs.append(f"unexpected keys {sorted(extra)}")
+    if "severity" in doc and doc["severity"] not in SEVERITIES:
+        errs.append(f"severity: must be one of {list(SEVERITIES)}")
+    if doc.get("until") is not None and not isinstance(doc["until"], str):
+        errs.append("until: must be string or null")
+    for k in ("evidence", "reason_codes", "upstream_reason_codes", "evidence_paths", "suggested_fix", "recheck"):
+        if k in doc and not _is_str_list(doc[k]):
+            errs.append(f"{k}: must be array of strings")
+    if doc.get("next_action") is not None and not isinstance(doc["next_action"], str):
+        errs.append("next_action: must be string or null")
+    return errs
+
+
+def _check_intervene(doc: dict) -> list[str]:
+    errs = [f"{k}: required" for k in ("action", "stagnation", "reason", "ev_continue", "ev_intervene", "profile")
+            if k not in doc]
+    if "action" in doc and doc["action"] not in ACTIONS:
+        errs.append(f"action: must be one of {list(ACTIONS)}")
+    if "stagnation" in doc and not isinstance(doc["stagnation"], bool):
+        errs.append("stagnation: must be boolean")
+    if "reason" in doc and not _is_str_list(doc["reason"]):
+        errs.append("reason: must be array of strings")
+    for k in ("ev_continue", "ev_intervene"):
+        if k in doc and (isinstance(doc[k], bool) or not isinstance(doc[k], (int, float))):
+            errs.append(f"{k}: must be number")
+    if "profile" in doc and not isinstance(doc["profile"], dict):
+        errs.append("profile: must be object")
+    return errs
+
+
+FAST_CHECKS = {
+    "asof_pack": _check_asof_pack,
+    "delta_entry": _check_delta_entry,
+    "decision_gate": _check_decision_gate,
+    "intervene": _check_intervene,
+    "mmar_findings": _check_mmar_findings,
+}
+
+
+def fast_check(name: str, doc) -> list[str]:
+    if not isinstance(doc, dict):
+        return ["document must be an object"]
+    return FAST_CHECKS[name](doc)
+
+
+def validate(name: str, doc, mode: str = "full", where: str = ""):
+    """Raise SchemaValidationError if `doc` does not satisfy schema `name`. mode None/"" = no-op."""
+    if not mode:
+        return
+    if mode == "fast":
+        errs = fast_check(name, doc)
+    else:
+        v = compiled_validator(name)
+        errs = [f"{'/'.join(str(p) for p in e.absolute_path) or '<root>'}: {e.message}" for e in v.iter_errors(doc)]
+    if errs:
+        at = f" ({where})" if where else ""
+        raise SchemaValidationError(f"[validate] {name}{at}: " + "; ".join(errs[:5]))
+
+
+def add_validate_arg(ap):
+    ap.add_argument("--validate", nargs="?", const="full", default=None, choices=VALIDATE_MODES,
+                    help="schema-check inputs/outputs: full (jsonschema, compiled once) or fast (no deps)")
@@ -0,0 +1,344 @@
+import math
+import sys
+from collections import deque
+from pathlib import Path
+from datetime import datetime
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.jsonio import load_json, save_json
+from core.recurrence_update import ROOT
+
+STATE_PATH = ROOT / ".mmar" / "stagnation.json"
+STATE_VERSION = "stagnation-v1"
+
+WINDOW_S = 86400.0     # one window = one day (docs/vision_stagnation_intervene.md: "per window (session/day)")
+BUCKETS = 24           # window resolution: 1h buckets
+REPEAT_MIN = 2         # same (type, tag) seen this often in the window = "repeating"
+HORIZON_DAYS = 30.0    # deadlines at or beyond this use the full window
+MAX_EVIDENCE = 500     # evidence items remembered per case (to tell new evidence from old)
+GAP_CODES = ("MMAR_DELAY_EVIDENCE_GAP", "AUTO_DELAY_NO_EVIDENCE")
+
+
+def _ts(at, default: float = None) -> float:
+    """
+    Event time -> POSIX seconds: number, datetime or ISO string (naive = UTC).
+    None / unparseable labels give `default` (the detector passes its latest
+    event time), never the wall clock; with no default they raise ValueError.
+    """
+    if isinstance(at, (int, float)):
+        return float(at)
+    if isinstance(at, datetime):
+        at = at.isoformat()
+    if at is not None:
+        from core.recurrence_history import asof_key
+        ts = asof_key(at)
+        if ts is not None:
+            return ts
+    if default is None:
+        raise ValueError(f"no event time: {at!r} is not a timestamp and nothing has been observed yet")
+    return default
+
+
+class WindowCounter:
+    """
+    Sliding-window count over fixed time buckets (deque of [bucket, n] + running total).
+    add() is amortized O(1); sum_since() touches at most `buckets` entries.
+    """
+    __slots__ = ("q", "total")
+
+    def __init__(self, q=None):
+        self.q = deque([list(x) for x in q or ()])
+        self.total = sum(n for _, n in self.q)
+
+    def expire(self, lo: int):
+        """Drop buckets older than `lo`."""
+        q = self.q
+        while q and q[0][0] < lo:
+            self.total -= q.popleft()[1]
+
+    def add(self, b: int, n: int, lo: int):
+        self.expire(lo)
+        if b < lo:
+            return
+        q = self.q
+        if q and q[-1][0] == b:
+            q[-1][1] += n
+        elif not q or q[-1][0] < b:
+            q.append([b, n])
+        else:  # late event: find / insert its bucket
+            i = len(q) - 1
+            while i > 0 and q[i - 1][0] >= b:
+                i -= 1
+            if q[i][0] == b:
+                q[i][1] += n
+            else:
+                q.insert(i, [b, n])
+        self.total += n
+
+    def sum_since(self, lo: int) -> int:
+        s = 0
+        for b, n in reversed(self.q):
+            if b < lo:
+                break
+            s += n
+        return s
+
+
+class CaseState:
+    __slots__ = ("first_seen", "last_progress", "open_needs", "gap", "severity", "evidence", "resolved", "repeats")
+
+    def __init__(self, ts: float):
+        self.first_seen = ts
+        self.last_progress = ts
+        self.open_needs = set()
+        self.gap = False
+        self.severity = None
+        self.evidence = {}          # insertion-ordered set, capped at MAX_EVIDENCE
+        self.resolved = WindowCounter()
+        self.repeats = {}           # (type, tag) -> WindowCounter
+
+
+class StagnationDetector:
+    """
+    Incremental stagnation per case (docs/vision_stagnation_intervene.md):
+
+      stagnant  <=>  no progress for a whole window
+                     (resolved_count == 0 and no new evidence)
+                AND  some finding (type, tag) repeats >= REPEAT_MIN times in that window
+
+    Progress events:
+      - an evidence gap closes: a MISSING_EVIDENCE `needs` entry drops out of
+        the case's latest findings, or a gate loses its evidence-gap codes
+      - severity improves (BLOCK/DELAY -> PASS)
+      - a gate carries evidence not seen before for the case
+    A deadline compresses the window (deadline_days / HORIZON_DAYS of it, at
+    least one bucket), so cases near their date are flagged sooner.
+
+    Each event updates per-(case, type/tag) bucket counters in amortized O(1);
+    history is never rescanned. Event times come from the documents (asof /
+    `at`); an event or query without a usable time takes the latest event
+    time seen, so replaying a stream gives the same state whenever it runs.
+    """
+
+    def __init__(self, path: Path = STATE_PATH, window_s: float = WINDOW_S, buckets: int = BUCKETS,
+                 repeat_min: int = REPEAT_MIN):
+        self.path = Path(path) if path else None
+        self.params = {"window_s": float(window_s), "buckets": int(buckets), "repeat_min": int(repeat_min)}
+        self.window_s = float(window_s)
+        self.buckets = int(buckets)
+        self.bucket_s = self.window_s / self.buckets
+        self.repeat_min = int(repeat_min)
+        self.cases = {}
+        self.last_ts = None  # latest event time observed
+        doc = load_json(self.path, {}) if self.path else {}
+        if doc.get("version") == STATE_VERSION and doc.get("params") == self.params:
+            self.last_ts = doc.get("last_ts")
+            for cid, c in doc.get("cases", {}).items():
+                self.cases[cid] = self._case_from_json(c)
+
+    def __len__(self):
+        return len(self.cases)
+
+    def _event_ts(self, at) -> float:
+        ts = _ts(at, self.last_ts)
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+        return ts
+
+    def _bucket(self, ts: float) -> int:
+        return math.floor(ts / self.bucket_s)
+
+    def _lo(self, ts: float) -> int:
+        """Oldest bucket still inside the full window ending at ts."""
+        return self._bucket(ts) - self.buckets + 1
+
+    def _case(self, case_id, ts: float) -> CaseState:
+        c = self.cases.get(case_id)
+        if c is None:
+            c = self.cases[case_id] = CaseState(ts)
+        return c
+
+    def _progress(self, c: CaseState, ts: float, resolved: int = 0):
+        if resolved:
+            c.resolved.add(self._bucket(ts), resolved, self._lo(ts))
+        c.last_progress = max(c.last_progress, ts)
+
+    # --- events ---
+
+    def observe_findings(self, case_id, findings, at=None) -> int:
+        """
+        One findings snapshot of a case (mmar_findings `findings`, or delta `changes`).
+        Counts (type, tag) repeats; needs that are no longer listed count as resolved.
+        Returns the number of evidence gaps resolved.
+        """
+        ts = self._event_ts(at)
+        c = self._case(str(case_id), ts)
+        b, lo = self._bucket(ts), self._lo(ts)
+        needs = set()
+        for f in findings or []:
+            if not isinstance(f, dict):
+                continue
+            key = (f.get("type"), f.get("tag"))
+            ctr = c.repeats.get(key)
+            if ctr is None:
+                ctr = c.repeats[key] = WindowCounter()
+            ctr.add(b, 1, lo)
+            if f.get("type") == "MISSING_EVIDENCE":
+                needs.update(n.strip() for n in f.get("needs") or [] if isinstance(n, str) and n.strip())
+        closed = len(c.open_needs - needs)
+        c.open_needs = needs
+        if closed:
+            self._progress(c, ts, closed)
+        return closed
+
+    def observe_doc(self, doc: dict, at=None) -> int:
+        """observe_findings for one mmar_findings document (event time: `at`, else its asof)."""
+        return self.observe_findings(doc.get("case_id", "unknown"), doc.get("findings", []),
+                                     at if at is not None else doc.get("asof"))
+
+    def observe_gate(self, case_id, gate: dict, at=None) -> int:
+        """One decision_gate of a case. Returns the resolved count it added (gap closed / severity improved)."""
+        ts = self._event_ts(at)
+        c = self._case(str(case_id), ts)
+        codes = set(gate.get("reason_codes") or []) | set(gate.get("upstream_reason_codes") or [])
+        gap = any(x in codes for x in GAP_CODES)
+        sev = gate.get("severity")
+        resolved = int(c.gap and not gap) + int(c.severity in ("DELAY", "BLOCK") and sev == "PASS")
+        c.gap, c.severity = gap, sev
+
+        new_evidence = False
+        for e in gate.get("evidence") or []:
+            k = str(e)
+            if k not in c.evidence:
+                c.evidence[k] = None
+                new_evidence = True
+        while len(c.evidence) > MAX_EVIDENCE:
+            del c.evidence[next(iter(c.evidence))]
+
+        if resolved or new_evidence:
+            self._progress(c, ts, resolved)
+        return resolved
+
+    # --- queries ---
+
+    def window_for(self, deadline_days=None) -> float:
+        """Effective window: compressed linearly as the deadline nears, never below one bucket."""
+        if deadline_days is None:
+            return self.window_s
+        ratio = min(1.0, max(0.0, float(deadline_days)) / HORIZON_DAYS)
+        return max(self.bucket_s, self.window_s * ratio)
+
+    def status(self, case_id, now=None, deadline_days=None) -> dict:
+        """Stagnation of one case at `now` (default: the latest event time)."""
+        w = self.window_for(deadline_days)
+        c = self.cases.get(str(case_id))
+        if c is None:
+            return {"stagnant": False, "window_s": w, "resolved_count": 0, "repeating": [], "since_progress_s": 0.0}
+        ts = _ts(now, self.last_ts)
+        lo = self._bucket(ts) - max(1, math.ceil(w / self.bucket_s - 1e-9)) + 1
+        repeating = []
+        for (t, tag), ctr in c.repeats.items():
+            n = ctr.sum_since(lo)
+            if n >= self.repeat_min:
+                repeating.append({"type": t, "tag": tag, "count": n})
+        repeating.sort(key=lambda x: (-x["count"], str(x["type"]), str(x["tag"])))
+        resolved = c.resolved.sum_since(lo)
+        quiet = ts - c.last_progress
+        return {
+            "stagnant": quiet >= w and resolved == 0 and bool(repeating),
+            "window_s": w,
+            "resolved_count": resolved,
+            "repeating": repeating,
+            "since_progress_s": quiet,
+        }
+
+    def stagnant_cases(self, now=None, deadline_days=None) -> list:
+        if not self.cases:
+            return []
+        ts = _ts(now, self.last_ts)
+        return [cid for cid in sorted(self.cases) if self.status(cid, ts, deadline_days)["stagnant"]]
+
+    def prune(self, now=None) -> int:
+        """Forget cases with nothing left in the window and no open gaps. Returns cases dropped."""
+        if not self.cases:
+            return 0
+        ts = _ts(now, self.last_ts)
+        lo = self._lo(ts)
+        drop = []
+        for cid, c in self.cases.items():
+            c.resolved.expire(lo)
+            for key, ctr in list(c.repeats.items()):
+                ctr.expire(lo)
+                if not ctr.total:
+                    del c.repeats[key]
+            if not c.repeats and not c.resolved.total and not c.open_needs and not c.gap:
+                drop.append(cid)
+        for cid in drop:
+            del self.cases[cid]
+        return len(drop)
+
+    # --- persistence ---
+
+    @staticmethod
+    def _case_from_json(j: dict) -> CaseState:
+        c = CaseState(j["first_seen"])
+        c.last_progress = j["last_progress"]
+        c.open_needs = set(j.get("open_needs", []))
+        c.gap = bool(j.get("gap"))
+        c.severity = j.get("severity")
+        c.evidence = dict.fromkeys(j.get("evidence", []))
+        c.resolved = WindowCounter(j.get("resolved"))
+        c.repeats = {(t, tag): WindowCounter(q) for t, tag, q in j.get("repeats", [])}
+        return c
+
+    def save(self):
+        if not self.path:
+            return
+        cases = {
+            cid: {
+                "first_seen": c.first_seen,
+                "last_progress": c.last_progress,
+                "open_needs": sorted(c.open_needs),
+                "gap": c.gap,
+                "severity": c.severity,
+                "evidence": list(c.evidence),
+                "resolved": [list(x) for x in c.resolved.q],
+                "repeats": [[t, tag, [list(x) for x in ctr.q]] for (t, tag), ctr in c.repeats.items()],
+            }
+            for cid, c in self.cases.items()
+        }
+        save_json(self.path, {"version": STATE_VERSION, "params": self.params, "last_ts": self.last_ts, "cases": cases},
+                  compact=True, atomic=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from core.recurrence_update import iter_findings_docs
+
+    ap = argparse.ArgumentParser(description="incremental stagnation detector (sliding-window counters per case)")
+    ap.add_argument("--state", default=str(STATE_PATH), help="detector state path")
+    ap.add_argument("--in", dest="inp", nargs="+", default=None, help="mmar_findings files, directories, globs or .jsonl")
+    ap.add_argument("--now", default=None, help="ISO time of the status check (default: the latest event time)")
+    ap.add_argument("--deadline-days", type=float, default=None, help="compress the window for this deadline")
+    ap.add_argument("--window-hours", type=float, default=WINDOW_S / 3600)
+    ap.add_argument("--prune", action="store_true", help="forget cases with nothing left in the window")
+    ap.add_argument("--out", default=None, help="write {case_id: status} of the stagnant cases (JSON)")
+    args = ap.parse_args()
+
+    det = StagnationDetector(Path(args.state), window_s=args.window_hours * 3600)
+    n = 0
+    try:
+        for doc in iter_findings_docs(args.inp or []):
+            det.observe_doc(doc)
+            n += 1
+        if args.prune:
+            det.prune(args.now)
+    except ValueError as e:
+        sys.exit(f"[stagnation] {e}")
+    det.save()
+    stagnant = {cid: det.status(cid, args.now, args.deadline_days) for cid in det.stagnant_cases(args.now, args.deadline_days)}
+    if args.out:
+        save_json(Path(args.out), stagnant)
+    print(f"[stagnation] docs={n} cases={len(det)} stagnant={len(stagnant)} -> {args.state}")
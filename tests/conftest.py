@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the modules are run as scripts or via `python -m`; make `core` / `tools` / `bench` importable under plain pytest
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,52 @@
+import pytest
+
+from bench.bench_scale import compare
+from bench.workload import _finding, findings_docs, make_spec
+from core.recurrence_update import _fingerprint_finding
+
+ENV = {"python": "3.11.4", "orjson": False, "numpy": True, "isolated": True}
+
+
+def _report(fps, p99, env=ENV, spec=None):
+    stage = {"findings_per_sec": fps, "latency_ms": {"p99": p99}, "peak_rss_mb": 50.0}
+    return {"env": env, "runs": [{"findings": 1000, "spec": spec or make_spec(findings=1000),
+                                  "stages": {"gate": stage}}]}
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    rows = compare(_report(700.0, 1.0), _report(1000.0, 1.0), tolerance=0.2)
+    assert [(r["metric"], r["regression"]) for r in rows] == [
+        ("findings_per_sec", True), ("p99_ms", False), ("peak_rss_mb", False)]
+    assert not any(r["regression"] for r in compare(_report(900.0, 1.1), _report(1000.0, 1.0)))
+
+
+def test_compare_refuses_other_environments():
+    with pytest.raises(ValueError, match="isolated"):
+        compare(_report(1000.0, 1.0, env={**ENV, "isolated": False}), _report(1000.0, 1.0))
+    with pytest.raises(ValueError, match="orjson"):
+        compare(_report(1000.0, 1.0, env={**ENV, "orjson": True}), _report(1000.0, 1.0))
+    # patch releases are comparable
+    assert compare(_report(1000.0, 1.0, env={**ENV, "python": "3.11.9"}), _report(1000.0, 1.0))
+
+
+def test_compare_skips_other_workloads():
+    other = make_spec(findings=1000, skew=2.0)
+    assert compare(_report(10.0, 9.0, spec=other), _report(1000.0, 1.0)) == []
+
+
+def test_same_claim_is_the_same_finding_for_every_type():
+    spec = make_spec(findings=1000)
+    for t in ("DISAGREEMENT", "MISSING_EVIDENCE", "STRUCTURAL_ANOMALY", "NOVEL_STRUCTURE"):
+        for k in range(500):
+            assert _fingerprint_finding(_finding(t, k, spec)) == _fingerprint_finding(_finding(t, k, spec))
+    fps = {}
+    for doc in findings_docs(make_spec(findings=5000, seed=7)):
+        for f in doc["findings"]:
+            fps.setdefault((f["type"], f["claim"]), set()).add(_fingerprint_finding(f))
+    assert all(len(v) == 1 for v in fps.values())
+
+
+def test_workload_is_seeded():
+    spec = make_spec(findings=2000, seed=1)
+    assert list(findings_docs(spec)) == list(findings_docs(spec))
+    assert list(findings_docs(spec)) != list(findings_docs(make_spec(findings=2000, seed=2)))
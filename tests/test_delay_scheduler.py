@@ -0,0 +1,172 @@
+import json
+import random
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from core import delay_scheduler
+from core.delay_scheduler import DelayScheduler
+from core.run_once import evaluate_gate
+
+ROOT = Path(__file__).resolve().parents[1]
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+ASOF = {}
+
+
+def _workload(n, seed=3):
+    rnd = random.Random(seed)
+    deltas = {}
+    for i in range(n):
+        d = {"severity": rnd.choice(["PASS", "DELAY"]), "evidence": rnd.choice([[], ["e"]])}
+        if rnd.random() < 0.3:
+            d["until"] = (T0 + timedelta(hours=rnd.randint(-5, 100))).isoformat()
+        deltas[f"c{i}"] = d
+    return deltas
+
+
+def test_tick_regates_exactly_the_expired_cases_across_reloads(tmp_path):
+    path = tmp_path / "delay_schedule.json"
+    clock = [T0]
+    deltas = _workload(400)
+    s = DelayScheduler(path, clock=lambda: clock[0])
+    for case_id, d in deltas.items():
+        s.gate_and_submit(ASOF, case_id, d)
+    s.save()
+    for hours in (0, 24, 49, 200):
+        clock[0] = T0 + timedelta(hours=hours)
+        s = DelayScheduler(path, clock=lambda: clock[0])
+        due = sorted(c for c, v in s.cases.items()
+                     if not v["stalled"] and datetime.fromisoformat(v["until"]).timestamp() <= clock[0].timestamp())
+        res = s.run_due(ASOF)
+        assert sorted(c for c, _, _ in res) == due
+        for case_id, gate, status in res:
+            assert gate == evaluate_gate(ASOF, deltas[case_id], now=clock[0])
+            assert status == ("cleared" if gate["severity"] != "DELAY" else "stalled" if s.cases[case_id]["stalled"]
+                              else "scheduled")
+        s.save()
+
+
+def test_state_file_holds_no_deltas_and_tick_rewrites_only_changed_ones(tmp_path):
+    path = tmp_path / "delay_schedule.json"
+    s = DelayScheduler(path, clock=lambda: T0)
+    for i in range(50):
+        s.submit(f"c{i}", {"severity": "DELAY", "evidence": [f"payload-{i}"]},
+                 {"severity": "DELAY", "next_action": "RERUN_AFTER_UNTIL",
+                  "until": (T0 + timedelta(hours=i + 1)).isoformat()})
+    s.save()
+    assert "payload-" not in path.read_text()
+    files = {p.name: p.stat().st_mtime_ns for p in s.delta_dir.iterdir()}
+    assert len(files) == 50
+
+    later = T0 + timedelta(hours=3, minutes=30)
+    s = DelayScheduler(path, clock=lambda: later)
+    res = s.run_due(ASOF, latest_delta=lambda c: {"severity": "PASS", "evidence": ["x"]} if c == "c0" else None)
+    assert [(c, st) for c, _, st in res] == [("c0", "cleared"), ("c1", "scheduled"), ("c2", "scheduled")]
+    s.save()
+    after = {p.name: p.stat().st_mtime_ns for p in s.delta_dir.iterdir()}
+    assert len(after) == 49  # c0 cleared -> its delta is gone
+    assert all(after[name] == files[name] for name in after)  # re-queued with the same delta: not rewritten
+    assert s.stored_delta("c1") == {"severity": "DELAY", "evidence": ["payload-1"]}
+
+
+def test_resubmit_requeues_a_stalled_case(tmp_path):
+    path = tmp_path / "delay_schedule.json"
+    s = DelayScheduler(path, clock=lambda: T0)
+    delay = {"severity": "DELAY", "next_action": "RERUN_AFTER_UNTIL", "until": (T0 - timedelta(hours=1)).isoformat()}
+    s.submit("c", {"severity": "DELAY"}, delay)
+    assert s.pop_due() == ["c"]
+    s.submit("c", {"severity": "DELAY"}, delay)
+    s._enqueue("c", {"severity": "DELAY"}, delay, T0, park_expired=True)
+    assert s.cases["c"]["stalled"] and len(s) == 0
+    s.save()
+    s = DelayScheduler(path, clock=lambda: T0)
+    later = {**delay, "until": (T0 + timedelta(hours=2)).isoformat()}
+    assert s.submit("c", {"severity": "DELAY", "evidence": []}, later) == "scheduled"
+    assert s.peek() == (later["until"], "c")
+
+
+def _delay(i):
+    return {"severity": "DELAY", "next_action": "RERUN_AFTER_UNTIL", "until": (T0 + timedelta(hours=i + 1)).isoformat()}
+
+
+def _state(s):
+    return s.seq, s.cases, s.peek()
+
+
+def test_tick_appends_only_changed_cases(tmp_path, monkeypatch):
+    monkeypatch.setattr(delay_scheduler, "COMPACT_MIN", 0)
+    path = tmp_path / "delay_schedule.json"
+    s = DelayScheduler(path, clock=lambda: T0)
+    for i in range(20):
+        s.submit(f"c{i}", {"severity": "DELAY", "evidence": [f"e{i}"]}, _delay(i))
+    s.save()
+    state = path.read_bytes()
+    assert not s.journal_path.exists()
+
+    for hours in (2, 4):
+        now = T0 + timedelta(hours=hours, minutes=30)
+        s = DelayScheduler(path, clock=lambda: now)
+        s.run_due(ASOF, latest_delta=lambda c: {"severity": "PASS", "evidence": ["x"]} if c == "c0" else None)
+        s.save()
+        assert path.read_bytes() == state  # the state file is not rewritten on a tick
+        expected = _state(s)
+        assert _state(DelayScheduler(path, clock=lambda: now)) == expected
+    # c0 cleared and c1 re-queued, then c2 and c3: one line each, after the header
+    assert len(s.journal_path.read_text(encoding="utf-8").splitlines()) == 1 + 4
+
+    # once the journal outgrows the cases it is folded back into the state file
+    now = T0 + timedelta(hours=30)
+    s = DelayScheduler(path, clock=lambda: now)
+    assert len(s.run_due(ASOF)) == 16
+    s.save()
+    assert not s.journal_path.exists() and path.read_bytes() != state
+    assert _state(DelayScheduler(path, clock=lambda: now)) == _state(s)
+
+
+def test_torn_or_stale_journal_is_recovered(tmp_path):
+    path = tmp_path / "delay_schedule.json"
+    s = DelayScheduler(path, clock=lambda: T0)
+    s.submit("a", {"severity": "DELAY"}, _delay(1))
+    s.save()
+    s.submit("b", {"severity": "DELAY"}, _delay(2))
+    s.save()
+    expected = _state(s)
+    with s.journal_path.open("a", encoding="utf-8") as fh:
+        fh.write('{"seq": 9, "case_id": "c", "ca')  # crash mid-append
+    s = DelayScheduler(path, clock=lambda: T0)
+    assert _state(s) == expected
+    s.submit("c", {"severity": "DELAY"}, _delay(3))
+    s.save()  # starts over from a clean state file
+    assert not s.journal_path.exists()
+    assert set(DelayScheduler(path, clock=lambda: T0).cases) == {"a", "b", "c"}
+
+    # a journal written against an older state file is never replayed
+    s.journal_path.write_text('{"snapshot": "old"}\n{"seq": 99, "case_id": "a", "case": null}\n', encoding="utf-8")
+    s = DelayScheduler(path, clock=lambda: T0)
+    assert set(s.cases) == {"a", "b", "c"} and s.seq == 3
+
+
+def _cli(*args):
+    return subprocess.run([sys.executable, "-m", "core.delay_scheduler", *map(str, args)],
+                          capture_output=True, text=True, cwd=ROOT)
+
+
+def test_cli_file_names_are_sanitized_case_ids(tmp_path):
+    sched, out, deltas = tmp_path / "s.json", tmp_path / "gates", tmp_path / "deltas"
+    src = tmp_path / "d.json"
+    src.write_text(json.dumps({"severity": "DELAY", "evidence": [], "until": "2025-01-01T01:00:00+00:00"}))
+    asof = ROOT / "examples" / "asof_pack.example.json"
+    r = _cli("--schedule", sched, "--now", T0.isoformat(), "submit", "--asof", asof, "--delta", src,
+             "--case-id", "../team a/x", "--out", out)
+    assert r.returncode == 0, r.stderr
+    assert [p.name for p in out.iterdir()] == [".._team_a_x.json"]
+
+    deltas.mkdir()
+    (deltas / ".._team_a_x.json").write_text(json.dumps({"severity": "PASS", "evidence": ["e"]}))
+    r = _cli("--schedule", sched, "--now", "2025-01-01T02:00:00+00:00", "tick", "--asof", asof,
+             "--deltas", deltas, "--out", out)
+    assert r.returncode == 0, r.stderr
+    assert "cleared=1" in r.stdout
+    assert json.loads((out / ".._team_a_x.json").read_text())["severity"] == "PASS"
+    assert not (tmp_path / "team a").exists()
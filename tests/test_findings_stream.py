@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from core import findings_stream
+from core.findings_stream import FindingsReader, stream_findings_file
+from core.findings_to_delta import findings_to_delta
+from core.jsonio import save_json
+from core.recurrence_update import finalize_items, ingest_findings_doc
+
+NOW = "2026-01-01T00:00:00+00:00"
+
+DOC = {
+    "case_id": "c1",
+    "asof": "2026-01-01",
+    "findings": [
+        {"type": "DISAGREEMENT", "claim": "Conflicting outputs: 安全 vs 危険", "delta": {"a": "YES", "b": "NO"}},
+        {"type": "MISSING_EVIDENCE", "tag": "SOURCE", "needs": ["doc:a", " doc:b ", "doc:a"],
+         "signals": {"score": 123456.789e-3, "n": 1234567890123}},
+        {"type": "STRUCTURAL_ANOMALY", "tag": "COORDINATION", "claim": "", "signals": {"w": -0.5}},
+        {"type": "DISAGREEMENT", "claim": "Conflicting outputs: 安全 vs 危険", "delta": {"a": "YES", "b": "NO"}},
+    ],
+    "trailer": 9876543210,
+}
+
+
+def _write(tmp_path, text, name="doc.json"):
+    p = tmp_path / name
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 3, 7, 16, 1 << 16])
+def test_reader_matches_json_loads_at_any_chunk_size(tmp_path, chunk):
+    # pretty and compact layouts put numbers / multibyte characters at different chunk boundaries
+    for indent in (None, 2):
+        p = _write(tmp_path, json.dumps(DOC, ensure_ascii=False, indent=indent))
+        r = FindingsReader(p, chunk=chunk)
+        assert list(r) == DOC["findings"]
+        assert r.header == {k: v for k, v in DOC.items() if k != "findings"}
+
+
+@pytest.mark.parametrize("chunk", [1, 5])
+def test_number_ending_at_chunk_boundary(tmp_path, chunk):
+    text = '{"findings":[12345,6.75e10,-0]}'
+    assert list(FindingsReader(_write(tmp_path, text), chunk=chunk)) == [12345, 6.75e10, 0]
+
+
+def test_delta_is_byte_identical_to_whole_document_path(tmp_path):
+    src = _write(tmp_path, json.dumps(DOC, ensure_ascii=False, indent=2))
+    ref = findings_to_delta(DOC)
+    ref["meta"]["generated_at"] = NOW
+    save_json(tmp_path / "ref.json", ref)
+
+    delta, n = stream_findings_file(src, delta_out=tmp_path / "out.json", now=NOW)
+    assert n == len(DOC["findings"])
+    assert (tmp_path / "out.json").read_bytes() == (tmp_path / "ref.json").read_bytes()
+    assert delta["delta_id"] == ref["delta_id"]
+
+
+def test_empty_findings_delta(tmp_path):
+    doc = {"case_id": "c0", "asof": "2026-01-01", "findings": []}
+    src = _write(tmp_path, json.dumps(doc))
+    ref = findings_to_delta(doc)
+    ref["meta"]["generated_at"] = NOW
+    save_json(tmp_path / "ref.json", ref)
+    stream_findings_file(src, delta_out=tmp_path / "out.json", now=NOW)
+    assert (tmp_path / "out.json").read_bytes() == (tmp_path / "ref.json").read_bytes()
+
+
+def test_recurrence_with_case_id_after_findings(tmp_path):
+    # findings first: observations are held until case_id / asof are known
+    text = json.dumps({"findings": DOC["findings"], "asof": DOC["asof"], "case_id": DOC["case_id"]})
+    src = _write(tmp_path, text)
+
+    ref = {}
+    ingest_findings_doc(ref, DOC, now=NOW)
+    finalize_items(ref["items"])
+    log = {}
+    stream_findings_file(src, log=log, now=NOW)
+    finalize_items(log["items"])
+    assert log == ref
+
+
+def test_keys_after_findings_do_not_buffer_observations(tmp_path, monkeypatch):
+    text = json.dumps({"findings": DOC["findings"], "case_id": DOC["case_id"], "asof": DOC["asof"]})
+    events = []
+    extract, apply = findings_stream._extract_support, findings_stream._apply_finding
+    monkeypatch.setattr(findings_stream, "_extract_support", lambda f: events.append("read") or extract(f))
+    monkeypatch.setattr(findings_stream, "_apply_finding", lambda *a: events.append("apply") or apply(*a))
+    log = {}
+    stream_findings_file(_write(tmp_path, text), log=log, now=NOW)
+    # each observation is applied as soon as its finding is read
+    assert events == ["read", "apply"] * len(DOC["findings"])
+    assert {s["case_id"] for it in log["items"].values() for s in it.sources} == {"c1"}
+
+
+@pytest.mark.parametrize("key", ["findings", "case_id", "asof"])
+def test_duplicate_unique_key_is_rejected(tmp_path, key):
+    text = '{"case_id": "c", "asof": "a", "findings": [], ' + json.dumps(key) + ': []}'
+    with pytest.raises(ValueError, match="duplicate"):
+        list(FindingsReader(_write(tmp_path, text)))
+
+
+def test_other_duplicate_keys_keep_the_last_value(tmp_path):
+    r = FindingsReader(_write(tmp_path, '{"x": 1, "findings": [], "x": 2}'))
+    assert list(r) == []
+    assert r.header == {"x": 2}
+
+
+@pytest.mark.parametrize("text", [
+    '[{"type": "X"}]',
+    '{"findings": {"type": "X"}}',
+    '{"findings": [1, 2,]}',
+    '{"findings": [1 2]}',
+    '{"findings": [], }',
+    '{"findings": []} {}',
+    '{"findings": [1',
+    '{"findings": [12',
+])
+def test_bad_documents(tmp_path, text):
+    with pytest.raises(ValueError):
+        list(FindingsReader(_write(tmp_path, text), chunk=4))
+
+
+def test_missing_file_reads_as_empty(tmp_path):
+    r = FindingsReader(tmp_path / "missing.json")
+    assert list(r) == [] and r.header == {}
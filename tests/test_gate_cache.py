@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from core.gate_cache import GateCache
+from core.gate_rules import RULE_VERSION
+from core.jsonio import stable_hash
+from core.run_once import evaluate_gate
+
+ASOF = {"asof": "2026-01-21T00:00:00+09:00"}
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _key(cache, delta):
+    return cache.key(cache.asof_digest(ASOF), delta)
+
+
+def test_key_is_content_addressed_and_versioned():
+    assert GateCache.key(GateCache.asof_digest(ASOF), {"severity": "PASS"}) == \
+        stable_hash([RULE_VERSION, stable_hash(ASOF), {"severity": "PASS"}])
+    assert GateCache.asof_digest({"b": 1, "a": 2}) == GateCache.asof_digest({"a": 2, "b": 1})
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = GateCache(tmp_path / "cache.json", max_entries=3)
+    deltas = [{"severity": "PASS", "evidence": [str(i)]} for i in range(4)]
+    keys = [_key(cache, d) for d in deltas]
+    for k, d in zip(keys[:3], deltas):
+        cache.put(k, evaluate_gate(ASOF, d, now=NOW))
+    assert cache.get(keys[0], now=NOW) is not None  # 0 becomes most recent
+    cache.put(keys[3], evaluate_gate(ASOF, deltas[3], now=NOW))  # evicts 1, the least recent
+    assert len(cache) == 3
+    assert cache.get(keys[1], now=NOW) is None
+    assert all(cache.get(k, now=NOW) is not None for k in (keys[0], keys[2], keys[3]))
+    cache.save()
+    reloaded = GateCache(tmp_path / "cache.json", max_entries=2)  # a smaller limit evicts on load, oldest first
+    assert len(reloaded) == 2 and reloaded.get(keys[0], now=NOW) is None
+
+
+def test_hit_equals_recompute_including_default_until(tmp_path):
+    cache = GateCache(tmp_path / "cache.json")
+    delta = {"severity": "DELAY", "evidence": []}  # gets the 48h `until` default
+    k = _key(cache, delta)
+    cache.put(k, evaluate_gate(ASOF, delta, now=NOW))
+    cache.save()
+    later = NOW + timedelta(days=3)
+    assert GateCache(tmp_path / "cache.json").get(k, now=later) == evaluate_gate(ASOF, delta, now=later)
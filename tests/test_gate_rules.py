@@ -0,0 +1,104 @@
+import itertools
+from datetime import datetime, timezone
+
+from core.gate_rules import RULES, GatePlan, default_until
+from core.run_once import evaluate_gate
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+MISSING = object()
+
+
+def _baseline(delta: dict, now: datetime) -> dict:
+    """The hand-written gate the rule table replaced, step for step."""
+    severity = delta.get("severity", "PASS")
+    if severity not in ("PASS", "DELAY", "BLOCK"):
+        severity = "BLOCK"
+    reason_codes, evidence_paths, suggested_fix = [], [], []
+    if delta.get("severity", "PASS") not in ("PASS", "DELAY", "BLOCK"):
+        reason_codes.append("INVALID_SEVERITY_COERCED_TO_BLOCK")
+        evidence_paths.append("delta.severity")
+        suggested_fix.append("Set `delta.severity` to PASS/DELAY/BLOCK.")
+    if delta.get("block") is True:
+        severity = "BLOCK"
+        is_mmar = any(isinstance(x, str) and x.startswith("MMAR:") for x in delta.get("reason_codes", []) or [])
+        reason_codes.append("MMAR_EXPLICIT_BLOCK" if is_mmar else "MANUAL_BLOCK_FLAG")
+        evidence_paths.append("delta.block")
+        suggested_fix.append("Remove `delta.block=true` or replace with `severity=DELAY` and provide evidence.")
+    evidence_list = list(dict.fromkeys(delta.get("evidence", [])))
+    impact = delta.get("impact", {})
+    if not isinstance(impact, dict):
+        impact = {}
+    externality = str(impact.get("externality", "")).lower().strip()
+    irreversibility = str(impact.get("irreversibility", "")).lower().strip()
+    if severity != "BLOCK" and not evidence_list:
+        if externality == "high" and irreversibility == "high":
+            severity = "BLOCK"
+            reason_codes.append("AUTO_BLOCK_HIGH_X_HIGH_NO_EVIDENCE")
+            evidence_paths += ["delta.impact.externality", "delta.impact.irreversibility", "delta.evidence"]
+            suggested_fix.append("Add evidence or reduce externality/irreversibility; otherwise keep BLOCK.")
+        else:
+            severity = "DELAY"
+            reason_codes += ["AUTO_DELAY_NO_EVIDENCE", "MMAR_DELAY_EVIDENCE_GAP"]
+            evidence_paths.append("delta.evidence")
+            suggested_fix.append("Add at least one item to `delta.evidence` to move from DELAY to PASS/BLOCK.")
+    until = delta.get("until", None)
+    recheck, next_action = [], None
+    if severity == "DELAY":
+        if until is None:
+            until = default_until(now)
+            reason_codes.append("AUTO_DELAY_UNTIL_SET_48H")
+            evidence_paths.append("delta.until")
+            suggested_fix.append("Provide a concrete `delta.until` if 48h is not appropriate.")
+        recheck = [
+            "Add evidence (links / hashes / screenshots) to `delta.evidence`",
+            "Reconfirm irreversibility/externality assumptions under As-of constraints",
+            "Re-run the gate after `until`",
+        ]
+        next_action = "RERUN_AFTER_UNTIL"
+    return {
+        "severity": severity,
+        "until": until,
+        "evidence": evidence_list,
+        "reason_codes": list(dict.fromkeys(reason_codes)),
+        "upstream_reason_codes": [x for x in reason_codes if x.startswith("MMAR_") or x.startswith("MMAR:")],
+        "evidence_paths": list(dict.fromkeys(evidence_paths)),
+        "suggested_fix": list(dict.fromkeys(suggested_fix)),
+        "recheck": recheck,
+        "next_action": next_action,
+    }
+
+
+def _deltas():
+    axes = [
+        ("severity", [MISSING, "PASS", "DELAY", "BLOCK", "bogus"]),
+        ("evidence", [MISSING, [], ["e1", "e1", "e2"]]),
+        ("impact", [MISSING, "high", {"externality": "High ", "irreversibility": "HIGH"},
+                    {"externality": "high", "irreversibility": "low"}, {"externality": "high"}]),
+        ("block", [MISSING, False, True]),
+        ("reason_codes", [MISSING, None, ["MMAR:x"], ["OTHER", 3]]),
+        ("until", [MISSING, "2026-02-01T00:00:00+00:00"]),
+    ]
+    for values in itertools.product(*(v for _, v in axes)):
+        yield {k: v for (k, _), v in zip(axes, values) if v is not MISSING}
+
+
+def test_compiled_plan_matches_baseline_on_all_combinations():
+    n = 0
+    for delta in _deltas():
+        assert evaluate_gate({}, delta, NOW) == _baseline(delta, NOW), delta
+        n += 1
+    assert n == 5 * 3 * 5 * 3 * 4 * 2
+
+
+def test_plan_counts_hits_and_skips_rules_that_cannot_fire():
+    plan = GatePlan(RULES)
+    plan.run({"severity": "BLOCK", "evidence": []}, NOW)
+    st = plan.run({"severity": "PASS", "impact": {"externality": "high", "irreversibility": "high"}}, NOW)
+    assert st.severity == "BLOCK" and st.reason_codes == ["AUTO_BLOCK_HIGH_X_HIGH_NO_EVIDENCE"]
+    rules = {r["rule"]: r for r in plan.stats()["rules"]}
+    assert plan.stats()["evaluations"] == 2
+    assert rules["auto_block_high_x_high_no_evidence"]["hits"] == 1
+    # BLOCK never visits the PASS/DELAY-only rules; the second case left for BLOCK after its hit
+    assert rules["auto_delay_no_evidence"]["checked"] == 0
+    assert rules["delay_recheck"]["checked"] == 0
+    assert rules["invalid_severity"]["checked"] == 2
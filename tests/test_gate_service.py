@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import json
+import socket
+
+import pytest
+
+from core.gate_service import GateService, clear_stale_socket, main, parse_http, serve
+from core.run_once import evaluate_gate
+from tools import gate_loadtest
+
+DELTA = {"severity": "PASS", "evidence": ["x"]}
+
+
+def _call(service, body: dict, op=None) -> dict:
+    return json.loads(service.respond(json.dumps(body).encode(), op=op))
+
+
+def test_url_op_is_authoritative():
+    service = GateService({"default": {}})
+    assert _call(service, {"delta": DELTA}, op="gate")["ok"]
+    assert _call(service, {"op": "gate", "delta": DELTA}, op="gate")["ok"]
+    res = _call(service, {"op": "findings_to_delta", "findings": {}}, op="gate")
+    assert not res["ok"] and "does not match /v1/gate" in res["error"]
+
+
+def test_parse_http_is_loopback_only_by_default():
+    assert parse_http("127.0.0.1:8765") == ("127.0.0.1", 8765)
+    assert parse_http(":8765") == ("127.0.0.1", 8765)
+    assert parse_http("localhost:1") == ("localhost", 1)
+    assert parse_http("[::1]:1") == ("::1", 1)
+    for spec in ("0.0.0.0:8765", "10.0.0.5:80", "example.org:80"):
+        with pytest.raises(ValueError):
+            parse_http(spec)
+    assert parse_http("0.0.0.0:8765", allow_remote=True) == ("0.0.0.0", 8765)
+
+
+def test_unix_path_that_is_not_a_socket_is_kept(tmp_path):
+    f = tmp_path / "important.txt"
+    f.write_text("keep me")
+    with pytest.raises(ValueError):
+        clear_stale_socket(str(f))
+    assert f.read_text() == "keep me"
+    clear_stale_socket(str(tmp_path / "missing.sock"))  # nothing there: fine
+
+
+def test_stale_socket_is_replaced_and_live_one_refused(tmp_path):
+    path = str(tmp_path / "gate.sock")
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.bind(path)
+    s.listen()
+    with pytest.raises(ValueError):
+        clear_stale_socket(path)  # a server still answers there
+    s.close()
+    clear_stale_socket(path)  # stale: removed
+    assert not (tmp_path / "gate.sock").exists()
+
+
+def test_unix_roundtrip(tmp_path):
+    path = str(tmp_path / "gate.sock")
+    asof = {"asof": "2026-01-21T00:00:00+09:00"}
+
+    async def run():
+        task = asyncio.ensure_future(serve(GateService({"default": asof}), unix=path))
+        for _ in range(100):
+            if (tmp_path / "gate.sock").exists():
+                break
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(path)
+        req = {"id": 1, "op": "gate", "delta": DELTA, "now": "2026-01-01T00:00:00+00:00"}
+        writer.write((json.dumps(req) + "\n").encode())
+        await writer.drain()
+        line = await reader.readline()
+        writer.close()
+        task.cancel()
+        return json.loads(line)
+
+    res = asyncio.run(run())
+    assert res["ok"] and res["id"] == 1
+    assert res["result"]["severity"] == evaluate_gate(asof, DELTA)["severity"]
+
+
+def test_unknown_profile_id_is_an_error():
+    service = GateService({"default": {}}, {"tight": {"budget_mode": "tight"}})
+    gate = {"severity": "DELAY", "reason_codes": []}
+    assert _call(service, {"gate": gate, "profile_id": "tight"}, op="intervene")["ok"]
+    res = _call(service, {"gate": gate, "profile_id": "nope"}, op="intervene")
+    assert not res["ok"] and "unknown profile_id" in res["error"]
+
+
+def test_missing_or_misspelled_input_is_an_error():
+    service = GateService({"default": {}}, {"default": {}})
+    for op, key in (("gate", "delta"), ("findings_to_delta", "findings"), ("intervene", "gate"),
+                    ("pipeline", "findings")):
+        res = _call(service, {f"{key}_entry": {}}, op=op)
+        assert not res["ok"] and f"needs '{key}'" in res["error"], op
+        res = _call(service, {key: None}, op=op)
+        assert not res["ok"] and "must be a JSON object" in res["error"], op
+
+
+def test_http_missing_input_is_400():
+    async def run():
+        server, port = await _start_http(GateService({"default": {}}))
+        body = json.dumps({"delta_entry": DELTA}).encode()
+        try:
+            return await _http_status(port, f"POST /v1/gate HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                                      + body)
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == "400 Bad Request"
+
+
+def test_missing_asof_or_profile_file_exits(tmp_path):
+    for flag in ("--asof", "--profile"):
+        with pytest.raises(SystemExit) as e:
+            main(["--unix", str(tmp_path / "gate.sock"), flag, str(tmp_path / "nope.json")])
+        assert e.value.code not in (0, None)
+    assert not (tmp_path / "gate.sock").exists()
+
+
+async def _start_http(service):
+    server = await asyncio.start_server(service.serve_http, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def _http_status(port: int, raw: bytes) -> str:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    status = (await reader.readline()).decode("latin-1").split(" ", 1)[1].strip()
+    writer.close()
+    return status
+
+
+def test_http_status_codes():
+    async def run():
+        server, port = await _start_http(GateService({"default": {}}))
+        body = json.dumps({"delta": DELTA}).encode()
+        post = "POST /v1/{} HTTP/1.1\r\nContent-Length: {}\r\n\r\n"
+        try:
+            return [
+                await _http_status(port, post.format("gate", len(body)).encode() + body),
+                await _http_status(port, post.format("nope", len(body)).encode() + body),
+                await _http_status(port, b"POST /v1/gate HTTP/1.1\r\nContent-Length: abc\r\n\r\n"),
+                await _http_status(port, b"GET /missing HTTP/1.1\r\n\r\n"),
+            ]
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == ["200 OK", "400 Bad Request", "400 Bad Request", "404 Not Found"]
+
+
+def test_http_oversized_header_gets_431():
+    async def run():
+        service = GateService({"default": {}})
+        server = await asyncio.start_server(service.serve_http, "127.0.0.1", 0, limit=1024)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await _http_status(port, b"POST /v1/gate HTTP/1.1\r\nX-Pad: " + b"a" * 4096 + b"\r\n\r\n")
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == "431 Request Header Fields Too Large"
+
+
+def _loadtest_args(tmp_path, port, body: dict, requests: int, concurrency: int):
+    req = tmp_path / "req.json"
+    req.write_text(json.dumps(body), encoding="utf-8")
+    return argparse.Namespace(request=str(req), op="gate", unix=None, http=f"127.0.0.1:{port}",
+                              requests=requests, concurrency=concurrency, depth=4)
+
+
+def test_loadtest_sends_every_request(tmp_path):
+    async def run():
+        server, port = await _start_http(GateService({"default": {}}))
+        try:
+            return await gate_loadtest.run(_loadtest_args(tmp_path, port, {"delta": DELTA}, 10, 4))
+        finally:
+            server.close()
+
+    assert asyncio.run(run())["requests"] == 10
+
+
+def test_loadtest_fails_instead_of_hanging(tmp_path):
+    async def run():
+        server, port = await _start_http(GateService({}))  # no As-of pack: every gate request fails
+        try:
+            await asyncio.wait_for(gate_loadtest.run(_loadtest_args(tmp_path, port, {"delta": DELTA}, 50, 2)), 10)
+        finally:
+            server.close()
+
+    with pytest.raises(RuntimeError, match="unknown asof_id"):
+        asyncio.run(run())
@@ -0,0 +1,66 @@
+import itertools
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tools.intervene_batch import (  # noqa: E402
+    ACTIONS,
+    action_mix,
+    decide_intervene_batch,
+    sweep_profiles,
+    verify_against_scalar,
+)
+from tools.intervene_gate import decide_intervene  # noqa: E402
+
+
+def _gates():
+    gates = []
+    for sev, codes in itertools.product(("PASS", "DELAY", "BLOCK", None),
+                                        ([], ["MMAR_DELAY_EVIDENCE_GAP"], ["AUTO_DELAY_NO_EVIDENCE", 3])):
+        gates.append({"severity": sev, "reason_codes": codes, "upstream_reason_codes": None})
+    gates.append({"severity": "DELAY", "upstream_reason_codes": ["MMAR_DELAY_EVIDENCE_GAP"]})
+    return gates
+
+
+def _profiles():
+    _, profiles = sweep_profiles({}, {
+        "budget_mode": ["tight", "ample", "other"],
+        "deadline_days": [3, 7, 30],
+        "base_p_break": [0.0, 0.15, 0.9],
+        "value_breakthrough": [1.0, 10.0, 100.0],
+        "intervene_cost_add_model": [0.5, 2.0],
+    })
+    return profiles + [{}]
+
+
+def test_batch_matches_scalar_exactly():
+    gates, profiles = _gates(), _profiles()
+    batch = decide_intervene_batch(gates, profiles)
+    assert batch["action"].shape == (len(gates), len(profiles))
+    assert verify_against_scalar(gates, profiles, batch) == 0
+    # every action is reachable on this grid, so the check is not vacuous
+    assert set(batch["action"].ravel().tolist()) == set(range(len(ACTIONS)))
+
+
+def test_batch_matches_scalar_with_measured_stagnation():
+    gates, profiles = _gates(), _profiles()
+    stagnation = [None if i % 3 == 0 else {"stagnant": i % 2 == 0} if i % 3 == 1 else bool(i % 2)
+                  for i in range(len(gates))]
+    batch = decide_intervene_batch(gates, profiles, stagnation=stagnation)
+    assert verify_against_scalar(gates, profiles, batch, stagnation=stagnation) == 0
+
+
+def test_verify_detects_a_mismatch():
+    gates, profiles = _gates(), _profiles()
+    batch = decide_intervene_batch(gates, profiles)
+    batch["ev_continue"][0, 0] += 1e-12
+    assert verify_against_scalar(gates, profiles, batch) == 1
+
+
+def test_action_mix_counts_columns():
+    gates, profiles = _gates(), _profiles()
+    batch = decide_intervene_batch(gates, profiles)
+    for j, mix in enumerate(action_mix(batch)):
+        ref = [decide_intervene(g, profiles[j])["action"] for g in gates]
+        assert mix == {a: ref.count(a) for a in ACTIONS}
@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from core import jsonio
+from core.findings_to_delta import _stable_hash, findings_to_delta
+from core.jsonio import encode_findings, findings_hash
+from core.recurrence_update import _fingerprint_finding
+
+EXAMPLE = json.loads((Path(__file__).resolve().parents[1] / "examples" / "mmar_findings.example.json")
+                     .read_text(encoding="utf-8"))
+
+EDGE = [
+    {},
+    {"type": "MISSING_EVIDENCE"},
+    {"type": "X", "signals": None, "needs": None, "delta": None},
+    {"type": "X", "signals": {"b": 1, "a": [1.5, 1e300, -0.0, True, None]}},
+    {"type": "ÜNICODE", "claim": "naïve — 日本語   \"quoted\"", "tag": "t\n"},
+    {"type": "X", "zz_extra": {"nested": {"k": [1, {"é": 2}]}}, "aa_extra": "first"},
+    {"type": "X", "delta": {"block": True, "z": {}}, "needs": ["  padded  ", "", 3]},
+    {"claim": "x" * 10000, "big": 2 ** 70},
+]
+
+
+@pytest.mark.parametrize("f", EXAMPLE["findings"] + EDGE)
+def test_fingerprint_is_bit_identical(f):
+    (enc,) = encode_findings([f])
+    assert enc.fingerprint == _fingerprint_finding(f)
+
+
+@pytest.mark.parametrize("findings", [EXAMPLE["findings"], EDGE, [], EDGE[:1]])
+def test_findings_hash_is_bit_identical(findings):
+    assert findings_hash(encode_findings(findings)) == _stable_hash(findings)
+
+
+def test_delta_id_with_shared_encodings():
+    doc = {**EXAMPLE, "findings": EXAMPLE["findings"] + EDGE}
+    assert (findings_to_delta(doc, encodings=encode_findings(doc["findings"]))["delta_id"]
+            == findings_to_delta(doc)["delta_id"])
+
+
+@pytest.mark.parametrize("obj", [
+    EDGE,
+    {"f": [0.1, 1e300, 1e-7, 1e16, -0.0, 2 ** 63], "s": "naïve — 日本語   \"q\" /"},
+    {"nan": float("nan"), "inf": float("inf"), 3: "int key"},
+])
+def test_compact_output_does_not_depend_on_orjson(monkeypatch, obj):
+    stdlib = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    assert jsonio.dumps_compact(obj) == stdlib
+    monkeypatch.setattr(jsonio, "orjson", None)
+    assert jsonio.dumps_compact(obj) == stdlib
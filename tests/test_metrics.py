@@ -0,0 +1,82 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from core import metrics, pipeline
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+SAMPLE = re.compile(r'^(mmar_[a-z_]+)(\{[a-z_]+="(?:[^"\\]|\\.)*"(?:,[a-z_]+="(?:[^"\\]|\\.)*")*\})? [0-9.e+-]+$')
+
+
+@pytest.fixture(autouse=True)
+def _off():
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def _parse_prom(text: str) -> dict:
+    """metric name -> [label string], checking every sample line and that its TYPE comes first."""
+    typed, samples = set(), {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            name, kind = line[len("# TYPE "):].split(" ")
+            assert kind in ("counter", "gauge") and name not in typed
+            typed.add(name)
+            continue
+        m = SAMPLE.match(line)
+        assert m, line
+        assert m.group(1) in typed, line
+        samples.setdefault(m.group(1), []).append(m.group(2) or "")
+    return samples
+
+
+def test_prometheus_and_json_exports(tmp_path):
+    metrics.enable()
+    with metrics.stage("json_load"):
+        pass
+    metrics.count("findings_processed", 3, stage="recurrence")
+    metrics.observe_gate({"severity": "DELAY", "reason_codes": ['odd "code"\\x\ny']})
+    metrics.disable()
+
+    doc = metrics.write(tmp_path / "m.prom", "pipeline")
+    samples = _parse_prom((tmp_path / "m.prom").read_text(encoding="utf-8"))
+    assert samples["mmar_stage_seconds_total"] == ['{command="pipeline",stage="json_load"}']
+    assert samples["mmar_stage_calls_total"] == ['{command="pipeline",stage="json_load"}']
+    assert samples["mmar_stage_max_seconds"] == ['{command="pipeline",stage="json_load"}']
+    assert samples["mmar_findings_processed_total"] == ['{command="pipeline",stage="recurrence"}']
+    assert samples["mmar_gate_decisions_total"] == ['{command="pipeline",severity="DELAY"}']
+    assert samples["mmar_reason_codes_total"] == ['{command="pipeline",code="odd \\"code\\"\\\\x\\ny"}']
+    assert set(samples) >= {"mmar_run_wall_seconds", "mmar_run_timestamp_seconds"}
+
+    metrics.write(tmp_path / "m.json", "pipeline")
+    j = json.loads((tmp_path / "m.json").read_text(encoding="utf-8"))
+    assert j["version"] == metrics.METRICS_VERSION and j["command"] == "pipeline"
+    assert j["stages"]["json_load"]["calls"] == 1 == doc["stages"]["json_load"]["calls"]
+    assert j["counters"]["findings_processed"] == [{"labels": {"stage": "recurrence"}, "value": 3}]
+    assert j["counters"]["gate_decisions"] == [{"labels": {"severity": "DELAY"}, "value": 1}]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["m.json", "m.prom"]  # no temp files left
+
+
+def test_disabled_collects_nothing(tmp_path):
+    assert metrics.stage("json_load") is metrics.stage("hash")
+    metrics.count("findings_processed", 5)
+    metrics.observe_gate({"severity": "PASS"})
+    assert metrics.snapshot()["counters"] == {} and metrics.snapshot()["stages"] == {}
+
+
+def test_pipeline_writes_textfile(tmp_path):
+    src = tmp_path / "findings.jsonl"
+    doc = json.loads((EXAMPLES / "mmar_findings.example.json").read_text(encoding="utf-8"))
+    src.write_text(json.dumps(doc) + "\n", encoding="utf-8")
+    prom = tmp_path / "metrics" / "pipeline.prom"
+    assert pipeline.main(["--asof", str(EXAMPLES / "asof_pack.example.json"), "--in", str(src),
+                          "--out", str(tmp_path / "out.jsonl"), "--metrics", str(prom)]) == 0
+    assert not metrics.enabled
+    samples = _parse_prom(prom.read_text(encoding="utf-8"))
+    assert all(s.startswith('{command="pipeline"') for series in samples.values() for s in series)
+    assert {'{command="pipeline",stage="intervene"}'} <= set(samples["mmar_stage_calls_total"])
+    assert len(samples["mmar_gate_decisions_total"]) == 1
+    assert len(samples["mmar_intervene_actions_total"]) == 1
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from core.jsonio import canonical_dumps
+from core.pic_merge import case_key, group_by_case, merge2, merge_deltas, merge_tree
+
+
+def _delta(rnd, i, case_id="c1"):
+    d = {"delta_id": f"{case_id}:{i}", "severity": rnd.choice(["PASS", "DELAY", "BLOCK", "bad"]),
+         "block": rnd.choice([True, False]),
+         "until": rnd.choice([None, "2025-01-02T00:00:00+00:00", "2025-01-02T01:00:00+01:00", "2025-03-01", "junk"]),
+         "evidence": rnd.sample(list("abcdef"), rnd.randint(0, 3)),
+         "changes": [{"k": rnd.randint(0, 4)} for _ in range(rnd.randint(0, 2))],
+         "meta": {"case_id": case_id, "asof": rnd.choice(["2025-01-01", "2025-02-01T00:00:00+09:00", "x"])}}
+    if rnd.random() < 0.6:
+        d["impact"] = {k: rnd.choice(["low", "High", "medium", "zzz"])
+                       for k in rnd.sample(["externality", "irreversibility"], rnd.randint(0, 2))}
+    if rnd.random() < 0.2:
+        del d["meta"]["case_id"]
+    return d
+
+
+def test_merge_is_order_and_grouping_independent():
+    rnd = random.Random(7)
+    for _ in range(200):
+        ds = [_delta(rnd, i) for i in range(rnd.randint(2, 10))]
+        ref = canonical_dumps(merge_deltas(ds))
+        shuffled = ds[:]
+        rnd.shuffle(shuffled)
+        assert canonical_dumps(merge_deltas(shuffled)) == ref
+        parts = shuffled[:]
+        while len(parts) > 1:
+            i = rnd.randrange(len(parts) - 1)
+            parts[i:i + 2] = [merge2(parts[i], parts[i + 1])]
+        assert canonical_dumps(parts[0]) == ref
+        assert canonical_dumps(merge2(parts[0], parts[0])) == ref
+        assert canonical_dumps(merge_tree(shuffled, chunksize=3)) == ref
+
+
+def test_merged_delta_keeps_its_case_and_latest_asof():
+    a = {"delta_id": "a", "severity": "PASS", "meta": {"case_id": "c1", "asof": "2025-01-01"}}
+    b = {"delta_id": "b", "severity": "DELAY", "meta": {"case_id": "c1", "asof": "2025-02-01"}}
+    c = {"delta_id": "c", "severity": "PASS", "meta": {"case_id": "c2", "asof": "2025-01-05"}}
+    merged = merge2(a, b)
+    assert merged["meta"]["case_id"] == "c1" and merged["meta"]["asof"] == "2025-02-01"
+    assert case_key(merged) == "c1"
+    # re-grouping merged output must not collapse cases
+    again = group_by_case([merged, merge_deltas([c])])
+    assert sorted(again) == ["c1", "c2"]
+
+
+def test_single_delta_passes_through():
+    d = {"delta_id": "a", "severity": "PASS"}
+    assert merge_deltas([d]) is d
+
+
+def test_deltas_of_different_cases_do_not_merge():
+    a = {"delta_id": "a", "meta": {"case_id": "c1"}}
+    b = {"delta_id": "b", "meta": {"case_id": "c2"}}
+    with pytest.raises(ValueError, match="different cases"):
+        merge2(a, b)
@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from core import pipeline
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+ASOF = str(EXAMPLES / "asof_pack.example.json")
+FINDINGS = EXAMPLES / "mmar_findings.example.json"
+
+
+def _findings_jsonl(tmp_path):
+    p = tmp_path / "findings.jsonl"
+    with open(FINDINGS, encoding="utf-8") as fh:
+        p.write_text(json.dumps(json.load(fh)) + "\n", encoding="utf-8")
+    return p
+
+
+def test_missing_asof_exits_nonzero(tmp_path):
+    out = tmp_path / "out.jsonl"
+    with pytest.raises(SystemExit) as e:
+        pipeline.main(["--asof", str(tmp_path / "nope.json"), "--in", str(_findings_jsonl(tmp_path)),
+                       "--out", str(out)])
+    assert e.value.code not in (0, None)
+    assert not out.exists()
+
+
+def test_missing_profile_exits_nonzero(tmp_path):
+    with pytest.raises(SystemExit) as e:
+        pipeline.main(["--asof", ASOF, "--profile", str(tmp_path / "nope.json"),
+                       "--in", str(_findings_jsonl(tmp_path)), "--out", str(tmp_path / "out.jsonl")])
+    assert e.value.code not in (0, None)
+
+
+def test_runs_with_asof(tmp_path):
+    out = tmp_path / "out.jsonl"
+    assert pipeline.main(["--asof", ASOF, "--in", str(_findings_jsonl(tmp_path)), "--out", str(out)]) == 0
+    recs = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert len(recs) == 1 and "decision_gate" in recs[0]
+
+
+def test_recurrence_fold_matches_recurrence_update(tmp_path):
+    from core.recurrence_update import update_recurrence_docs
+
+    doc = json.loads(FINDINGS.read_text(encoding="utf-8"))
+    docs = [doc, {**doc, "case_id": "other"}, doc]
+    src = tmp_path / "findings.jsonl"
+    src.write_text("".join(json.dumps(d) + "\n" for d in docs), encoding="utf-8")
+    log = tmp_path / "recurrence_log.json"
+    assert pipeline.main(["--asof", ASOF, "--in", str(src), "--out", str(tmp_path / "out.jsonl"),
+                          "--recurrence", str(log)]) == 0
+    ref, _ = update_recurrence_docs(docs, tmp_path / "ref.json")
+
+    def _strip(items):
+        return {fp: {k: v for k, v in it.items() if k not in ("first_seen", "last_seen")} for fp, it in items.items()}
+
+    got = json.loads(log.read_text(encoding="utf-8"))
+    assert _strip(got["items"]) == _strip(ref["items"])
+    recs = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert all("recurrence" not in r for r in recs)
+    assert recs[0]["delta_id"] == pipeline.findings_to_delta(doc)["delta_id"]
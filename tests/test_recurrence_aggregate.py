@@ -0,0 +1,152 @@
+import json
+import os
+import random
+import zipfile
+
+from core.jsonio import save_json
+from tools import recurrence_aggregate as ra
+
+
+def _log(rnd) -> dict:
+    items = {}
+    for _ in range(rnd.randint(0, 6)):
+        fp = f"fp{rnd.randint(0, 7)}"
+        day = rnd.randint(1, 28)
+        items[fp] = {
+            "type": rnd.choice([None, "DISAGREEMENT", "MISSING_EVIDENCE"]),
+            "tag": rnd.choice([None, "T1", "T2"]),
+            "count": rnd.randint(0, 5),
+            "first_seen": rnd.choice([None, f"2025-01-{day:02d}"]),
+            "last_seen": rnd.choice([None, f"2025-02-{day:02d}"]),
+            "sources": [{"case_id": f"c{rnd.randint(0, 40)}", "asof": f"2025-01-0{rnd.randint(1, 3)}"}
+                        for _ in range(rnd.randint(0, 15))],
+            "support": [f"s{rnd.randint(0, 400)}" for _ in range(rnd.randint(0, 120))] + [7],
+            "examples": [{"case_id": f"c{rnd.randint(0, 40)}"} for _ in range(rnd.randint(0, 6))],
+        }
+    return {"version": "v1.1", "items": items}
+
+
+def _baseline(docs) -> dict:
+    """The serial aggregate-v0.1 fold: unbounded unions, deduped only at the end."""
+    acc = {}
+    for doc in docs:
+        for fp, it in doc["items"].items():
+            a = acc.setdefault(fp, {"type": None, "tag": None, "count": 0, "first_seen": None, "last_seen": None,
+                                    "sources": [], "support": [], "examples": []})
+            a["type"] = a["type"] or it.get("type")
+            a["tag"] = a["tag"] if a["tag"] is not None else it.get("tag")
+            a["count"] += int(it.get("count", 0) or 0)
+            fs, ls = it.get("first_seen"), it.get("last_seen")
+            if fs and (a["first_seen"] is None or fs < a["first_seen"]):
+                a["first_seen"] = fs
+            if ls and (a["last_seen"] is None or ls > a["last_seen"]):
+                a["last_seen"] = ls
+            a["sources"].extend(it["sources"])
+            a["support"].extend(it["support"])
+            a["examples"] = (a["examples"] + it["examples"])[-10:]
+    items = {}
+    for fp, a in acc.items():
+        seen, sources = set(), []
+        for s in a["sources"]:
+            if (s["case_id"], s["asof"]) not in seen:
+                seen.add((s["case_id"], s["asof"]))
+                sources.append(s)
+        support = list(dict.fromkeys(x for x in a["support"] if isinstance(x, str)))
+        promo, reason = ra.decide_promotion(a["count"], len(sources), len(support))
+        items[fp] = {**a, "distinct_sources": len(sources), "support_size": len(support), "promotion": promo,
+                     "promotion_reason": reason, "sources": sources[:20], "support": support[:200]}
+    return items
+
+
+def _write_runs(root, docs):
+    for n, doc in enumerate(docs):
+        save_json(root / f"run-{n:03d}" / "recurrence_log.json", doc)
+
+
+def _strip(out: dict) -> dict:
+    return {k: v for k, v in out.items() if k != "generated_at"}
+
+
+def test_partials_match_serial_baseline(tmp_path):
+    rnd = random.Random(8)
+    docs = [_log(rnd) for _ in range(25)]
+    _write_runs(tmp_path, docs)
+    serial = ra.aggregate([tmp_path])
+    assert serial["items"] == _baseline(docs)
+    assert serial["inputs"]["num_files"] == len(docs)
+    assert _strip(ra.aggregate([tmp_path], workers=2, chunksize=3)) == _strip(serial)
+
+    # any bracketing of the merge gives the same result
+    parts = [ra.partial_from_doc(d) for d in docs]
+    acc = ra.empty_partial()
+    for i in range(0, len(parts), 4):
+        group = ra.empty_partial()
+        for p in parts[i:i + 4]:
+            ra.merge_partials(group, p)
+        ra.merge_partials(acc, group)
+    assert ra.finish(acc)["items"] == serial["items"]
+
+
+def test_cache_reuses_partials_and_invalidates_edited_log(tmp_path):
+    rnd = random.Random(9)
+    docs = [_log(rnd) for _ in range(6)]
+    _write_runs(tmp_path / "dl", docs)
+    cache = tmp_path / "cache.json"
+
+    out, stats = ra.aggregate_cached([tmp_path / "dl"], cache)
+    assert stats["parsed"] == 6 and _strip(out) == _strip(ra.aggregate([tmp_path / "dl"]))
+    out, stats = ra.aggregate_cached([tmp_path / "dl"], cache)
+    assert stats["parsed"] == 0 and stats["state_reused"]
+    f = tmp_path / "dl" / "run-002" / "recurrence_log.json"
+    os.utime(f)  # touched, same content: the hash keeps the entry
+    assert ra.aggregate_cached([tmp_path / "dl"], cache)[1]["parsed"] == 0
+
+    # edit one log in place
+    docs[2]["items"]["fpX"] = {"type": "DISAGREEMENT", "tag": None, "count": 3, "first_seen": None, "last_seen": None,
+                               "sources": [], "support": ["s1"], "examples": []}
+    st = f.stat()
+    save_json(f, docs[2])
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    out, stats = ra.aggregate_cached([tmp_path / "dl"], cache)
+    assert stats["parsed"] == 1 and not stats["state_reused"]
+    assert out["items"] == _baseline(docs)
+
+    # a removed log drops out; a new run is folded onto the cached state
+    (tmp_path / "dl" / "run-000" / "recurrence_log.json").unlink()
+    out, _ = ra.aggregate_cached([tmp_path / "dl"], cache)
+    assert out["items"] == _baseline(docs[1:])
+    extra = _log(rnd)
+    _write_runs(tmp_path / "dl2", [extra])
+    out, stats = ra.aggregate_cached([tmp_path / "dl", tmp_path / "dl2"], cache)
+    assert stats == {"files": 6, "parsed": 1, "folded": 1, "state_reused": True}
+    assert out["items"] == _baseline(docs[1:] + [extra])
+
+
+def test_zip_artifacts_match_extracted_dirs(tmp_path):
+    rnd = random.Random(21)
+    docs = [{**_log(rnd), "run": n} for n in range(5)]  # distinct artifacts, even when a log has no items
+    _write_runs(tmp_path / "dirs", docs)
+    for n in range(len(docs) + 1):
+        z = tmp_path / "zips" / f"run-{n:03d}" / "recurrence_log.zip"
+        z.parent.mkdir(parents=True)
+        with zipfile.ZipFile(z, "w", zipfile.ZIP_DEFLATED) as zf:
+            # run-005 is run-001 downloaded again
+            zf.write(tmp_path / "dirs" / f"run-{1 if n == 5 else n:03d}" / "recurrence_log.json",
+                     "recurrence_log.json")
+    # not an artifact: a directory scan must not read it
+    with zipfile.ZipFile(tmp_path / "zips" / "backup.zip", "w") as zf:
+        zf.writestr("old/recurrence_log.json", json.dumps(_log(rnd)))
+
+    extracted = ra.aggregate([tmp_path / "dirs"])
+    zipped = ra.aggregate([tmp_path / "zips"], workers=2)
+    assert extracted["inputs"]["num_files"] == zipped["inputs"]["num_files"] == 5
+    assert extracted["items"] == zipped["items"] == _baseline(docs)
+
+
+def test_identical_plain_logs_are_separate_runs(tmp_path):
+    doc = _log(random.Random(4))
+    _write_runs(tmp_path, [doc, doc])
+    out = ra.aggregate([tmp_path])
+    assert out["inputs"]["num_files"] == 2
+    assert out["items"] == _baseline([doc, doc])
+    assert all(it["count"] == 2 * doc["items"][fp]["count"] for fp, it in out["items"].items())
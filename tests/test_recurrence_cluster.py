@@ -0,0 +1,102 @@
+from core.recurrence_cluster import ClusterIndex
+from core.recurrence_update import _fingerprint_finding
+
+CLAIM = "the retry budget is exhausted before the upstream timeout fires on the payment path"
+
+
+def _near(i: int) -> dict:
+    # same support, the claim differs by one trailing word
+    return {"type": "MISSING_EVIDENCE", "needs": ["latency trace", "retry config"], "claim": f"{CLAIM} v{i}"}
+
+
+OTHER = {"type": "MISSING_EVIDENCE", "needs": ["owner"], "claim": "nobody owns the nightly export job"}
+
+
+def _doc(*findings):
+    return {"case_id": "c1", "asof": "2026-01-01", "findings": list(findings)}
+
+
+def test_near_duplicates_share_a_cluster(tmp_path):
+    idx = ClusterIndex(tmp_path / "clusters.jsonl")
+    idx.add_docs([_doc(_near(1), _near(2), _near(3), OTHER)])
+    ids = {idx.cluster_of(_fingerprint_finding(f)) for f in (_near(1), _near(2), _near(3))}
+    assert len(ids) == 1
+    assert idx.cluster_of(_fingerprint_finding(OTHER)) not in ids
+    # different type, same text: never merged
+    other_type = {**_near(1), "type": "CONFLICT"}
+    idx.add_finding(other_type)
+    assert idx.cluster_of(_fingerprint_finding(other_type)) not in ids
+
+
+def test_id_survives_a_smaller_fingerprint_joining(tmp_path):
+    path = tmp_path / "clusters.jsonl"
+    first = [_near(i) for i in range(1, 4)]
+    idx = ClusterIndex(path)
+    idx.add_docs([_doc(*first)])
+    idx.save()
+    (cid,) = set(idx.mapping().values())
+    floor = min(_fingerprint_finding(f) for f in first)
+
+    # find a near-duplicate whose fingerprint sorts below every existing member
+    i = 4
+    while _fingerprint_finding(_near(i)) > floor:
+        i += 1
+    idx = ClusterIndex(path)
+    idx.add_finding(_near(i))
+    idx.save()
+    assert idx.cluster_of(_fingerprint_finding(_near(i))) == cid
+    assert set(ClusterIndex(path).mapping().values()) == {cid}
+
+
+def test_merge_keeps_the_older_root():
+    idx = ClusterIndex(None)
+    a, b = _near(1), OTHER
+    fa, fb = idx.add_finding(a), idx.add_finding(b)
+    idx._union(fb, fa)
+    assert idx.cluster_of(fb) == "cl-" + fa
+    idx._union(fa, fb)
+    assert idx.cluster_of(fa) == "cl-" + fa
+
+
+def test_reload_and_rerun_give_the_same_ids(tmp_path):
+    docs = [_doc(*(_near(i) for i in range(1, 8)), OTHER)]
+    idx = ClusterIndex(tmp_path / "a.jsonl")
+    idx.add_docs(docs)
+    idx.save()
+    again = ClusterIndex(tmp_path / "b.jsonl")
+    again.add_docs(docs)
+    assert again.mapping() == idx.mapping()
+    reloaded = ClusterIndex(tmp_path / "a.jsonl")
+    assert reloaded.mapping() == idx.mapping()
+    # re-ingesting known fingerprints appends nothing
+    size = (tmp_path / "a.jsonl").stat().st_size
+    reloaded.add_docs(docs)
+    reloaded.save()
+    assert (tmp_path / "a.jsonl").stat().st_size == size
+
+
+def test_stale_parameters_rebuild_the_file(tmp_path):
+    path = tmp_path / "clusters.jsonl"
+    idx = ClusterIndex(path, num_perm=32, bands=8)
+    idx.add_docs([_doc(_near(1), OTHER)])
+    idx.save()
+    fresh = ClusterIndex(path)
+    assert len(fresh) == 0
+    fresh.add_finding(_near(2))
+    fresh.save()
+    assert len(ClusterIndex(path)) == 1
+
+
+def test_bridging_two_clusters_retires_the_younger_id():
+    idx = ClusterIndex(None)
+    idx._insert("a1", ["k1"])
+    idx._insert("a2", ["k1"])
+    idx._insert("b1", ["k2"])
+    idx._insert("b2", ["k2"])
+    before = idx.mapping()
+    assert before == {"a1": "cl-a1", "a2": "cl-a1", "b1": "cl-b1", "b2": "cl-b1"}
+    idx._insert("bridge", ["k1", "k2"])  # lands in both clusters' buckets
+    assert set(idx.mapping().values()) == {"cl-a1"}
+    # the retired id, and every id handed out before the merge, still resolves
+    assert {idx.resolve(cid) for cid in before.values()} == {"cl-a1"}
+    assert idx.resolve("cl-unknown") == "cl-unknown"
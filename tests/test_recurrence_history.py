@@ -0,0 +1,72 @@
+import json
+import random
+
+from core.recurrence_history import RecurrenceHistory, asof_key
+from core.recurrence_update import _apply_finding, _extract_support, _fingerprint_finding, finalize_items
+
+TYPES = ["DISAGREEMENT", "MISSING_EVIDENCE", "STRUCTURAL_ANOMALY"]
+
+
+def _doc(rnd):
+    day = rnd.randint(1, 28)
+    asof = f"2025-01-{day:02d}T0{rnd.randint(0, 9)}:00:00+00:00" if rnd.random() > 0.05 else "unknown"
+    return {"case_id": f"c{rnd.randint(0, 20)}", "asof": asof,
+            "findings": [{"type": rnd.choice(TYPES), "tag": rnd.choice([None, "T1"]), "claim": f"x{rnd.randint(0, 5)}",
+                          "needs": [f"n{rnd.randint(0, 9)}"]} for _ in range(rnd.randint(0, 4))]}
+
+
+def _brute_force(docs, at) -> dict:
+    tk = asof_key(at)
+    evs, seq = [], 0
+    for d in docs:
+        for f in d["findings"]:
+            seq += 1
+            k = asof_key(d["asof"])
+            if k is not None and k <= tk:
+                evs.append((k, seq, d, f))
+    evs.sort(key=lambda e: e[:2])
+    items = {}
+    for _, _, d, f in evs:
+        _apply_finding(items, _fingerprint_finding(f), f.get("type"), f.get("tag"), _extract_support(f),
+                       d["case_id"], d["asof"], d["asof"])
+    return finalize_items(items)
+
+
+def test_as_of_matches_brute_force_with_late_events(tmp_path):
+    rnd = random.Random(2)
+    docs = []
+    for _ in range(30):  # random asof order: most batches contain late events
+        batch = [_doc(rnd) for _ in range(rnd.randint(1, 6))]
+        docs += batch
+        RecurrenceHistory(tmp_path, checkpoint_every=7).append_docs(batch)
+        for _ in range(3):
+            at = f"2025-01-{rnd.randint(1, 29):02d}T05:00:00+00:00"
+            got = RecurrenceHistory(tmp_path, checkpoint_every=7).as_of(at)
+            assert json.dumps(got["items"]) == json.dumps(_brute_force(docs, at))
+
+
+def test_late_event_drops_only_later_checkpoints(tmp_path):
+    h = RecurrenceHistory(tmp_path, checkpoint_every=2, checkpoint_keep=10)
+    h.append_docs([{"case_id": "c", "asof": f"2025-01-{d:02d}", "findings": [{"type": "X"}]} for d in range(10, 20)])
+    assert [c[1] for c in h.checkpoints] == [2, 4, 6, 8, 10]
+    h.append_docs([{"case_id": "c", "asof": "2025-01-15T12:00:00", "findings": [{"type": "X"}]}])
+    # checkpoints before the late key survive; the ones after it were rebuilt from the sorted keys
+    assert [c[1] for c in h.checkpoints] == [2, 4, 6, 7, 9]
+    assert not (tmp_path / "checkpoints" / "cp-8.json").exists()
+    assert sum(it["count"] for it in h.as_of("2025-01-16")["items"].values()) == 8
+
+
+def test_append_is_incremental_and_checkpoints_are_thinned(tmp_path):
+    h = RecurrenceHistory(tmp_path, checkpoint_every=5, checkpoint_keep=2)
+    for day in range(1, 201):
+        h = RecurrenceHistory(tmp_path, checkpoint_every=5, checkpoint_keep=2)
+        h.append_docs([{"case_id": "c", "asof": f"2025-01-01T00:00:{day % 60:02d}+00:{day // 60:02d}",
+                        "findings": [{"type": "X"}]}])
+    manifest = (tmp_path / "manifest.json").read_bytes()
+    assert len(manifest) < 2000  # no per-event data outside events.jsonl / events.idx
+    assert (tmp_path / "events.idx").stat().st_size == 200 * 24
+    assert len(h.checkpoints) <= 2 * 6  # keep * log2(200 / 5) levels, not 40
+    assert len(list((tmp_path / "checkpoints").iterdir())) == len(h.checkpoints)
+    h = RecurrenceHistory(tmp_path, checkpoint_every=5)
+    h.append_docs([{"case_id": "c", "asof": "2025-01-02", "findings": [{"type": "X"}]}])
+    assert h._keys is None  # in-order append without a new checkpoint never loads the index
@@ -0,0 +1,62 @@
+import random
+
+from core.recurrence_items import BoundedOrderedSet, RecurrenceItem
+
+
+def _source(case_id, asof="2026-01-01", **extra):
+    return {"case_id": case_id, "asof": asof, **extra}
+
+
+def test_keep_last_evicts_oldest():
+    s = BoundedOrderedSet(maxlen=3, keep="last")
+    assert [s.add(x) for x in "abcd"] == [True] * 4
+    assert s.to_list() == ["b", "c", "d"]
+    assert s.add("c") is False and s.to_list() == ["b", "c", "d"]  # a repeat does not refresh its position
+    assert s.add("a") is True and s.to_list() == ["c", "d", "a"]  # an evicted value is new again
+    assert "b" not in s and len(s) == 3
+
+
+def test_keep_first_ignores_new_entries_once_full():
+    s = BoundedOrderedSet(maxlen=3, keep="first")
+    assert [s.add(x) for x in "abcda"] == [True, True, True, False, False]
+    assert s.to_list() == ["a", "b", "c"] and "d" not in s
+
+
+def test_constructor_dedupes_then_truncates_like_the_mode():
+    values = ["a", "b", "a", "c", "d"]
+    assert BoundedOrderedSet(values, maxlen=3, keep="last").to_list() == ["b", "c", "d"]
+    assert BoundedOrderedSet(values, maxlen=3, keep="first").to_list() == ["a", "b", "c"]
+
+
+def test_key_function_membership_keeps_first_value():
+    key = lambda s: (s["case_id"], s["asof"])
+    s = BoundedOrderedSet([_source("c1", note="first")], maxlen=2, keep="last", key=key)
+    assert _source("c1") in s and _source("c1", asof="other") not in s
+    assert s.add(_source("c1", note="second")) is False
+    assert s.to_list() == [_source("c1", note="first")]
+    s.add(_source("c2"))
+    s.add(_source("c3"))
+    assert [x["case_id"] for x in s] == ["c2", "c3"] and _source("c1") not in s
+
+
+def test_recurrence_item_matches_list_based_updates():
+    rnd = random.Random(7)
+    raw = {"type": "X", "count": 0, "sources": [], "support": [], "examples": [], "extra": 1}
+    item = RecurrenceItem(dict(raw))
+    ref = dict(raw)
+    for n in range(400):
+        case_id, asof = f"c{rnd.randint(0, 30)}", f"a{rnd.randint(0, 2)}"
+        support = [f"s{rnd.randint(0, 300)}" for _ in range(rnd.randint(0, 3))]
+        item.observe(case_id, asof, support, f"t{n}")
+        # the list-based update the item replaced (append, dedupe, keep the last 20 / first 200 / last 5)
+        ref["count"] += 1
+        ref["last_seen"] = f"t{n}"
+        seen, sources = set(), []
+        for s in ref["sources"] + [{"case_id": case_id, "asof": asof}]:
+            if (s["case_id"], s["asof"]) not in seen:
+                seen.add((s["case_id"], s["asof"]))
+                sources.append(s)
+        ref["sources"] = sources[-20:]
+        ref["support"] = list(dict.fromkeys(ref["support"] + support))[:200]
+        ref["examples"] = (ref["examples"] + [{"case_id": case_id, "asof": asof}])[-5:]
+    assert item.to_dict() == ref
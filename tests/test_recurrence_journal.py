@@ -0,0 +1,63 @@
+import multiprocessing as mp
+
+from core import recurrence_journal as rj
+from core.recurrence_update import ingest_findings_doc, finalize_items
+
+DOC = {"case_id": "c1", "asof": "2026-01-01", "findings": [{"type": "MISSING_EVIDENCE", "needs": ["x"]}]}
+
+
+def _append(log_path, n):
+    for _ in range(n):
+        rj.append_findings_docs([DOC], log_path)
+
+
+def _total(log: dict) -> int:
+    return sum(it["count"] for it in log["items"].values())
+
+
+def test_merged_view_matches_compacted_snapshot(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+    rj.append_findings_docs([DOC, {**DOC, "case_id": "c2"}], log_path)
+    merged = rj.load_merged(log_path)
+    assert rj.compact(log_path) == merged
+    assert not rj.journal_files(log_path)
+    assert rj.load_merged(log_path) == merged
+
+
+def test_replay_matches_direct_ingest(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+    rj.append_findings_docs([DOC], log_path)
+    (rec,) = rj.iter_journal(log_path)
+    direct = {"version": "v1.1", "items": {}}
+    ingest_findings_doc(direct, DOC, now=rec["at"])
+    finalize_items(direct["items"])
+    assert rj.load_merged(log_path) == direct
+
+
+def test_compaction_loses_no_concurrent_appends(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+    writers, per_writer = 4, 150
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_append, args=(log_path, per_writer)) for _ in range(writers)]
+    for p in procs:
+        p.start()
+    compactions = 0
+    while any(p.is_alive() for p in procs):
+        rj.compact(log_path)
+        compactions += 1
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    assert _total(rj.load_merged(log_path)) == writers * per_writer
+    assert _total(rj.compact(log_path)) == writers * per_writer
+    assert compactions > 1
+
+
+def test_interrupted_compaction_is_folded_next_time(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+    rj.append_findings_docs([DOC], log_path)
+    rj.rotate_journal(log_path)  # compaction moved the journal aside, then died
+    rj.append_findings_docs([DOC], log_path)
+    assert _total(rj.load_merged(log_path)) == 2
+    assert _total(rj.compact(log_path)) == 2
+    assert not rj.compacting_paths(log_path)
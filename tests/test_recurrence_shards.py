@@ -0,0 +1,86 @@
+import json
+import multiprocessing as mp
+import time
+
+from core import recurrence_journal as rj
+from core import recurrence_shards as rs
+
+
+def _doc(case_id):
+    return {"case_id": case_id, "asof": "2026-01-01", "findings": [{"type": "MISSING_EVIDENCE", "needs": ["x"]}]}
+
+
+def _write(log_path, writer, n):
+    for i in range(n):
+        if i % 2:
+            rj.append_findings_docs([_doc(writer)], log_path)
+        else:
+            rs.write_shard([_doc(writer)], log_path, writer=writer)
+
+
+def _total(log: dict) -> int:
+    return sum(it["count"] for it in log["items"].values())
+
+
+def test_journal_and_shards_merge_in_at_order(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+    rs.write_shard([_doc("s1")], log_path, writer="a")
+    time.sleep(0.002)
+    rj.append_findings_docs([_doc("j1")], log_path)
+    time.sleep(0.002)
+    rs.write_shard([_doc("s2")], log_path, writer="b")
+    (item,) = rs.load_sharded(log_path)["items"].values()
+    assert [e["case_id"] for e in item["examples"]] == ["s1", "j1", "s2"]
+    compacted, n_shards = rs.compact_shards(log_path)
+    assert n_shards == 2
+    assert compacted == rs.load_sharded(log_path)
+    assert not rs.list_shards(log_path) and not rj.journal_files(log_path)
+
+
+def test_compaction_loses_no_concurrent_writes(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+    writers, per_writer = 4, 120
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_write, args=(log_path, f"w{i}", per_writer)) for i in range(writers)]
+    for p in procs:
+        p.start()
+    while any(p.is_alive() for p in procs):
+        assert _total(rs.load_sharded(log_path)) <= writers * per_writer  # never double-counted
+        rs.compact_shards(log_path)
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    assert _total(rs.load_sharded(log_path)) == writers * per_writer
+    assert _total(rs.compact_shards(log_path)[0]) == writers * per_writer
+
+
+def test_out_of_order_journal_lines_merge_in_at_order(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+    rs.write_shard([_doc("s1")], log_path, writer="a")
+    time.sleep(0.002)
+    rj.append_findings_docs([_doc("j1")], log_path)
+    time.sleep(0.002)
+    rj.append_findings_docs([_doc("j2")], log_path)
+    # two appenders that took `at` in one order and wrote in the other
+    jp = rj.journal_path(log_path)
+    jp.write_text("".join(reversed(jp.read_text(encoding="utf-8").splitlines(keepends=True))), encoding="utf-8")
+    time.sleep(0.002)
+    rs.write_shard([_doc("s2")], log_path, writer="b")
+    (item,) = rs.load_sharded(log_path)["items"].values()
+    assert [e["case_id"] for e in item["examples"]] == ["s1", "j1", "j2", "s2"]
+
+
+def test_write_shard_streams_and_leaves_no_temp(tmp_path):
+    log_path = tmp_path / "recurrence_log.json"
+
+    def docs():
+        yield _doc("a")
+        yield {"case_id": "empty", "findings": []}
+        yield _doc("b")
+
+    path, n = rs.write_shard(docs(), log_path, writer="w")
+    assert n == 2 and rs.list_shards(log_path) == [path]
+    ats = [json.loads(line)["at"] for line in path.read_text(encoding="utf-8").splitlines()]
+    assert ats == sorted(ats)
+    assert rs.write_shard([], log_path, writer="w")[1] == 0
+    assert sorted(p.name for p in rs.shard_dir(log_path).iterdir()) == [path.name]
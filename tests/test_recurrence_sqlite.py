@@ -0,0 +1,83 @@
+import json
+import multiprocessing as mp
+
+from core import recurrence_sqlite as rs
+from core.recurrence_update import update_recurrence_docs
+
+
+def _docs(n: int = 30) -> list:
+    docs = []
+    for i in range(n):
+        findings = [
+            {"type": "MISSING_EVIDENCE", "needs": [f"n{i % 4}", "shared"]},
+            {"type": "STRUCTURAL_ANOMALY", "tag": "COORDINATION", "signals": {f"s{i % 3}": 1}},
+        ]
+        if i % 5 == 0:
+            findings.append({"type": "CONFLICT", "claim": f"rare {i % 2}", "delta": {"k": i % 2}})
+        docs.append({"case_id": f"c{i % 7}", "asof": f"2026-01-{1 + i % 28:02d}", "findings": findings})
+    return docs
+
+
+def _no_times(log: dict) -> dict:
+    return {fp: {k: v for k, v in it.items() if k not in ("first_seen", "last_seen")}
+            for fp, it in log["items"].items()}
+
+
+def test_sqlite_matches_json_log(tmp_path):
+    docs = _docs()
+    ref, _ = update_recurrence_docs(docs[:12], tmp_path / "log.json")
+    ref, _ = update_recurrence_docs(docs[12:], tmp_path / "log.json")
+    db = tmp_path / "log.sqlite"
+    rs.update_recurrence_sqlite_docs(docs[:12], db)
+    n = rs.update_recurrence_sqlite_docs(docs[12:], db)
+    conn = rs.connect(db)
+    try:
+        got = rs.export_log(conn)
+        assert n == len(ref["items"])
+        assert list(got["items"]) == list(ref["items"])
+        assert _no_times(got) == _no_times(ref)
+        rows = rs.query_items(conn, type="STRUCTURAL_ANOMALY", tag="COORDINATION", limit=2)
+        ranked = sorted((fp for fp, it in ref["items"].items() if it["tag"] == "COORDINATION"),
+                        key=lambda fp: -ref["items"][fp]["count"])
+        assert [r["fp"] for r in rows] == ranked[:2]
+        assert all(r["sources"] and r["support"] and r["examples"] for r in rows)
+    finally:
+        conn.close()
+
+
+def test_import_export_round_trip_keeps_extra_keys(tmp_path):
+    log, _ = update_recurrence_docs(_docs(10), tmp_path / "log.json")
+    first = next(iter(log["items"]))
+    log["items"][first]["promotion"] = {"state": "candidate", "score": 0.5}
+    log["items"][first]["note"] = "kept"
+    conn = rs.connect(tmp_path / "log.sqlite")
+    try:
+        rs.import_log(conn, log)
+        out = rs.export_log(conn)
+    finally:
+        conn.close()
+    assert json.dumps(out) == json.dumps(log)
+
+
+def _update(db, docs):
+    for d in docs:
+        rs.update_recurrence_sqlite_docs([d], db)
+
+
+def test_concurrent_writers_lose_no_updates(tmp_path):
+    db = tmp_path / "log.sqlite"
+    rs.connect(db).close()
+    docs = _docs(20)
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=_update, args=(db, docs)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+    conn = rs.connect(db)
+    try:
+        total = sum(it["count"] for it in rs.export_log(conn)["items"].values())
+    finally:
+        conn.close()
+    assert total == 3 * sum(len(d["findings"]) for d in docs)
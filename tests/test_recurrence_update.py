@@ -0,0 +1,83 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from core import recurrence_update as ru
+from core.recurrence_cluster import ClusterIndex
+from core.recurrence_history import RecurrenceHistory
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _run(*args):
+    return subprocess.run([sys.executable, str(ROOT / "core" / "recurrence_update.py"), *map(str, args)],
+                          capture_output=True, text=True, cwd=ROOT)
+
+
+def _jsonl(tmp_path, n: int = 5) -> Path:
+    p = tmp_path / "findings.jsonl"
+    docs = [{"case_id": f"c{i}", "asof": f"2026-01-{i + 1:02d}", "findings": [{"type": "X", "needs": [f"n{i}"]}]}
+            for i in range(n)]
+    p.write_text("".join(json.dumps(d) + "\n" for d in docs), encoding="utf-8")
+    return p
+
+
+def test_every_sink_sees_every_document(tmp_path):
+    log, hist, clusters = tmp_path / "log.json", tmp_path / "history", tmp_path / "clusters.jsonl"
+    res = _run("--in", _jsonl(tmp_path), "--log", log, "--history", hist, "--clusters", clusters)
+    assert res.returncode == 0, res.stderr
+    items = json.loads(log.read_text(encoding="utf-8"))["items"]
+    assert len(items) == 5
+    assert len(RecurrenceHistory(hist)) == 5
+    assert set(ClusterIndex(clusters).mapping()) == set(items)
+
+
+def test_backends_are_exclusive(tmp_path):
+    res = _run("--in", _jsonl(tmp_path), "--log", tmp_path / "log.json", "--db", tmp_path / "log.sqlite", "--journal")
+    assert res.returncode != 0 and "at most one" in res.stderr
+    assert not (tmp_path / "log.sqlite").exists()
+
+
+def _docs(n: int) -> list:
+    return [{"case_id": f"c{i % 3}", "asof": f"2026-01-{i % 28 + 1:02d}",
+             "findings": [{"type": "X", "needs": [f"n{i % 4}"]}, {"type": "Y", "tag": "T", "needs": ["m", f"k{i}"]}]}
+            for i in range(n)]
+
+
+def _without_times(log: dict) -> dict:
+    return {fp: {k: v for k, v in it.items() if k not in ("first_seen", "last_seen")} for fp, it in log["items"].items()}
+
+
+def test_many_inputs_match_one_update_per_file(tmp_path):
+    src = tmp_path / "src"
+    docs = _docs(9)
+    (src / "d" / "sub").mkdir(parents=True)
+    (src / "g").mkdir()
+    (src / "one.json").write_text(json.dumps(docs[0]), encoding="utf-8")
+    (src / "d" / "mmar_findings_b.json").write_text(json.dumps(docs[2]), encoding="utf-8")
+    (src / "d" / "mmar_findings_a.json").write_text(json.dumps(docs[1]), encoding="utf-8")
+    (src / "d" / "sub" / "mmar_findings.jsonl").write_text("".join(json.dumps(d) + "\n" for d in docs[3:5]),
+                                                            encoding="utf-8")
+    # not findings: a directory scan must skip them
+    (src / "d" / "recurrence_log.json").write_text(json.dumps({"version": "v1.1", "items": {}}), encoding="utf-8")
+    (src / "d" / "decision_gate.json").write_text(json.dumps({"severity": "PASS"}), encoding="utf-8")
+    (src / "d" / "recurrence_log.journal.jsonl").write_text('{"fp": "x"}\n', encoding="utf-8")
+    for i, d in enumerate(docs[5:7]):
+        (src / "g" / f"{i}.json").write_text(json.dumps(d), encoding="utf-8")
+    (src / "tail.jsonl").write_text("".join(json.dumps(d) + "\n" for d in docs[7:]), encoding="utf-8")
+
+    inputs = [src / "one.json", src / "d", str(src / "g" / "*.json"), src / "tail.jsonl"]
+    assert [p.name for p in ru.resolve_inputs(inputs)] == [
+        "one.json", "mmar_findings_a.json", "mmar_findings_b.json", "mmar_findings.jsonl", "0.json", "1.json",
+        "tail.jsonl"]
+    many, n = ru.update_recurrence_many(inputs, tmp_path / "many.json")
+    assert n == len(docs)
+
+    for i, d in enumerate(docs):
+        f = tmp_path / "one_by_one" / f"{i}.json"
+        f.parent.mkdir(exist_ok=True)
+        f.write_text(json.dumps(d), encoding="utf-8")
+        single = ru.update_recurrence(f, tmp_path / "single.json")
+    assert _without_times(many) == _without_times(single)
+    assert json.loads((tmp_path / "many.json").read_text(encoding="utf-8"))["items"].keys() == single["items"].keys()
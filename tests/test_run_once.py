@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+from core import run_once
+from core.gate_cache import GateCache
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+ASOF = EXAMPLES / "asof_pack.example.json"
+NOW = "2026-01-01T00:00:00+00:00"
+
+
+def _deltas():
+    base = json.loads((EXAMPLES / "delta_entry.pass.json").read_text(encoding="utf-8"))
+    out = []
+    for i in range(12):
+        d = dict(base, delta_id=f"d{i}")
+        if i % 3 == 1:
+            d.update(severity="DELAY", until=None, evidence=[])
+        elif i % 3 == 2:
+            d.update(severity="BLOCK", block=True, reason_codes=[f"R{i}"])
+        out.append(d)
+    return out
+
+
+def _batch_dir(tmp_path):
+    src = tmp_path / "in"
+    src.mkdir()
+    for i, d in enumerate(_deltas()):
+        (src / f"{i:03d}.json").write_text(json.dumps(d, indent=2), encoding="utf-8")
+    return src
+
+
+def _tree(path: Path) -> dict:
+    return {p.name: p.read_bytes() for p in sorted(path.iterdir())}
+
+
+def test_batch_dir_is_byte_identical_to_single_runs(tmp_path):
+    src = _batch_dir(tmp_path)
+    assert run_once.main(["--asof", str(ASOF), "--batch", str(src), "--out", str(tmp_path / "batch"), "--now", NOW]) == 0
+    for f in sorted(src.iterdir()):
+        single = tmp_path / "single" / f.name
+        assert run_once.main(["--asof", str(ASOF), "--delta", str(f), "--out", str(single), "--now", NOW]) == 0
+    assert _tree(tmp_path / "batch") == _tree(tmp_path / "single")
+
+
+def test_workers_keep_order_and_bytes(tmp_path):
+    src = _batch_dir(tmp_path)
+    asof = json.loads(ASOF.read_text(encoding="utf-8"))
+    now = run_once.datetime.fromisoformat(NOW)
+    assert run_once.run_batch(asof, src, tmp_path / "serial.jsonl", now=now) == 12
+    assert run_once.run_batch(asof, src, tmp_path / "pool.jsonl", workers=2, chunksize=5, now=now) == 12
+    assert (tmp_path / "pool.jsonl").read_bytes() == (tmp_path / "serial.jsonl").read_bytes()
+    lines = (tmp_path / "serial.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(x)["severity"] for x in lines] == [d["severity"] for d in _deltas()]
+
+
+def test_jsonl_input_names(tmp_path):
+    src = tmp_path / "in.jsonl"
+    src.write_text("\n".join(json.dumps(d) for d in _deltas()[:3]) + "\n\n", encoding="utf-8")
+    assert [name for name, _ in run_once.iter_batch(src)] == ["000001.json", "000002.json", "000003.json"]
+
+
+def test_cached_rerun_matches(tmp_path):
+    src = _batch_dir(tmp_path)
+    asof = json.loads(ASOF.read_text(encoding="utf-8"))
+    now = run_once.datetime.fromisoformat(NOW)
+    cache = GateCache(tmp_path / "cache.json")
+    run_once.run_batch(asof, src, tmp_path / "a", cache=cache, now=now)
+    cache.save()
+
+    cache = GateCache(tmp_path / "cache.json")
+    puts = []
+    put = cache.put
+    cache.put = lambda key, gate: puts.append(key) or put(key, gate)
+    run_once.run_batch(asof, src, tmp_path / "b", workers=2, cache=cache, now=now)
+    assert (cache.hits, cache.misses) == (12, 0)
+    assert puts == []  # hits are not re-stored
+    assert _tree(tmp_path / "a") == _tree(tmp_path / "b")
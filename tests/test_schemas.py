@@ -0,0 +1,73 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from core.schemas import SCHEMA_FILES, compiled_validator, fast_check
+
+pytest.importorskip("jsonschema")
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+
+VALID = {
+    "asof_pack": json.loads((EXAMPLES / "asof_pack.example.json").read_text(encoding="utf-8")),
+    "mmar_findings": json.loads((EXAMPLES / "mmar_findings.example.json").read_text(encoding="utf-8")),
+    "delta_entry": {"delta_id": "c:a:h", "severity": "DELAY", "until": None, "block": False,
+                    "evidence": ["x"], "changes": [{"type": "X"}], "meta": {}},
+    "decision_gate": {"severity": "DELAY", "until": "2026-01-01T00:00:00+00:00", "evidence": ["x"],
+                      "reason_codes": ["R"], "upstream_reason_codes": [], "evidence_paths": [],
+                      "suggested_fix": [], "recheck": [], "next_action": None},
+    "intervene": {"action": "NONE", "stagnation": False, "reason": ["r"], "ev_continue": 1.0,
+                  "ev_intervene": 0, "profile": {}},
+}
+
+# one value of every JSON shape the schemas distinguish
+VALUES = [None, True, False, 0, 1.5, "", "x", "PASS", "low", "high", [], ["x"], [""], [1], {}, {"a": 1},
+          {"externality": "low"}, {"externality": "nope"}, {"other": "low"}]
+
+
+def _mutations(doc: dict):
+    yield doc
+    yield "not an object"
+    yield {**doc, "zz_extra": 1}
+    for k in doc:
+        yield {kk: v for kk, v in doc.items() if kk != k}
+        for v in VALUES:
+            yield {**doc, k: v}
+    for k in ("summary", "request", "impact", "meta", "tag"):  # optional keys absent from the base docs
+        for v in VALUES:
+            yield {**doc, k: v}
+
+
+def _finding_mutations(doc: dict):
+    base = doc["findings"][0]
+    for k in ("type", "tag", "claim", "needs", "delta", "signals", "zz_extra"):
+        yield {**doc, "findings": [{kk: v for kk, v in base.items() if kk != k}]}
+        for v in VALUES + ["MISSING_EVIDENCE", ["a", ""]]:
+            yield {**doc, "findings": [{**base, k: v}]}
+    yield {**doc, "findings": ["not an object"]}
+    yield {**doc, "findings": [{**base, "signals": {"k": [1], "j": None, "i": {"x": 1}}}]}
+
+
+def _cases():
+    for name, doc in VALID.items():
+        docs = list(_mutations(doc))
+        if name == "mmar_findings":
+            docs += list(_finding_mutations(doc))
+        for i, d in enumerate(docs):
+            yield pytest.param(name, d, id=f"{name}-{i}")
+
+
+def test_valid_bases_are_valid():
+    for name, doc in VALID.items():
+        assert not list(compiled_validator(name).iter_errors(doc)), name
+        assert not fast_check(name, doc), name
+    assert set(VALID) == set(SCHEMA_FILES)
+
+
+@pytest.mark.parametrize("name,doc", list(_cases()))
+def test_fast_path_agrees_with_jsonschema(name, doc):
+    full_ok = not list(compiled_validator(name).iter_errors(copy.deepcopy(doc)))
+    fast_ok = not fast_check(name, doc)
+    assert fast_ok == full_ok, fast_check(name, doc)
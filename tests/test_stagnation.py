@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from core import pipeline
+from core.stagnation import HORIZON_DAYS, StagnationDetector, WindowCounter
+
+H = 3600.0
+GAP = {"type": "MISSING_EVIDENCE", "needs": ["trace"]}
+
+
+def _det(**kw):
+    return StagnationDetector(None, window_s=24 * H, buckets=24, **kw)
+
+
+def test_window_counter_expires_old_buckets():
+    ctr = WindowCounter()
+    ctr.add(10, 2, lo=0)
+    ctr.add(12, 1, lo=0)
+    ctr.add(11, 4, lo=0)  # late event lands in its own bucket
+    assert [b for b, _ in ctr.q] == [10, 11, 12] and ctr.total == 7
+    assert ctr.sum_since(11) == 5
+    ctr.add(40, 1, lo=12)  # buckets 10, 11 fall out of the window
+    assert [b for b, _ in ctr.q] == [12, 40] and ctr.total == 2
+    ctr.add(5, 1, lo=12)  # older than the window: ignored
+    assert ctr.total == 2
+
+
+def test_repeats_without_progress_are_stagnant():
+    det = _det()
+    for hour in range(0, 30, 6):
+        det.observe_findings("c1", [GAP], at=hour * H)
+    st = det.status("c1", now=30 * H)
+    assert st["stagnant"] and st["resolved_count"] == 0
+    assert st["repeating"][0]["type"] == "MISSING_EVIDENCE"
+
+
+def test_progress_and_window_expiry():
+    det = _det()
+    det.observe_findings("c1", [GAP], at=0)
+    det.observe_findings("c1", [GAP], at=H)
+    assert not det.status("c1", now=2 * H)["stagnant"]  # not quiet for a whole window yet
+    det.observe_findings("c1", [], at=2 * H)  # the gap closes: progress
+    det.observe_findings("c1", [GAP], at=3 * H)
+    det.observe_findings("c1", [GAP], at=4 * H)
+    st = det.status("c1", now=20 * H)
+    assert not st["stagnant"] and st["resolved_count"] == 1
+    # a day later the resolution and the old repeats have left the window
+    st = det.status("c1", now=60 * H)
+    assert st["resolved_count"] == 0 and st["repeating"] == [] and not st["stagnant"]
+    assert det.prune(now=60 * H) == 0  # the open gap keeps the case
+    det.observe_findings("c1", [], at=61 * H)
+    assert det.prune(now=90 * H) == 1 and len(det) == 0
+
+
+def test_deadline_compresses_the_window():
+    det = _det()
+    assert det.window_for(None) == det.window_for(HORIZON_DAYS) == 24 * H
+    assert det.window_for(HORIZON_DAYS / 4) == 6 * H
+    assert det.window_for(0) == H  # never below one bucket
+    for hour in (0, 4, 5):
+        det.observe_findings("c1", [GAP], at=hour * H)
+    assert not det.status("c1", now=8 * H)["stagnant"]
+    assert det.status("c1", now=8 * H, deadline_days=HORIZON_DAYS / 4)["stagnant"]
+
+
+def test_missing_event_time_uses_the_latest_event():
+    det = _det()
+    with pytest.raises(ValueError):
+        det.observe_findings("c1", [GAP], at=None)
+    det.observe_findings("c1", [GAP], at="2026-01-01T00:00:00+00:00")
+    det.observe_findings("c1", [GAP], at="unknown")
+    st = det.status("c1")
+    assert st["since_progress_s"] == 0.0 and st["repeating"][0]["count"] == 2
+
+
+def test_pipeline_decides_intervene_once(tmp_path, monkeypatch):
+    examples = Path(__file__).resolve().parents[1] / "examples"
+    asof = json.loads((examples / "asof_pack.example.json").read_text(encoding="utf-8"))
+    doc = json.loads((examples / "mmar_findings.example.json").read_text(encoding="utf-8"))
+    calls = []
+    real = pipeline.decide_intervene
+    monkeypatch.setattr(pipeline, "decide_intervene", lambda *a, **kw: calls.append(kw) or real(*a, **kw))
+    recs = list(pipeline.pipeline(asof, {}, [doc, doc], stagnation=_det()))
+    assert len(calls) == 2 and all("stagnation" in kw for kw in calls)
+    assert all(r["intervene"] is not None for r in recs)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+LIMIT = 64 * 1024 * 1024
+
+
+def _pct(sorted_vals: list, q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+async def _read_ndjson(reader) -> bytes:
+    return await reader.readline()
+
+
+async def _read_http(reader) -> bytes:
+    head = await reader.readuntil(b"\r\n\r\n")
+    n = 0
+    for h in head.decode("latin-1").split("\r\n"):
+        if h.lower().startswith("content-length:"):
+            n = int(h.split(":", 1)[1])
+    return await reader.readexactly(n)
+
+
+async def _connection(reader, writer, frame: bytes, read_one, n: int, depth: int, lat: list):
+    """Send n requests with up to `depth` in flight (pipelined); record per-request latency."""
+    window = asyncio.Semaphore(depth)
+    sent = asyncio.Queue()
+
+    async def _responses():
+        for _ in range(n):
+            body = await read_one(reader)
+            t0 = sent.get_nowait()
+            lat.append(time.perf_counter() - t0)
+            window.release()
+            resp = json.loads(body)
+            if not resp.get("ok"):
+                raise RuntimeError(resp.get("error"))
+
+    async def _requests():
+        for _ in range(n):
+            await window.acquire()
+            sent.put_nowait(time.perf_counter())
+            writer.write(frame)
+            await writer.drain()
+
+    # a failed response stops the receiver; cancel the sender too, or it waits on the window forever
+    tasks = [asyncio.create_task(_requests()), asyncio.create_task(_responses())]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for t in tasks:
+            t.cancel()
+        writer.close()
+
+
+async def run(args) -> dict:
+    req = json.loads(Path(args.request).read_text(encoding="utf-8"))
+    req.setdefault("op", args.op)
+    payload = json.dumps(req, ensure_ascii=False).encode("utf-8")
+    # spread the remainder so exactly args.requests are sent
+    q, r = divmod(args.requests, args.concurrency)
+    per_conn = [q + (i < r) for i in range(args.concurrency)]
+    lat = []
+
+    async def _one(n: int):
+        if args.unix:
+            reader, writer = await asyncio.open_unix_connection(args.unix, limit=LIMIT)
+            frame, read_one = payload + b"\n", _read_ndjson
+        else:
+            host, _, port = args.http.rpartition(":")
+            reader, writer = await asyncio.open_connection(host or "127.0.0.1", int(port), limit=LIMIT)
+            frame = (f"POST /v1/{req['op']} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n\r\n").encode("latin-1") + payload
+            read_one = _read_http
+        await _connection(reader, writer, frame, read_one, n, args.depth, lat)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_one(n) for n in per_conn if n))
+    wall = time.perf_counter() - t0
+
+    lat.sort()
+    return {
+        "requests": len(lat),
+        "concurrency": args.concurrency,
+        "depth": args.depth,
+        "wall_s": wall,
+        "rps": len(lat) / wall if wall else 0.0,
+        "p50_ms": _pct(lat, 0.50) * 1000,
+        "p99_ms": _pct(lat, 0.99) * 1000,
+        "max_ms": (lat[-1] if lat else 0.0) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="load-test client for core.gate_service (p50/p99 latency)")
+    ap.add_argument("--unix", default=None, help="service Unix socket path")
+    ap.add_argument("--http", default=None, help="service HOST:PORT")
+    ap.add_argument("--request", required=True, help="path to one request JSON (sent repeatedly)")
+    ap.add_argument("--op", default="gate", help="op if the request file has none")
+    ap.add_argument("--requests", type=int, default=10000)
+    ap.add_argument("--concurrency", type=int, default=8, help="parallel connections")
+    ap.add_argument("--depth", type=int, default=8, help="pipelined in-flight requests per connection")
+    args = ap.parse_args()
+    if not args.unix and not args.http:
+        ap.error("give --unix or --http")
+
+    out = asyncio.run(run(args))
+    print(f"[loadtest] requests={out['requests']} conc={out['concurrency']} depth={out['depth']} "
+          f"rps={out['rps']:.0f} p50={out['p50_ms']:.2f}ms p99={out['p99_ms']:.2f}ms max={out['max_ms']:.2f}ms")
@@ -0,0 +1,214 @@
+import itertools
+import sys
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core.jsonio import load_json as _load_json, save_json as _save_json
+from tools.intervene_gate import decide_intervene
+
+try:  # optional; only the batch API needs it
+    import numpy as np
+except ImportError:
+    np = None
+
+ACTIONS = ("NONE", "SUBTRACT", "ADD_MODEL")
+SWEEP_VERSION = "intervene-sweep-v0.1"
+
+# CLI flag -> profile key, value parser
+SWEEP_AXES = {
+    "deadline_days": float,
+    "budget_mode": str,
+    "base_p_break": float,
+    "window_cost": float,
+    "intervene_cost_subtract": float,
+    "intervene_cost_add_model": float,
+    "value_breakthrough": float,
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is not installed (python -m pip install numpy); use tools/intervene_gate.py per case")
+
+
+def _measured(s) -> bool:
+    return bool(s.get("stagnant")) if isinstance(s, dict) else bool(s)
+
+
+def gate_features(gates, stagnation=None) -> dict:
+    """
+    Per-gate inputs of decide_intervene as (N,) arrays.
+    stagnation: optional per-gate measured flags (see decide_intervene); None entries keep the heuristic.
+    """
+    _require_numpy()
+    sev, stag = [], []
+    for i, g in enumerate(gates):
+        codes = [x for x in ((g.get("reason_codes", []) or []) + (g.get("upstream_reason_codes", []) or []))
+                 if isinstance(x, str)]
+        sev.append(g.get("severity"))
+        s = stagnation[i] if stagnation is not None else None
+        if s is not None:
+            stag.append(_measured(s))
+        else:
+            stag.append("MMAR_DELAY_EVIDENCE_GAP" in codes or "AUTO_DELAY_NO_EVIDENCE" in codes)
+    sev = np.array(sev, dtype=object)
+    return {
+        "block": sev == "BLOCK",
+        "delay": sev == "DELAY",
+        "pass": sev == "PASS",
+        "stagnation": np.array(stag, dtype=bool),
+    }
+
+
+def profile_features(profiles) -> dict:
+    """Per-profile inputs of decide_intervene as (M,) arrays (same defaults/coercion as the scalar code)."""
+    _require_numpy()
+
+    def col(key, default):
+        return np.array([float(p.get(key, default)) for p in profiles], dtype=np.float64)
+
+    mode = [p.get("budget_mode", "tight") for p in profiles]
+    return {
+        "tight": np.array([m == "tight" for m in mode], dtype=bool),
+        "ample": np.array([m == "ample" for m in mode], dtype=bool),
+        "deadline_days": col("deadline_days", 30),
+        "window_cost": col("window_cost", 1.0),
+        "c_sub": col("intervene_cost_subtract", 1.0),
+        "c_add": col("intervene_cost_add_model", 2.0),
+        "V": col("value_breakthrough", 10.0),
+        "base_p": col("base_p_break", 0.15),
+    }
+
+
+def decide_intervene_batch(gates, profiles, stagnation=None) -> dict:
+    """
+    decide_intervene for every (gate, profile) pair at once.
+    stagnation: optional per-gate measured flags, as decide_intervene(..., stagnation=).
+    Returns (N, M) arrays: ev_continue, ev_subtract, ev_add_model, ev_intervene,
+    action (index into ACTIONS); plus stagnation (N,).
+    Same float operations in the same order as the scalar code, so values are identical.
+    """
+    g = gate_features(gates, stagnation)
+    p = profile_features(profiles)
+    block, delay, pas, stag = (g[k][:, None] for k in ("block", "delay", "pass", "stagnation"))
+
+    # p_continue = base_p, then *0.05 (BLOCK) or *0.4 (DELAY + stagnation); x*1.0 is exact
+    factor = np.where(block, 0.05, np.where(delay & stag, 0.4, 1.0))
+    p_continue = p["base_p"][None, :] * factor
+
+    near = p["deadline_days"] <= 7
+    p_sub = np.minimum(0.95, p_continue + np.where(p["tight"] | near, 0.20, 0.10))
+    V_sub = p["V"] * 0.85
+    p_add = np.minimum(0.95, p_continue + np.where(p["ample"], 0.25, 0.15))
+
+    ev_continue = (p_continue * p["V"]) - p["window_cost"]
+    ev_subtract = (p_sub * V_sub) - p["window_cost"] - p["c_sub"]
+    ev_add_model = (p_add * p["V"]) - p["window_cost"] - p["c_add"]
+
+    action = np.where(ev_subtract > ev_continue, 1, 0)
+    ev_intervene = np.where(action == 1, ev_subtract, ev_continue)
+    take_add = ev_add_model > ev_intervene
+    action = np.where(take_add, 2, action)
+    ev_intervene = np.where(take_add, ev_add_model, ev_intervene)
+
+    # guardrail: PASS without stagnation => NONE
+    guard = pas & ~stag
+    action = np.where(guard, 0, action).astype(np.int8)
+    ev_intervene = np.where(guard, ev_continue, ev_intervene)
+
+    return {
+        "action": action,
+        "ev_continue": ev_continue,
+        "ev_subtract": ev_subtract,
+        "ev_add_model": ev_add_model,
+        "ev_intervene": ev_intervene,
+        "stagnation": g["stagnation"],
+    }
+
+
+def action_mix(batch: dict) -> list[dict]:
+    """Per profile (column): {"NONE": n, "SUBTRACT": n, "ADD_MODEL": n}."""
+    a = batch["action"]
+    counts = np.stack([(a == i).sum(axis=0) for i in range(len(ACTIONS))], axis=1)
+    return [dict(zip(ACTIONS, (int(c) for c in row))) for row in counts]
+
+
+def verify_against_scalar(gates, profiles, batch: dict, stagnation=None) -> int:
+    """Compare every pair with decide_intervene; returns the number of mismatches."""
+    bad = 0
+    for i, g in enumerate(gates):
+        for j, prof in enumerate(profiles):
+            ref = decide_intervene(g, prof, stagnation=stagnation[i] if stagnation is not None else None)
+            c = ref["ev_candidates"]
+            if (ACTIONS[batch["action"][i, j]] != ref["action"]
+                    or bool(batch["stagnation"][i]) != ref["stagnation"]
+                    or float(batch["ev_continue"][i, j]) != c["CONTINUE"]
+                    or float(batch["ev_subtract"][i, j]) != c["SUBTRACT"]
+                    or float(batch["ev_add_model"][i, j]) != c["ADD_MODEL"]
+                    or float(batch["ev_intervene"][i, j]) != ref["ev_intervene"]):
+                bad += 1
+    return bad
+
+
+def sweep_profiles(base: dict, axes: dict) -> tuple[list[dict], list[dict]]:
+    """Cartesian grid over `axes` ({profile key: [values]}) on top of `base`. Returns (overrides, profiles)."""
+    keys = list(axes)
+    overrides = [dict(zip(keys, combo)) for combo in itertools.product(*(axes[k] for k in keys))]
+    return overrides, [dict(base, **o) for o in overrides]
+
+
+def _load_gates(path: Path) -> list[dict]:
+    from core.run_once import iter_batch
+
+    if path.is_dir() or path.suffix == ".jsonl":
+        return [doc for _, doc in iter_batch(path)]
+    return [_load_json(path, {})]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="N gates x M profiles intervene batch / what-if sweep")
+    ap.add_argument("--gates", required=True, help="decision_gate.json, a directory of them, or a .jsonl")
+    ap.add_argument("--profile", default=None, help="base intervene_profile.json (default: built-in defaults)")
+    for key, typ in SWEEP_AXES.items():
+        ap.add_argument(f"--{key.replace('_', '-')}", dest=key, default=None,
+                        help=f"comma-separated {typ.__name__} values to sweep for {key}")
+    ap.add_argument("--verify", action="store_true", help="check every pair against decide_intervene")
+    ap.add_argument("--out", required=True, help="path to sweep report JSON")
+    args = ap.parse_args()
+
+    gates = _load_gates(Path(args.gates))
+    base = _load_json(Path(args.profile), {}) if args.profile else {}
+    axes = {k: [typ(v) for v in getattr(args, k).split(",")] for k, typ in SWEEP_AXES.items() if getattr(args, k)}
+    overrides, profiles = sweep_profiles(base, axes)
+
+    try:
+        t0 = time.perf_counter()
+        batch = decide_intervene_batch(gates, profiles)
+        elapsed = time.perf_counter() - t0
+    except ImportError as e:
+        sys.exit(str(e))
+
+    mean_ev = batch["ev_intervene"].mean(axis=0) if gates else [0.0] * len(profiles)
+    out = {
+        "version": SWEEP_VERSION,
+        "n_gates": len(gates),
+        "base_profile": base,
+        "axes": axes,
+        "grid": [
+            {"profile": o, "mix": mix, "mean_ev_intervene": float(ev)}
+            for o, mix, ev in zip(overrides, action_mix(batch), mean_ev)
+        ],
+    }
+    if args.verify:
+        out["verify_mismatches"] = verify_against_scalar(gates, profiles, batch)
+    _save_json(Path(args.out), out)
+    msg = f"[intervene-sweep] gates={len(gates)} profiles={len(profiles)} ms={elapsed * 1000:.2f}"
+    if args.verify:
+        msg += f" mismatches={out['verify_mismatches']}"
+    print(f"{msg} -> {args.out}")
+    if args.verify and out["verify_mismatches"]:
+        sys.exit(1)
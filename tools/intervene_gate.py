@@ -1,19 +1,13 @@
-import json
+import sys
 from pathlib import Path
 
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core import metrics
+from core.jsonio import load_json as _load_json, save_json as _save_json
 
-def _load_json(p: Path, default):
-    if not p.exists():
-        return default
-    return json.loads(p.read_text(encoding="utf-8"))
 
-
-def _save_json(p: Path, obj):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
-def decide_intervene(gate: dict, profile: dict) -> dict:
+def decide_intervene(gate: dict, profile: dict, stagnation=None) -> dict:
     """
     v0 EV-based intervene:
       - Uses gate severity + reason_codes/upstream_reason_codes to estimate p_break.
@@ -22,6 +16,10 @@ def decide_intervene(gate: dict, profile: dict) -> dict:
     Intuition:
       - tight budget or near deadline => SUBTRACT earlier
       - ample budget & stalled => ADD_MODEL can win
+
+    stagnation (optional): a measured flag, e.g. core.stagnation.StagnationDetector.status()
+    (or a bool). It replaces the evidence-gap guess from this one gate's reason codes.
+    None (default) keeps the reason-code heuristic.
     """
     severity = gate.get("severity")
     reason_codes = gate.get("reason_codes", []) or []
@@ -37,12 +35,15 @@ def decide_intervene(gate: dict, profile: dict) -> dict:
     base_p = float(profile.get("base_p_break", 0.15))
 
     reasons = []
-    stagnation = False
+    measured, stagnation = stagnation, False
 
     # heuristics: evidence gap & delay indicates stagnation-ish
     if "MMAR_DELAY_EVIDENCE_GAP" in codes or "AUTO_DELAY_NO_EVIDENCE" in codes:
         stagnation = True
         reasons.append("evidence_gap")
+    if measured is not None:
+        stagnation = bool(measured.get("stagnant")) if isinstance(measured, dict) else bool(measured)
+        reasons.append("stagnation_window" if stagnation else "progress_window")
 
     if deadline_days <= 7:
         reasons.append("deadline_near")
@@ -119,14 +120,29 @@ def decide_intervene(gate: dict, profile: dict) -> dict:
 
 if __name__ == "__main__":
     import argparse
+
+    from core.schemas import SchemaValidationError, add_validate_arg, validate
+
     ap = argparse.ArgumentParser()
     ap.add_argument("--gate", required=True, help="path to decision_gate.json")
     ap.add_argument("--profile", required=True, help="path to intervene_profile.json")
     ap.add_argument("--out", required=True, help="path to intervene.json")
+    ap.add_argument("--compact", action="store_true", help="write compact JSON (machine-to-machine)")
+    add_validate_arg(ap)
+    metrics.add_metrics_args(ap)
     args = ap.parse_args()
+    metrics.start_from_args(args)
 
     gate = _load_json(Path(args.gate), {})
     profile = _load_json(Path(args.profile), {})
-    out = decide_intervene(gate, profile)
-    _save_json(Path(args.out), out)
+    try:
+        validate("decision_gate", gate, args.validate, where=args.gate)
+        with metrics.stage("intervene"):
+            out = decide_intervene(gate, profile)
+        validate("intervene", out, args.validate, where=args.out)
+    except SchemaValidationError as e:
+        sys.exit(str(e))
+    metrics.count("intervene_actions", 1, action=out["action"])
+    _save_json(Path(args.out), out, compact=args.compact)
+    metrics.finish_from_args(args, "intervene")
     print(f"[intervene] action={out['action']} ev_continue={out['ev_continue']:.3f} ev_intervene={out['ev_intervene']:.3f} -> {args.out}")
@@ -1,18 +1,21 @@
-import json
-from pathlib import Path
-from collections import defaultdict
+import hashlib
+import sys
+import zipfile
+from pathlib import Path, PurePosixPath
 from datetime import datetime, timezone
 
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from core import metrics
+from core.jsonio import load_json as _load_json, loads as _loads, save_json as _save_json
+from core.recurrence_journal import journal_files, load_merged
+from core.recurrence_shards import list_shards, load_sharded, shard_dir
+from core import recurrence_sqlite
+from core.parallel import ordered_map
 
-def _load_json(p: Path, default):
-    if not p.exists():
-        return default
-    return json.loads(p.read_text(encoding="utf-8"))
-
-
-def _save_json(p: Path, obj):
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+SQLITE_SUFFIXES = (".sqlite", ".db")
+ZIP_MEMBER = "recurrence_log.json"
+ZIP_PATTERN = "*recurrence_log*.zip"  # the CI artifact, also as re-downloaded ("recurrence_log (1).zip") or renamed
 
 
 def decide_promotion(count: int, distinct_sources: int, support_size: int) -> tuple[str, list[str]]:
@@ -29,96 +32,216 @@ def decide_promotion(count: int, distinct_sources: int, support_size: int) -> tu
     return "NONE", reasons + ["rule:else"]
 
 
-def aggregate(inputs):
-    now = datetime.now(timezone.utc).isoformat()
-    total_files = 0
+def _discover(p: Path) -> list[Path]:
+    """
+    recurrence_log.json files and recurrence_log zip artifacts under p (plus journal- or shard-only logs
+    that have no snapshot yet), sorted by path so the order is deterministic and new run-* dirs land at the end.
+    Other .zip files are not artifacts and are left alone; a .zip passed directly is always read.
+    """
+    if not p.is_dir():
+        return [p]
+    files = list(p.rglob("recurrence_log.json")) + list(p.rglob("recurrence_log.sqlite")) + list(p.rglob(ZIP_PATTERN))
+    pending = (list(p.rglob("recurrence_log.journal.jsonl")) + list(p.rglob("recurrence_log.journal.jsonl.compacting-*"))
+               + [d for d in p.rglob("recurrence_log.d") if d.is_dir()])
+    for j in pending:
+        snap = j.with_name("recurrence_log.json")
+        if not snap.exists() and snap not in files:
+            files.append(snap)
+    return sorted(files)
+
 
-    acc = defaultdict(lambda: {
+def _load_log(f: Path) -> dict:
+    if f.suffix in SQLITE_SUFFIXES:
+        conn = recurrence_sqlite.connect(f)
+        try:
+            return recurrence_sqlite.export_log(conn)
+        finally:
+            conn.close()
+    # snapshot + journal + shards (if any) = merged view
+    if shard_dir(f).is_dir():
+        return load_sharded(f)
+    if journal_files(f):
+        return load_merged(f)
+    return _load_json(f, {})
+
+
+def _empty_partial_item() -> dict:
+    return {
         "type": None,
         "tag": None,
         "count": 0,
         "first_seen": None,
         "last_seen": None,
-        "sources": [],   # union
-        "support": [],   # union
-        "examples": []
-    })
+        "source_keys": set(),   # all distinct (case_id, asof) -> distinct_sources
+        "sources": [],          # first 20 distinct, as in the final output
+        "support_keys": set(),  # all distinct support strings -> support_size
+        "support": [],          # first 200 distinct
+        "examples": [],         # last 10
+    }
 
-    for p in inputs:
-        p = Path(p)
-        files = list(p.rglob("recurrence_log.json")) if p.is_dir() else [p]
 
-        for f in files:
-            doc = _load_json(f, {})
-            items = doc.get("items", {})
-            if not isinstance(items, dict):
-                continue
-            total_files += 1
-
-            for fp, it in items.items():
-                a = acc[fp]
-                a["type"] = a["type"] or it.get("type")
-                a["tag"] = a["tag"] if a["tag"] is not None else it.get("tag")
-                a["count"] += int(it.get("count", 0) or 0)
-
-                fs = it.get("first_seen")
-                ls = it.get("last_seen")
-                if fs and (a["first_seen"] is None or fs < a["first_seen"]):
-                    a["first_seen"] = fs
-                if ls and (a["last_seen"] is None or ls > a["last_seen"]):
-                    a["last_seen"] = ls
-
-                # union sources
-                srcs = it.get("sources", [])
-                if isinstance(srcs, list):
-                    a["sources"].extend(srcs)
-
-                # union support
-                sup = it.get("support", [])
-                if isinstance(sup, list):
-                    a["support"].extend(sup)
-
-                # examples
-                ex = it.get("examples", [])
-                if isinstance(ex, list) and ex:
-                    a["examples"].extend(ex)
-                if len(a["examples"]) > 10:
-                    a["examples"] = a["examples"][-10:]
+def _add_sources(a: dict, srcs):
+    for s in srcs:
+        key = (s.get("case_id"), s.get("asof"))
+        if key in a["source_keys"]:
+            continue
+        a["source_keys"].add(key)
+        if len(a["sources"]) < 20:
+            a["sources"].append(s)
 
-    merged_items = {}
-    ranking = []
 
-    for fp, it in acc.items():
-        # dedupe sources by (case_id, asof)
-        seen = set()
-        dedup_sources = []
-        for s in it["sources"]:
-            key = (s.get("case_id"), s.get("asof"))
-            if key in seen:
-                continue
-            seen.add(key)
-            dedup_sources.append(s)
+def _add_support(a: dict, sup):
+    for x in sup:
+        if not isinstance(x, str) or x in a["support_keys"]:
+            continue
+        a["support_keys"].add(x)
+        if len(a["support"]) < 200:
+            a["support"].append(x)
+
+
+def _fold_item(a: dict, it: dict):
+    """One recurrence_log item -> partial item (dedupe + bound as we go)."""
+    a["type"] = a["type"] or it.get("type")
+    a["tag"] = a["tag"] if a["tag"] is not None else it.get("tag")
+    a["count"] += int(it.get("count", 0) or 0)
+
+    fs = it.get("first_seen")
+    ls = it.get("last_seen")
+    if fs and (a["first_seen"] is None or fs < a["first_seen"]):
+        a["first_seen"] = fs
+    if ls and (a["last_seen"] is None or ls > a["last_seen"]):
+        a["last_seen"] = ls
+
+    srcs = it.get("sources", [])
+    if isinstance(srcs, list):
+        _add_sources(a, srcs)
+
+    sup = it.get("support", [])
+    if isinstance(sup, list):
+        _add_support(a, sup)
+
+    ex = it.get("examples", [])
+    if isinstance(ex, list) and ex:
+        a["examples"] = (a["examples"] + ex)[-10:]
+
 
-        support_set = list(dict.fromkeys([x for x in it["support"] if isinstance(x, str)]))
+def _merge_item(a: dict, b: dict):
+    """a := a (+) b. Associative; a's values win ties, exactly like folding b's inputs after a's."""
+    a["type"] = a["type"] or b["type"]
+    a["tag"] = a["tag"] if a["tag"] is not None else b["tag"]
+    a["count"] += b["count"]
+    if b["first_seen"] and (a["first_seen"] is None or b["first_seen"] < a["first_seen"]):
+        a["first_seen"] = b["first_seen"]
+    if b["last_seen"] and (a["last_seen"] is None or b["last_seen"] > a["last_seen"]):
+        a["last_seen"] = b["last_seen"]
 
+    # first-20 of the merged order only ever needs b's first 20 (b keeps exactly those)
+    for s in b["sources"]:
+        if len(a["sources"]) >= 20:
+            break
+        if (s.get("case_id"), s.get("asof")) not in a["source_keys"]:
+            a["sources"].append(s)
+    a["source_keys"] |= b["source_keys"]
+
+    for x in b["support"]:
+        if len(a["support"]) >= 200:
+            break
+        if x not in a["support_keys"]:
+            a["support"].append(x)
+    a["support_keys"] |= b["support_keys"]
+
+    if b["examples"]:
+        a["examples"] = (a["examples"] + b["examples"])[-10:]
+
+
+def empty_partial() -> dict:
+    return {"num_files": 0, "items": {}}
+
+
+def partial_from_doc(doc: dict) -> dict:
+    """Partial aggregate of one recurrence_log document (num_files=0 if it has no items dict)."""
+    out = empty_partial()
+    items = doc.get("items", {})
+    if not isinstance(items, dict):
+        return out
+    out["num_files"] = 1
+    acc = out["items"]
+    for fp, it in items.items():
+        a = acc.get(fp)
+        if a is None:
+            a = acc[fp] = _empty_partial_item()
+        _fold_item(a, it)
+    return out
+
+
+def zip_members(z: Path) -> list[tuple]:
+    """(name, crc, size, offset) of the recurrence_log.json members of an archive, by name (central directory only)."""
+    with zipfile.ZipFile(z) as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir() and PurePosixPath(i.filename).name == ZIP_MEMBER]
+    return sorted((i.filename, i.CRC, i.file_size, i.header_offset) for i in infos)
+
+
+def partial_from_zip(z: Path, members) -> dict:
+    """
+    One partial for the given members of an archive, streamed without extraction.
+    Members are read in offset order (one sequential pass) and folded in name
+    order, which is the order the extracted files would have been discovered in.
+    """
+    parts = {}
+    with zipfile.ZipFile(z) as zf:
+        for name, *_ in sorted(members, key=lambda m: m[3]):
+            with zf.open(name) as fh:
+                doc = _loads(fh.read())
+            parts[name] = partial_from_doc(doc if isinstance(doc, dict) else {})
+    acc = empty_partial()
+    for name, *_ in members:
+        merge_partials(acc, parts[name])
+    return acc
+
+
+def partial_from_file(f) -> dict:
+    if isinstance(f, tuple):  # (archive, members) from discover_inputs
+        return partial_from_zip(*f)
+    return partial_from_doc(_load_log(Path(f)))
+
+
+def merge_partials(a: dict, b: dict) -> dict:
+    """Associative merge (in place into a): merge(merge(x, y), z) == merge(x, merge(y, z))."""
+    a["num_files"] += b["num_files"]
+    acc = a["items"]
+    for fp, it in b["items"].items():
+        if fp in acc:
+            _merge_item(acc[fp], it)
+        else:
+            acc[fp] = it
+    return a
+
+
+def finish(partial: dict) -> dict:
+    """Partial -> aggregate-v0.1 document."""
+    now = datetime.now(timezone.utc).isoformat()
+    merged_items = {}
+    ranking = []
+
+    for fp, it in partial["items"].items():
         promo, promo_reason = decide_promotion(
             count=it["count"],
-            distinct_sources=len(dedup_sources),
-            support_size=len(support_set)
+            distinct_sources=len(it["source_keys"]),
+            support_size=len(it["support_keys"])
         )
 
         merged = {
             "type": it["type"],
             "tag": it["tag"],
             "count": it["count"],
-            "distinct_sources": len(dedup_sources),
-            "support_size": len(support_set),
+            "distinct_sources": len(it["source_keys"]),
+            "support_size": len(it["support_keys"]),
             "promotion": promo,
             "promotion_reason": promo_reason,
             "first_seen": it["first_seen"],
             "last_seen": it["last_seen"],
-            "sources": dedup_sources[:20],
-            "support": support_set[:200],
+            "sources": it["sources"],
+            "support": it["support"],
             "examples": it["examples"],
         }
         merged_items[fp] = merged
@@ -129,26 +252,283 @@ def aggregate(inputs):
     return {
         "version": "aggregate-v0.1",
         "generated_at": now,
-        "inputs": {"num_files": total_files},
+        "inputs": {"num_files": partial["num_files"]},
         "top": ranking[:50],
         "items": merged_items
     }
 
 
+def cluster_items(partial: dict, cluster_of) -> dict:
+    """
+    Group partial items by near-duplicate cluster (cluster_of: fp -> cluster id,
+    e.g. core.recurrence_cluster.ClusterIndex.cluster_of) and promote per cluster.
+    """
+    groups = {}
+    for fp, it in partial["items"].items():
+        groups.setdefault(cluster_of(fp), []).append((fp, it))
+
+    out = {}
+    for cid in sorted(groups):
+        members = sorted(groups[cid], key=lambda x: x[0])
+        source_keys, support_keys = set(), set()
+        count = 0
+        for _, it in members:
+            count += it["count"]
+            source_keys |= it["source_keys"]
+            support_keys |= it["support_keys"]
+        promo, promo_reason = decide_promotion(
+            count=count,
+            distinct_sources=len(source_keys),
+            support_size=len(support_keys)
+        )
+        firsts = [it["first_seen"] for _, it in members if it["first_seen"]]
+        lasts = [it["last_seen"] for _, it in members if it["last_seen"]]
+        out[cid] = {
+            "type": members[0][1]["type"],
+            "tags": sorted({it["tag"] for _, it in members if it["tag"] is not None}),
+            "members": [fp for fp, _ in members],
+            "count": count,
+            "distinct_sources": len(source_keys),
+            "support_size": len(support_keys),
+            "promotion": promo,
+            "promotion_reason": promo_reason,
+            "first_seen": min(firsts) if firsts else None,
+            "last_seen": max(lasts) if lasts else None,
+        }
+    return out
+
+
+def add_clusters(out: dict, partial: dict, cluster_of) -> dict:
+    """Attach `clusters` and `top_clusters` (by count) to an aggregate document."""
+    clusters = cluster_items(partial, cluster_of)
+    ranking = sorted(({"cluster": cid, **c} for cid, c in clusters.items()), key=lambda x: x["count"], reverse=True)
+    out["clusters"] = clusters
+    out["top_clusters"] = ranking[:50]
+    return out
+
+
+def discover_inputs(inputs) -> list:
+    """
+    Input units in fold order: log paths, and (archive, members) tuples for .zip artifacts.
+    Zip members already seen (same CRC-32 and size) are skipped, so a re-downloaded
+    artifact counts once; archives with nothing new are dropped. Plain files are never
+    skipped: two runs that wrote the same log are two observations.
+    """
+    files = []
+    seen = set()
+    for p in inputs:
+        for f in _discover(Path(p)):
+            if f.suffix != ".zip":
+                files.append(f)
+                continue
+            members = []
+            for m in zip_members(f):
+                if (m[1], m[2]) not in seen:
+                    seen.add((m[1], m[2]))
+                    members.append(m)
+            if members:
+                files.append((f, tuple(members)))
+    return files
+
+
+def aggregate(inputs, workers: int = 1, chunksize: int = 4, cluster_of=None):
+    """
+    Map-reduce: one partial per file (process pool if workers > 1), folded in input order.
+    Memory is bounded by the number of distinct values, not by the total across files.
+    cluster_of (fp -> cluster id): also promote per near-duplicate cluster (see add_clusters).
+    """
+    acc = empty_partial()
+    for part in ordered_map(partial_from_file, discover_inputs(inputs), workers=workers, chunksize=chunksize):
+        with metrics.stage("aggregate_merge"):
+            merge_partials(acc, part)
+    metrics.count("recurrence_files", acc["num_files"])
+    out = finish(acc)
+    return add_clusters(out, acc, cluster_of) if cluster_of else out
+
+
+# --- incremental cache (manifest of path/size/mtime/sha256 + per-file partials) ---
+
+CACHE_VERSION = "aggregate-cache-v1"
+
+
+def _partial_to_json(part: dict) -> dict:
+    items = {}
+    for fp, it in part["items"].items():
+        j = dict(it)
+        j["source_keys"] = [list(k) for k in it["source_keys"]]
+        j["support_keys"] = list(it["support_keys"])
+        items[fp] = j
+    return {"num_files": part["num_files"], "items": items}
+
+
+def _partial_from_json(j: dict) -> dict:
+    # always fresh objects: merge_partials adopts and mutates b's items
+    items = {}
+    for fp, it in j["items"].items():
+        a = dict(it)
+        a["source_keys"] = {tuple(k) for k in it["source_keys"]}
+        a["support_keys"] = set(it["support_keys"])
+        a["sources"] = list(it["sources"])
+        a["support"] = list(it["support"])
+        a["examples"] = list(it["examples"])
+        items[fp] = a
+    return {"num_files": j["num_files"], "items": items}
+
+
+def _members(f: Path) -> list[Path]:
+    """Files whose content makes up one input (a snapshot plus its journal and shards, if any)."""
+    out = [f]
+    if f.suffix not in SQLITE_SUFFIXES:
+        out.extend(journal_files(f))
+        out.extend(list_shards(f))
+    return out
+
+
+def _stat_sig(f) -> list:
+    if isinstance(f, tuple):  # archive stat + the members taken from it
+        st = f[0].stat()
+        return [[f[0].name, st.st_size, st.st_mtime_ns]] + [list(m[:3]) for m in f[1]]
+    sig = []
+    for m in _members(f):
+        try:
+            st = m.stat()
+            sig.append([m.name, st.st_size, st.st_mtime_ns])
+        except FileNotFoundError:
+            sig.append([m.name, None, None])
+    return sig
+
+
+def _content_hash(f) -> str:
+    h = hashlib.sha256()
+    if isinstance(f, tuple):  # member CRCs stand in for the content; no need to re-read the archive
+        for name, crc, size, _ in f[1]:
+            h.update(f"{name}\0{crc}\0{size}\0".encode("utf-8"))
+        return h.hexdigest()
+    for m in _members(f):
+        h.update(m.name.encode("utf-8") + b"\0")
+        if m.exists():
+            with m.open("rb") as fh:
+                for block in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(block)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _partial_json_from_file(f) -> dict:
+    return _partial_to_json(partial_from_file(f))
+
+
+def aggregate_cached(inputs, cache_path: Path, workers: int = 1, chunksize: int = 4,
+                     cluster_of=None) -> tuple[dict, dict]:
+    """
+    Incremental aggregate: only new/changed files are parsed.
+      - unchanged (size + mtime) -> cached partial
+      - touched but same sha256 -> cached partial
+      - if the cached file list is an unchanged prefix of the current one, the
+        cached merged state is reused and only the tail is folded in; otherwise
+        (changes, removals, reordering) all partials are re-folded from the cache
+    Output is identical to aggregate(inputs). Returns (aggregate, stats).
+    """
+    files = discover_inputs(inputs)
+    cache = _load_json(cache_path, {})
+    if cache.get("version") != CACHE_VERSION:
+        cache = {}
+    cached = {e["path"]: e for e in cache.get("files", [])}
+
+    entries = []
+    to_parse = []
+    for f in files:
+        key = str((f[0] if isinstance(f, tuple) else f).resolve())
+        sig = _stat_sig(f)
+        e = cached.get(key)
+        if e is not None and e["stat"] == sig:
+            entries.append(e)
+            continue
+        digest = _content_hash(f)
+        if e is not None and e["sha256"] == digest:
+            entries.append({**e, "stat": sig})
+            continue
+        e = {"path": key, "stat": sig, "sha256": digest, "partial": None}
+        entries.append(e)
+        to_parse.append((e, f))
+
+    for (e, _), part in zip(to_parse, ordered_map(_partial_json_from_file, [f for _, f in to_parse],
+                                                  workers=workers, chunksize=chunksize)):
+        e["partial"] = part
+
+    # reuse the folded state when the previous run is an unchanged prefix
+    prev = cache.get("files", [])
+    n_prev = len(prev)
+    prefix_ok = (
+        "state" in cache
+        and n_prev <= len(entries)
+        and all(p["path"] == e["path"] and p["sha256"] == e["sha256"] for p, e in zip(prev, entries))
+    )
+    if prefix_ok:
+        acc = _partial_from_json(cache["state"])
+        tail = entries[n_prev:]
+    else:
+        acc = empty_partial()
+        tail = entries
+    with metrics.stage("aggregate_merge"):
+        for e in tail:
+            merge_partials(acc, _partial_from_json(e["partial"]))
+
+    out = finish(acc)
+    if cluster_of:
+        add_clusters(out, acc, cluster_of)
+    _save_json(cache_path, compact=True, atomic=True, obj={
+        "version": CACHE_VERSION,
+        "files": entries,
+        "state": _partial_to_json(acc),
+    })
+    stats = {"files": len(entries), "parsed": len(to_parse), "folded": len(tail), "state_reused": prefix_ok}
+    metrics.count("aggregate_cache", len(entries) - len(to_parse), result="hit")
+    metrics.count("aggregate_cache", len(to_parse), result="miss")
+    return out, stats
+
+
 if __name__ == "__main__":
     import argparse
     ap = argparse.ArgumentParser()
     ap.add_argument("--in", dest="inputs", nargs="+", required=True,
-                    help="files or directories to scan (dir searches **/recurrence_log.json)")
+                    help="files, .zip artifacts or directories to scan "
+                         "(dir searches **/recurrence_log.json, **/recurrence_log.sqlite, **/*recurrence_log*.zip)")
     ap.add_argument("--out", dest="outp", required=True, help="output json path")
+    ap.add_argument("--workers", type=int, default=1, help="parse files / archives in a process pool of this size")
+    ap.add_argument("--cache", default=None,
+                    help="incremental cache path; reruns only parse new/changed files")
+    ap.add_argument("--compact", action="store_true", help="write compact JSON (machine-to-machine)")
+    ap.add_argument("--cluster", default=None,
+                    help="cluster index (core/recurrence_cluster.py): also promote per near-duplicate cluster")
+    metrics.add_metrics_args(ap)
     args = ap.parse_args()
+    metrics.start_from_args(args)
+
+    cluster_of = None
+    if args.cluster:
+        from core.recurrence_cluster import ClusterIndex
+        cluster_of = ClusterIndex(Path(args.cluster)).cluster_of
 
-    out = aggregate(args.inputs)
-    _save_json(Path(args.outp), out)
+    if args.cache:
+        out, stats = aggregate_cached(args.inputs, Path(args.cache), workers=args.workers,
+                                      cluster_of=cluster_of)
+        print(f"[aggregate] cache files={stats['files']} parsed={stats['parsed']} "
+              f"folded={stats['folded']} state_reused={stats['state_reused']}")
+    else:
+        out = aggregate(args.inputs, workers=args.workers, cluster_of=cluster_of)
+    _save_json(Path(args.outp), out, compact=args.compact)
+    for it in out["items"].values():
+        metrics.count("promotions", 1, promotion=it["promotion"])
+    metrics.finish_from_args(args, "aggregate")
     print(f"[aggregate] files={out['inputs']['num_files']} items={len(out['items'])} -> {args.outp}")
     if out["top"]:
         print("[top]")
         for x in out["top"][:10]:
             tag = f":{x['tag']}" if x.get("tag") else ""
             print(f"  {x['count']}x  {x.get('type')}{tag}  {x['promotion']}")
+    if out.get("top_clusters"):
+        print(f"[top clusters] clusters={len(out['clusters'])}")
+        for x in out["top_clusters"][:10]:
+            print(f"  {x['count']}x  {x.get('type')}  members={len(x['members'])}  {x['promotion']}  {x['cluster']}")
 